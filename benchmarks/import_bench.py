@@ -0,0 +1,53 @@
+# cadquery_parametric_addon/benchmarks/import_bench.py
+# Замер массового импорта дерева (JSON V2) на синтетических деревьях.
+#
+# Запуск (аддон должен быть установлен и включен):
+#   blender --background --python benchmarks/import_bench.py -- --nodes 1000 5000
+import argparse
+import importlib
+import sys
+import time
+
+import bpy
+
+CHAIN_LENGTH = 10 # Box + 9 Translate в каждой цепочке
+
+
+def make_tree_data(node_count: int) -> dict:
+    """V2 tree dict of Box -> Translate -> ... chains with `node_count` nodes in total."""
+    nodes, links = [], []
+    for i in range(node_count):
+        name = f"N{i}"
+        x, y = (i % CHAIN_LENGTH) * 200.0, (i // CHAIN_LENGTH) * -200.0
+        if i % CHAIN_LENGTH == 0:
+            nodes.append({"bl_idname": "CQPNode_PrimitiveBoxNode", "name": name, "label": "", "location": [x, y],
+                          "properties": {"length_": 1.0 + i % 7, "width_": 2.0, "height_": 0.5}})
+        else:
+            nodes.append({"bl_idname": "CQPNode_TransformationTranslateNode", "name": name, "label": "", "location": [x, y],
+                          "properties": {"translation_": {"type": "Vector", "value": [0.1 * (i % 5), 0.0, 1.0]}}})
+            from_socket = "Box Object" if (i - 1) % CHAIN_LENGTH == 0 else "Object Out"
+            links.append({"from_node": f"N{i - 1}", "from_socket": from_socket, "to_node": name, "to_socket": "Object In"})
+    return {"bl_idname": "CadQueryNodeTreeType", "name": "Benchmark", "nodes": nodes, "links": links}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark bulk JSON tree import")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 5000], help="Tree sizes to import")
+    parser.add_argument("--addon", default="cadquery_parametric_addon", help="Package name of the installed addon")
+    args = parser.parse_args(argv)
+
+    io_json = importlib.import_module(f"{args.addon}.nodes.operations.io_json")
+    for count in args.nodes:
+        tree_data = make_tree_data(count)
+        tree = bpy.data.node_groups.new(f"Benchmark {count}", "CadQueryNodeTreeType")
+        tree.sv_process = False # Меряем только импорт, без пересчета CadQuery
+        start = time.perf_counter()
+        created = io_json.import_tree_data(tree, tree_data)
+        elapsed = time.perf_counter() - start
+        print(f"{count:6d} nodes, {len(tree_data['links']):6d} links: {elapsed:8.3f}s "
+              f"({elapsed / max(len(created), 1) * 1000:.3f} ms/node, {len(tree.links)} links created)")
+        bpy.data.node_groups.remove(tree)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
@@ -0,0 +1,79 @@
+# cadquery_parametric_addon/core/boolean_options.py
+# Опции булевых операций OCC (параллельность, fuzzy, glue, OBB) для нод и значения по умолчанию дерева
+import bpy
+from bpy.props import EnumProperty, BoolProperty, FloatProperty
+
+from .constants import BOOLEAN_PROFILE_KEY, BOOLEAN_GLUE_MODES
+from .node_tree import CadQueryNode
+from ..dependencies import cadquery_available
+
+if cadquery_available:
+    from OCP.BOPAlgo import BOPAlgo_GlueOff, BOPAlgo_GlueShift, BOPAlgo_GlueFull
+    _GLUE_VALUES = {'OFF': BOPAlgo_GlueOff, 'SHIFT': BOPAlgo_GlueShift, 'FULL': BOPAlgo_GlueFull}
+else:
+    _GLUE_VALUES = {}
+
+OPTIONS_SOURCES = [
+    ('TREE', "Tree Defaults", "Use the Boolean defaults of the node tree"),
+    ('NODE', "Node", "Use the options set on this node"),
+]
+
+
+class BooleanOptions:
+    """Effective options of one OCC Boolean build (BRepAlgoAPI_BooleanOperation)."""
+    __slots__ = ('parallel', 'fuzzy', 'glue', 'use_obb')
+
+    def __init__(self, parallel=True, fuzzy=0.0, glue='OFF', use_obb=False):
+        self.parallel = parallel; self.fuzzy = fuzzy; self.glue = glue; self.use_obb = use_obb
+
+    def apply(self, builder):
+        """Configures a BRepAlgoAPI builder before Build()."""
+        builder.SetRunParallel(self.parallel)
+        if self.fuzzy > 0.0: builder.SetFuzzyValue(self.fuzzy)
+        if self.glue != 'OFF': builder.SetGlue(_GLUE_VALUES[self.glue])
+        builder.SetUseOBB(self.use_obb)
+
+    def describe(self) -> str:
+        parts = ["parallel" if self.parallel else "serial"]
+        if self.fuzzy > 0.0: parts.append(f"fuzzy={self.fuzzy:g}")
+        if self.glue != 'OFF': parts.append(f"glue={self.glue.lower()}")
+        if self.use_obb: parts.append("obb")
+        return ", ".join(parts)
+
+    def __repr__(self):
+        return f"BooleanOptions({self.describe()})"
+
+
+def tree_boolean_options(tree) -> BooleanOptions:
+    """Boolean defaults stored on a CadQuery node tree."""
+    return BooleanOptions(tree.bool_parallel, tree.bool_fuzzy, tree.bool_glue, tree.bool_use_obb)
+
+
+class BooleanOptionsMixin:
+    """Node mixin adding OCC Boolean options (or the tree defaults) and a profile readout."""
+
+    bool_source_: EnumProperty( items=OPTIONS_SOURCES, name="Boolean Options", default='TREE', update=CadQueryNode.process_node )
+    bool_parallel_: BoolProperty( name="Parallel", default=True, description="Run the Boolean in parallel threads", update=CadQueryNode.process_node )
+    bool_fuzzy_: FloatProperty( name="Fuzzy", default=0.0, min=0.0, precision=6, description="Additional tolerance for nearly coincident geometry (0 = off)", update=CadQueryNode.process_node )
+    bool_glue_: EnumProperty( items=BOOLEAN_GLUE_MODES, name="Glue", default='OFF', update=CadQueryNode.process_node )
+    bool_use_obb_: BoolProperty( name="OBB", default=False, description="Use oriented bounding boxes to filter interferences", update=CadQueryNode.process_node )
+
+    def boolean_options(self) -> BooleanOptions:
+        """Effective options: the node's own or the tree defaults."""
+        if self.bool_source_ == 'TREE' and hasattr(self.id_data, 'bool_parallel'):
+            return tree_boolean_options(self.id_data)
+        return BooleanOptions(self.bool_parallel_, self.bool_fuzzy_, self.bool_glue_, self.bool_use_obb_)
+
+    def record_boolean_profile(self, options: BooleanOptions, seconds: float):
+        """Stores the effective options and duration of the node's last Boolean."""
+        self[BOOLEAN_PROFILE_KEY] = {"options": options.describe(), "seconds": seconds}
+
+    def draw_boolean_options(self, layout):
+        box = layout.box()
+        box.prop(self, "bool_source_", text="")
+        if self.bool_source_ == 'NODE':
+            row = box.row(align=True); row.prop(self, "bool_parallel_", toggle=True); row.prop(self, "bool_use_obb_", toggle=True)
+            box.prop(self, "bool_fuzzy_"); box.prop(self, "bool_glue_")
+        profile = self.get(BOOLEAN_PROFILE_KEY)
+        if profile:
+            box.label(text=f"{profile['options']}: {profile['seconds'] * 1000:.1f} ms", icon='TIME')
@@ -1,16 +1,70 @@
 # cadquery_parametric_addon/core/cad_manager.py
 import logging
+import time
+from collections import OrderedDict
 from ..dependencies import cq, cadquery_available # Используем импорт из dependencies
 from .exceptions import CadQueryExecutionError, DependencyError, NodeProcessingError
 
 logger = logging.getLogger(__name__)
 
+if cadquery_available:
+    from OCP.BRepFilletAPI import BRepFilletAPI_MakeFillet, BRepFilletAPI_MakeChamfer
+    from OCP.TopExp import TopExp
+    from OCP.TopAbs import TopAbs_EDGE, TopAbs_FACE
+    from OCP.TopTools import TopTools_IndexedDataMapOfShapeListOfShape
+    from OCP.TopoDS import TopoDS
+    from OCP.BRepAlgoAPI import BRepAlgoAPI_Fuse, BRepAlgoAPI_Cut, BRepAlgoAPI_Common
+    from OCP.BRepBndLib import BRepBndLib
+    from OCP.Bnd import Bnd_Box, Bnd_OBB
+    from OCP.BRepFeat import BRepFeat_MakePrism
+    from OCP.gp import gp_Dir
+    from OCP.TopTools import TopTools_ListOfShape
+
+# Число Shape, для которых хранятся габариты (LRU)
+BOUNDS_CACHE_SIZE = 256
+# Булевы операции, для которых ведется статистика быстрых путей
+BOOLEAN_STAT_OPERATIONS = ('union', 'cut', 'intersect', 'fuse')
+
+def _aabb(shape):
+    """Axis-aligned Bnd_Box of a cq.Shape (by geometry, without triangulation)."""
+    box = Bnd_Box()
+    BRepBndLib.Add_s(shape.wrapped, box, False)
+    return box
+
+def _obb(shape):
+    """Oriented Bnd_OBB of a cq.Shape (fast, non-optimal fit, enlarged by the shape tolerances)."""
+    box = Bnd_OBB()
+    BRepBndLib.AddOBB_s(shape.wrapped, box, False, False, True)
+    return box
+
+def _enlarged(box, gap: float):
+    """Copy of a Bnd_Box / Bnd_OBB enlarged by `gap` (the cached box is left untouched)."""
+    if gap <= 0.0: return box
+    result = type(box)(); result.Add(box); result.Enlarge(gap)
+    return result
+
+def _gap(options) -> float:
+    """Extra clearance for bounding-box tests: OCC also joins operands within the fuzzy value."""
+    return options.fuzzy if options is not None else 0.0
+
+_BOOLEAN_BUILDERS = {'union': BRepAlgoAPI_Fuse, 'cut': BRepAlgoAPI_Cut, 'intersect': BRepAlgoAPI_Common} if cadquery_available else {}
+
+def _shape_list(shapes):
+    """TopTools_ListOfShape of the wrapped TopoDS shapes."""
+    result = TopTools_ListOfShape()
+    for shape in shapes: result.Append(shape.wrapped)
+    return result
+
 class CadManager:
     """Handles execution of CadQuery operations."""
 
     def __init__(self):
         if not cadquery_available:
             logger.error("CadQuery library is not available. Cannot initialize CadManager.")
+        # hash(Shape) -> [TopoDS_Shape, Bnd_Box, Bnd_OBB | None]; совпадение проверяется через IsSame
+        self._bounds_cache = OrderedDict()
+        self.boolean_stats = {}
+        self.reset_boolean_stats()
 
     def _check_cq(self):
         """Checks if CadQuery is available before execution."""
@@ -74,8 +128,11 @@ class CadManager:
             logger.error(f"Error executing CadQuery primitive '{primitive_name}': {e}", exc_info=True)
             raise CadQueryExecutionError(None, f"Error in '{primitive_name}': {e}")
 
-    def execute_operation(self, base_obj, other_obj, operation_name: str):
-        """Executes a boolean operation (union, cut, intersect) on Workplanes."""
+    def execute_operation(self, base_obj, other_obj, operation_name: str, options=None):
+        """Executes a boolean operation (union, cut, intersect) on Workplanes.
+
+        With `options` (BooleanOptions) the operation runs as a configured BRepAlgoAPI build.
+        """
         self._check_cq()
         # logger.debug(f"Executing operation: {operation_name} on {type(base_obj)} with {type(other_obj)}")
 
@@ -99,8 +156,17 @@ class CadManager:
              raise CadQueryExecutionError(None, f"'Other' Shape for '{operation_name}' is invalid.")
         # --------------------------------
 
+        # --- Быстрый путь: габариты операндов не пересекаются ---
+        fast_result = self.boolean_fast_path(base_obj, other_obj, operation_name, options)
+        if fast_result is not None: return fast_result
+
         # --- Выполняем операцию на базовом объекте (Workplane) ---
         try:
+            # С опциями - напрямую через BRepAlgoAPI (clean, как у Workplane.union/cut/intersect)
+            builder_cls = _BOOLEAN_BUILDERS.get(operation_name) if options is not None else None
+            if builder_cls is not None:
+                result_shape = self.run_boolean(builder_cls, self.shapes_of(base_obj), self.shapes_of(other_obj), True, options)
+                return cq.Workplane("XY").add(result_shape)
             # logger.debug(f"  Attempting base_obj.{operation_name}(other_obj)")
             operation_func = getattr(base_obj, operation_name) # Ищем метод у base_obj (Workplane)
             result = operation_func(other_obj) # Передаем второй объект как есть
@@ -137,5 +203,228 @@ class CadManager:
             logger.error(f"Error executing CadQuery Workplane operation '{operation_name}': {e}", exc_info=True)
             raise CadQueryExecutionError(None, f"Error in '{operation_name}': {e}")
 
+    # --- Габариты и быстрые пути булевых операций ---
+    def _bounds(self, shape):
+        key = hash(shape)
+        entry = self._bounds_cache.get(key)
+        if entry is not None and entry[0].IsSame(shape.wrapped):
+            self._bounds_cache.move_to_end(key)
+            return entry
+        entry = [shape.wrapped, _aabb(shape), None]
+        self._bounds_cache[key] = entry
+        if len(self._bounds_cache) > BOUNDS_CACHE_SIZE: self._bounds_cache.popitem(last=False)
+        return entry
+
+    def aabb(self, shape):
+        """Cached axis-aligned Bnd_Box of a cq.Shape."""
+        return self._bounds(shape)[1]
+
+    def obb(self, shape):
+        """Cached oriented Bnd_OBB of a cq.Shape (computed on first use)."""
+        entry = self._bounds(shape)
+        if entry[2] is None: entry[2] = _obb(shape)
+        return entry[2]
+
+    def clear_bounds_cache(self):
+        self._bounds_cache.clear()
+
+    def shapes_disjoint(self, shapes_a, shapes_b, gap: float = 0.0) -> bool:
+        """True if no bounding box of `shapes_a` overlaps one of `shapes_b` (AABB first, then OBB).
+
+        Boxes include the shape tolerances; both are further enlarged by `gap` (fuzzy value).
+        """
+        for a in shapes_a:
+            box_a = _enlarged(self.aabb(a), gap)
+            for b in shapes_b:
+                if box_a.IsOut(_enlarged(self.aabb(b), gap)): continue
+                if _enlarged(self.obb(a), gap).IsOut(_enlarged(self.obb(b), gap)): continue
+                return False
+        return True
+
+    def reset_boolean_stats(self):
+        self.boolean_stats.clear()
+        for op in BOOLEAN_STAT_OPERATIONS: self.boolean_stats[op] = {'calls': 0, 'fast': 0}
+        self.boolean_stats['tools_skipped'] = 0
+
+    def _count(self, operation_name, fast):
+        stats = self.boolean_stats.setdefault(operation_name, {'calls': 0, 'fast': 0})
+        stats['calls'] += 1
+        if fast: stats['fast'] += 1
+
+    def boolean_fast_path(self, base_obj, other_obj, operation_name, options=None):
+        """Result of union/cut/intersect for operands with disjoint bounding boxes, None if they may touch.
+
+        Disjoint operands: cut returns A, intersect an empty compound, union a compound of A and B.
+        The fuzzy value of `options` (BooleanOptions) widens the boxes.
+        """
+        if operation_name not in ('union', 'cut', 'intersect'): return None
+        shapes_a = self.shapes_of(base_obj); shapes_b = self.shapes_of(other_obj)
+        disjoint = bool(shapes_a and shapes_b) and self.shapes_disjoint(shapes_a, shapes_b, _gap(options))
+        self._count(operation_name, disjoint)
+        if not disjoint: return None
+        logger.debug(f"Boolean '{operation_name}': operand bounding boxes are disjoint, skipping OCC.")
+        if operation_name == 'cut': return base_obj
+        if operation_name == 'intersect': return cq.Workplane("XY").add(cq.Compound.makeCompound([]))
+        return cq.Workplane("XY").add(cq.Compound.makeCompound(shapes_a + shapes_b))
+
+    # --- Многоаргументные булевы операции ---
+    def shapes_of(self, obj) -> list:
+        """Flattens a Workplane, Shape or list of them into a list of cq.Shape."""
+        if isinstance(obj, cq.Workplane): return [v for v in obj.vals() if isinstance(v, cq.Shape)]
+        if isinstance(obj, cq.Shape): return [obj]
+        if isinstance(obj, (list, tuple)): return [s for item in obj for s in self.shapes_of(item)]
+        return []
+
+    def run_boolean(self, builder_cls, arguments, tools, clean=True, options=None):
+        """Runs one OCC Boolean (BRepAlgoAPI_*) over all arguments and tools at once.
+
+        `options` is a BooleanOptions (parallel, fuzzy, glue, OBB); None runs in parallel
+        with OCC defaults otherwise. Returns a cq.Shape; `clean` merges coplanar faces
+        (ShapeUpgrade_UnifySameDomain). Raises ValueError if the builder fails or the result is invalid.
+        """
+        self._check_cq()
+        builder = builder_cls()
+        builder.SetArguments(_shape_list(arguments))
+        builder.SetTools(_shape_list(tools))
+        if options is not None: options.apply(builder)
+        else: builder.SetRunParallel(True)
+        t0 = time.perf_counter()
+        builder.Build()
+        logger.debug(f"{builder_cls.__name__}: {len(arguments)} argument(s), {len(tools)} tool(s) "
+                    f"[{options.describe() if options is not None else 'parallel'}] in {time.perf_counter() - t0:.4f}s")
+        if not builder.IsDone():
+            raise ValueError(f"{builder_cls.__name__} failed for {len(arguments)} argument(s) and {len(tools)} tool(s)")
+        result = cq.Shape.cast(builder.Shape())
+        if clean:
+            try:
+                cleaned = result.clean()
+                if cleaned.isValid(): result = cleaned
+                else: logger.warning("clean() produced an invalid shape, using the raw Boolean result")
+            except Exception as e: logger.warning(f"clean() failed ({e}), using the raw Boolean result")
+        if not result.isValid(): raise ValueError(f"{builder_cls.__name__} produced an invalid shape")
+        return result
+
+    def fuse_shapes(self, shapes, clean=True, options=None):
+        """Fuses all `shapes` in one multi-argument BRepAlgoAPI_Fuse followed by one clean."""
+        if not shapes: raise ValueError("Nothing to fuse")
+        if len(shapes) == 1: return shapes[0]
+        # Попарно непересекающиеся габариты - объединение равно компаунду
+        gap = _gap(options)
+        disjoint = all(self.shapes_disjoint(shapes[i:i + 1], shapes[i + 1:], gap) for i in range(len(shapes) - 1))
+        self._count('fuse', disjoint)
+        if disjoint: return cq.Compound.makeCompound(shapes)
+        return self.run_boolean(BRepAlgoAPI_Fuse, shapes[:1], shapes[1:], clean, options)
+
+    def split_tools(self, tools) -> list:
+        """Explodes compounds (e.g. located instances of one hole) into separate tool solids."""
+        result = []
+        for tool in tools:
+            if isinstance(tool, cq.Compound):
+                solids = tool.Solids()
+                result.extend(solids if solids else [tool])
+            else: result.append(tool)
+        return result
+
+    def tools_touching(self, bases, tools, gap: float = 0.0) -> list:
+        """Tools whose AABB (enlarged by `gap`) overlaps the AABB of at least one base shape."""
+        base_boxes = [_enlarged(self.aabb(b), gap) for b in bases]
+        return [t for t in tools if any(not box.IsOut(_enlarged(self.aabb(t), gap)) for box in base_boxes)]
+
+    def cut_shapes(self, bases, tools, clean=True, skip_disjoint=True, options=None):
+        """Subtracts all `tools` from `bases` in one multi-tool BRepAlgoAPI_Cut.
+
+        With `skip_disjoint`, tools whose AABB misses every base are dropped first.
+        Returns a cq.Shape (the base itself if no tool is left).
+        """
+        if not bases: raise ValueError("Nothing to cut from")
+        tools = self.split_tools(tools)
+        if skip_disjoint:
+            count = len(tools)
+            tools = self.tools_touching(bases, tools, _gap(options))
+            self.boolean_stats['tools_skipped'] += count - len(tools)
+            if len(tools) < count: logger.debug(f"Cut: skipped {count - len(tools)} of {count} tool(s) outside the base AABB.")
+        self._count('cut', not tools)
+        if not tools:
+            return bases[0] if len(bases) == 1 else cq.Compound.makeCompound(bases)
+        return self.run_boolean(BRepAlgoAPI_Cut, bases, tools, clean, options)
+
+    # --- Локальные фичи ---
+    def extrude_face_local(self, shape, face, normal, distance: float):
+        """Extrudes a face of `shape` along `normal` as a local feature (BRepFeat_MakePrism).
+
+        Only the faces adjacent to the extrusion are rebuilt. Positive `distance` adds
+        material, negative removes it. Raises ValueError if the feature cannot be built.
+        """
+        self._check_cq()
+        sign = 1.0 if distance > 0 else -1.0
+        direction = gp_Dir(normal.x * sign, normal.y * sign, normal.z * sign)
+        try:
+            # Профиль - сама грань, она же грань эскиза (Modify=True: грань базы перестраивается)
+            prism = BRepFeat_MakePrism(shape.wrapped, face.wrapped, face.wrapped, direction, 1 if distance > 0 else 0, True)
+            prism.Perform(abs(distance))
+            if not prism.IsDone(): raise ValueError(f"feature status {prism.CurrentStatusError()}")
+            result = cq.Shape.cast(prism.Shape())
+        except Exception as e:
+            raise ValueError(f"Local prism failed: {e}") from e
+        if not result.isValid(): raise ValueError("Local prism produced an invalid shape")
+        return result
+
+    # --- Фаски / скругления ---
+    def bevel_edges(self, shape, edges, amounts, chamfer=False):
+        """Fillets (or chamfers) all `edges` of `shape` in one OCC build, one amount per edge.
+
+        Raises ValueError if the builder fails or the result is invalid.
+        """
+        self._check_cq()
+        try:
+            if chamfer:
+                builder = BRepFilletAPI_MakeChamfer(shape.wrapped)
+                # Для фаски нужна смежная грань каждого ребра
+                edge_faces = TopTools_IndexedDataMapOfShapeListOfShape()
+                TopExp.MapShapesAndAncestors_s(shape.wrapped, TopAbs_EDGE, TopAbs_FACE, edge_faces)
+                for edge, amount in zip(edges, amounts):
+                    face = TopoDS.Face_s(edge_faces.FindFromKey(edge.wrapped).First())
+                    builder.Add(amount, amount, edge.wrapped, face)
+            else:
+                builder = BRepFilletAPI_MakeFillet(shape.wrapped)
+                for edge, amount in zip(edges, amounts): builder.Add(amount, edge.wrapped)
+            builder.Build()
+            if not builder.IsDone(): raise ValueError("builder did not finish")
+            result = cq.Shape.cast(builder.Shape())
+        except Exception as e:
+            raise ValueError(f"{'Chamfer' if chamfer else 'Fillet'} of {len(edges)} edge(s) failed: {e}") from e
+        if not result.isValid():
+            raise ValueError(f"{'Chamfer' if chamfer else 'Fillet'} of {len(edges)} edge(s) produced an invalid shape")
+        return result
+
+    def find_failing_edges(self, shape, edges, amounts, chamfer=False) -> tuple[list[int], list[list[int]]]:
+        """Bisects a failed batch down to the edges that cannot be beveled.
+
+        Returns (single failing positions in `edges`, groups that fail only together).
+        A group is reported when both of its halves bevel on their own but the group
+        does not, i.e. the edges interact. Groups that bevel are not split further,
+        so O(k log n) builds are needed for k failures. The whole batch must be known
+        to fail; at least one edge or group is always returned.
+        """
+        failing, groups, builds = [], [], 0
+
+        def builds_ok(group) -> bool:
+            nonlocal builds
+            builds += 1
+            try: self.bevel_edges(shape, [edges[i] for i in group], [amounts[i] for i in group], chamfer); return True
+            except ValueError: return False
+
+        stack = [list(range(len(edges)))] # Только заведомо неудачные группы
+        while stack:
+            group = stack.pop()
+            if len(group) == 1: failing.append(group[0]); continue
+            mid = len(group) // 2
+            bad = [half for half in (group[:mid], group[mid:]) if not builds_ok(half)]
+            if bad: stack.extend(reversed(bad))
+            else: groups.append(group) # Каждая половина собирается, вместе - нет
+        logger.debug(f"Bevel bisection: {len(failing)} failing edge(s), {len(groups)} failing group(s) "
+                     f"of {len(edges)} after {builds} build(s).")
+        return sorted(failing), groups
+
 # Глобальный экземпляр менеджера
 cad_manager = CadManager()
\ No newline at end of file
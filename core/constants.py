@@ -3,4 +3,21 @@
 # --- Константы для состояния системы обновления ---
 UPDATE_KEY = "_cqpa_updated"
 ERROR_KEY = "_cqpa_error"
-ERROR_STACK_KEY = "_cqpa_error_stack"
\ No newline at end of file
+ERROR_STACK_KEY = "_cqpa_error_stack"
+
+# --- Служебные данные нод ---
+POSTPROCESS_TIMINGS_KEY = "_cqpa_post_timings"
+BEVEL_FAILED_EDGES_KEY = "_cqpa_failed_edges" # Индексы ребер, не прошедших фаску/скругление
+EXTRUDE_METHOD_KEY = "_cqpa_extrude_method" # Способ, которым узел Extrude Face выполнил последнее выдавливание
+
+# --- Атрибуты меша вьювера ---
+FACE_ID_ATTRIBUTE = "cq_face_id"     # INT на полигон: индекс грани OCC
+SELECTED_ATTRIBUTE = "cq_selected"   # BOOLEAN на полигон: подсветка выбранных граней
+
+# --- Опции булевых операций OCC ---
+BOOLEAN_PROFILE_KEY = "_cqpa_boolean_profile" # Эффективные опции и время последней операции ноды
+BOOLEAN_GLUE_MODES = [
+    ('OFF', "Off", "General Boolean (no gluing)"),
+    ('SHIFT', "Shift", "Arguments interfere only through coincident faces that may be shifted (BOPAlgo_GlueShift)"),
+    ('FULL', "Full", "Arguments interfere only through exactly matching faces (BOPAlgo_GlueFull)"),
+]
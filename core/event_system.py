@@ -1,9 +1,17 @@
 # cadquery_parametric_addon/core/event_system.py
+import bpy
 import logging
+from contextlib import contextmanager
 from .update_system import update_manager # Импортируем UpdateManager
 
 logger = logging.getLogger(__name__)
 
+# (tree name, node name) -> последний scene_key() ноды, зависящей от сцены.
+# Заполняется при обработке нод (track_scene_node); SceneEvent обходит только этот реестр.
+_scene_keys: dict[tuple[str, str], object] = {}
+# Глубина вложенных suspend_events(); > 0 - события деревьев, свойств и сцены игнорируются
+_suspend_depth = 0
+
 # --- Event Classes (Простые классы для передачи информации) ---
 class BaseEvent:
     pass
@@ -27,8 +35,7 @@ class PropertyEvent(BaseEvent):
         return f"<PropertyEvent tree='{self.tree.name}' nodes={node_names}>"
 
 class SceneEvent(BaseEvent):
-     """Событие изменения сцены (если нужно)."""
-     # Пока не используется активно
+     """Событие изменения сцены (depsgraph_update_post)."""
      pass
 
 class FileEvent(BaseEvent):
@@ -37,9 +44,30 @@ class FileEvent(BaseEvent):
 
 
 # --- Event Handling ---
+@contextmanager
+def suspend_events():
+    """Ignores tree, property and scene events inside the block (bulk edits, import).
+
+    The caller is responsible for rebuilding / updating the affected trees afterwards.
+    """
+    global _suspend_depth
+    _suspend_depth += 1
+    try: yield
+    finally: _suspend_depth -= 1
+
+def events_suspended() -> bool:
+    return _suspend_depth > 0
+
+def track_scene_node(node):
+    """Registers a processed node in the scene registry if it reads the scene, drops it otherwise."""
+    key = node.scene_key()
+    if key is None: _scene_keys.pop((node.id_data.name, node.name), None)
+    else: _scene_keys[(node.id_data.name, node.name)] = key
+
 def handle_event(event: BaseEvent):
     """Main entry point for processing events."""
     # logger.debug(f"Handling event: {event}")
+    if _suspend_depth and not isinstance(event, FileEvent): return
 
     if isinstance(event, TreeEvent):
         # logger.debug(f"Tree structure changed: {event.tree.name}")
@@ -62,11 +90,29 @@ def handle_event(event: BaseEvent):
         # Импортируем здесь, чтобы избежать цикла
         from .data_cache import clear_all_socket_cache
         clear_all_socket_cache()
+        from ..utils.tessellation import clear_face_cache
+        clear_face_cache()
+        from .topology import clear_topology_cache
+        clear_topology_cache()
+        from .cad_manager import cad_manager
+        cad_manager.clear_bounds_cache()
+        _scene_keys.clear()
 
-    # elif isinstance(event, SceneEvent):
-    #     # Обработка изменений сцены (если включено в настройках дерева)
-    #     # Нужно будет пройти по всем деревьям и обновить те, что подписаны
-    #     pass
+    elif isinstance(event, SceneEvent):
+        # Срабатывает на каждое обновление depsgraph: обходим только ноды, зависящие от сцены
+        if not _scene_keys: return
+        changed = {} # tree name -> ноды, чей снимок сцены (курсор, объект-зонд) изменился
+        for entry, last_key in list(_scene_keys.items()):
+            tree = bpy.data.node_groups.get(entry[0])
+            node = tree.nodes.get(entry[1]) if tree else None
+            key = node.scene_key() if node is not None and hasattr(node, 'scene_key') else None
+            if key is None: del _scene_keys[entry]; continue # Нода удалена или больше не читает сцену
+            if not getattr(tree, 'sv_process', False): continue
+            if key != last_key: _scene_keys[entry] = key; changed.setdefault(tree.name, []).append(node)
+        for tree_name, nodes in changed.items():
+            tree = bpy.data.node_groups[tree_name]
+            update_manager.mark_nodes_dirty(tree, nodes)
+            update_manager.request_update(tree)
 
     else:
         logger.warning(f"Unhandled event type: {type(event)}")
\ No newline at end of file
@@ -3,7 +3,7 @@ import bpy
 from bpy.app.handlers import persistent
 import logging
 
-from .event_system import handle_event, FileEvent # , SceneEvent (пока не используем)
+from .event_system import handle_event, FileEvent, SceneEvent
 from .data_cache import clear_all_socket_cache
 from .update_system import update_manager
 
@@ -11,16 +11,11 @@ logger = logging.getLogger(__name__)
 
 # --- Handlers ---
 
-# @persistent # Раскомментировать, если нужен SceneEvent
-# def on_depsgraph_update_post(scene):
-#     """Handles changes in the dependency graph (scene changes)."""
-#     # Этот обработчик может срабатывать очень часто.
-#     # Нужна логика, чтобы фильтровать ненужные обновления.
-#     # Например, проверять, изменились ли объекты, от которых зависят ноды.
-#     # Пока отключен для простоты.
-#     # logger.debug("Depsgraph updated")
-#     # handle_event(SceneEvent())
-#     pass
+@persistent
+def on_depsgraph_update_post(scene, depsgraph):
+    """Handles changes in the dependency graph (scene changes)."""
+    # Срабатывает очень часто: handle_event обходит только реестр нод, зависящих от сцены
+    handle_event(SceneEvent())
 
 
 @persistent
@@ -43,7 +38,7 @@ def on_save_pre(dummy):
 
 # --- Registration ---
 _handlers = [
-    # (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update_post), # Пока отключен
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update_post),
     (bpy.app.handlers.load_post, on_load_post),
     (bpy.app.handlers.save_pre, on_save_pre),
 ]
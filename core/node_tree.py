@@ -1,12 +1,12 @@
 # cadquery_parametric_addon/core/node_tree.py
 import bpy
-from bpy.props import StringProperty, BoolProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty
 from bpy.types import NodeTree, Node
 import time
 import traceback
 import logging # Добавляем логгер
 
-from .constants import UPDATE_KEY, ERROR_KEY, ERROR_STACK_KEY
+from .constants import UPDATE_KEY, ERROR_KEY, ERROR_STACK_KEY, BOOLEAN_GLUE_MODES
 from .event_system import handle_event, TreeEvent, PropertyEvent
 from .exceptions import DependencyError
 from ..dependencies import check_dependencies, cadquery_available
@@ -28,6 +28,12 @@ class CadQueryNodeTree(NodeTree):
 
     tree_id_memory: StringProperty(options={'SKIP_SAVE'}, default="") # Переименовано и добавлен default
 
+    # --- Опции булевых операций по умолчанию (для нод с источником 'Tree Defaults') ---
+    bool_parallel: BoolProperty( name="Parallel", default=True, description="Run Booleans in parallel threads", update=lambda s, c: handle_event(TreeEvent(s)) )
+    bool_fuzzy: FloatProperty( name="Fuzzy", default=0.0, min=0.0, precision=6, description="Additional tolerance for nearly coincident geometry (0 = off)", update=lambda s, c: handle_event(TreeEvent(s)) )
+    bool_glue: EnumProperty( items=BOOLEAN_GLUE_MODES, name="Glue", default='OFF', update=lambda s, c: handle_event(TreeEvent(s)) )
+    bool_use_obb: BoolProperty( name="OBB", default=False, description="Use oriented bounding boxes to filter interferences", update=lambda s, c: handle_event(TreeEvent(s)) )
+
     @property
     def tree_id(self):
         if not self.tree_id_memory:
@@ -79,6 +85,9 @@ class CadQueryNode(Node):
 
     def sv_init(self, context): pass
     def process(self): raise NotImplementedError("Subclasses must implement the process method.")
+    def scene_key(self):
+        """Hashable snapshot of the scene state the node reads (None = the node ignores the scene)."""
+        return None
     def sv_update(self): pass
     def sv_free(self): pass
     def sv_copy(self, original):
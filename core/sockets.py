@@ -140,6 +140,15 @@ class CadQuerySocketBase(NodeSocket):
                 raise NoDataError(self.node, self)
 
 
+    def sv_get_all(self) -> list:
+        """Get the data of every link into a multi-input socket, ordered by multi_input_sort_id."""
+        if self.is_output:
+            raise RuntimeError(f"Cannot get data from output socket: {self.name}")
+        from .exceptions import NoDataError
+        links = sorted(self.links, key=lambda link: link.multi_input_sort_id)
+        try: return [sv_get_socket(link.from_socket.socket_id, self.node, self) for link in links]
+        except KeyError: raise NoDataError(self.node, self)
+
     def sv_set(self, data):
         """Set data into the cache for this socket."""
         if not self.is_output:
@@ -0,0 +1,604 @@
+# cadquery_parametric_addon/core/topology.py
+# Кешированный индекс топологии Shape, общий для всех нод-селекторов
+import hashlib
+import json
+import logging
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from .exceptions import NodeProcessingError
+from ..dependencies import cq, cadquery_available
+
+logger = logging.getLogger(__name__)
+
+if cadquery_available:
+    from OCP.TopExp import TopExp
+    from OCP.TopAbs import TopAbs_FACE, TopAbs_EDGE, TopAbs_VERTEX
+    from OCP.TopTools import TopTools_IndexedMapOfShape, TopTools_IndexedDataMapOfShapeListOfShape
+    from OCP.TopoDS import TopoDS
+    from OCP.BRep import BRep_Tool
+    from OCP.BRepAdaptor import BRepAdaptor_Curve, BRepAdaptor_Curve2d, BRepAdaptor_Surface
+    from OCP.BRepBndLib import BRepBndLib
+    from OCP.BRepGProp import BRepGProp, BRepGProp_Face
+    from OCP.BRepTools import BRepTools
+    from OCP.Bnd import Bnd_Box
+    from OCP.GCPnts import GCPnts_AbscissaPoint
+    from OCP.GProp import GProp_GProps
+    from OCP.gp import gp_Pnt, gp_Vec
+    from OCP.GeomAbs import (GeomAbs_Line, GeomAbs_Circle, GeomAbs_Ellipse, GeomAbs_Plane,
+                             GeomAbs_Cylinder, GeomAbs_Cone, GeomAbs_Sphere, GeomAbs_Torus)
+
+    SHAPE_KINDS = {'FACE': TopAbs_FACE, 'EDGE': TopAbs_EDGE, 'VERTEX': TopAbs_VERTEX}
+    _FLAT_TYPES = {GeomAbs_Line, GeomAbs_Plane}
+    _ANALYTIC_TYPES = {GeomAbs_Circle, GeomAbs_Ellipse, GeomAbs_Cylinder, GeomAbs_Cone, GeomAbs_Sphere, GeomAbs_Torus}
+else:
+    SHAPE_KINDS = {}
+
+# Класс кривизны элемента в таблицах свойств
+CURVATURE_FLAT = 0      # Прямая / плоскость
+CURVATURE_ANALYTIC = 1  # Окружность, эллипс, цилиндр, конус, сфера, тор
+CURVATURE_FREEFORM = 2  # B-spline, Bezier, offset и прочие
+
+# Число Shape, для которых хранятся индексы (LRU)
+TOPOLOGY_CACHE_SIZE = 64
+# Минимальный размер ящика запроса и допуск касания в SpatialIndex.within_box
+BOX_QUERY_MIN_SIZE = 1e-7
+# Шаг квантования координат/размеров в хеш-ключе сигнатуры элемента
+SIGNATURE_QUANTUM = 1e-5
+# Предельная стоимость приближенного совпадения сигнатуры; дороже - элемент считается потерянным
+SIGNATURE_MAX_COST = 0.6
+
+
+class TopologyIndex:
+    """Indexed faces/edges/vertices and their adjacency for one shape.
+
+    Indices follow TopTools_IndexedMapOfShape (0-based here), i.e. the same
+    order as cq Shape.Faces()/Edges()/Vertices(). Everything is built lazily
+    on first access and kept for the lifetime of the index.
+    """
+
+    def __init__(self, shape):
+        self.shape = shape
+        self._maps = {}      # kind -> TopTools_IndexedMapOfShape
+        self._items = {}     # kind -> list[cq.Shape | None] (обертки создаются по запросу)
+        self._adjacency = {} # (kind, parent_kind) -> tuple[tuple[int, ...], ...]
+        self._properties = {} # kind -> dict[str, np.ndarray]
+        self._spatial = {}    # kind -> SpatialIndex
+        self._dihedral = None # (n_edges,) угол между нормалями двух граней ребра
+        self._vertex_points = None
+        self._signatures = {} # kind -> (keys: list[tuple], lookup: dict[tuple, list[int]])
+        self._fingerprint = None
+
+    # --- Индексированные подэлементы ---
+    def _map(self, kind: str):
+        shape_map = self._maps.get(kind)
+        if shape_map is None:
+            shape_map = TopTools_IndexedMapOfShape()
+            TopExp.MapShapes_s(self.shape.wrapped, SHAPE_KINDS[kind], shape_map)
+            self._maps[kind] = shape_map
+            self._items[kind] = [None] * shape_map.Extent()
+        return shape_map
+
+    def count(self, kind: str) -> int:
+        """Number of sub-shapes of the kind ('FACE', 'EDGE' or 'VERTEX')."""
+        return self._map(kind).Extent()
+
+    def get(self, kind: str, index: int):
+        """Sub-shape by 0-based index, or None if the index is out of range."""
+        shape_map = self._map(kind)
+        if not (0 <= index < shape_map.Extent()): return None
+        items = self._items[kind]
+        item = items[index]
+        if item is None:
+            item = items[index] = cq.Shape.cast(shape_map.FindKey(index + 1))
+        return item
+
+    def items(self, kind: str) -> list:
+        """All sub-shapes of the kind, in index order."""
+        return [self.get(kind, i) for i in range(self.count(kind))]
+
+    def index_of(self, sub_shape) -> int:
+        """0-based index of a sub-shape (orientation is ignored), -1 if it is not part of the shape."""
+        kind = {cq.Face: 'FACE', cq.Edge: 'EDGE', cq.Vertex: 'VERTEX'}.get(type(sub_shape))
+        if kind is None: return -1
+        return self._map(kind).FindIndex(sub_shape.wrapped) - 1
+
+    @property
+    def faces(self) -> list: return self.items('FACE')
+
+    @property
+    def edges(self) -> list: return self.items('EDGE')
+
+    @property
+    def vertices(self) -> list: return self.items('VERTEX')
+
+    @property
+    def fingerprint(self) -> str:
+        """Geometry-based id of the shape (stable across sessions for identical topology and vertices)."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=12)
+            digest.update(np.array([self.count('FACE'), self.count('EDGE'), self.count('VERTEX')], dtype=np.int64).tobytes())
+            digest.update(np.round(self.vertex_points() / SIGNATURE_QUANTUM).astype(np.int64).tobytes())
+            self._fingerprint = digest.hexdigest()
+            _register_fingerprint(self)
+        return self._fingerprint
+
+    # --- Смежность ---
+    def _ancestors(self, kind: str, parent_kind: str) -> tuple:
+        """For every sub-shape of `kind`, the indices of the `parent_kind` shapes containing it."""
+        key = (kind, parent_kind)
+        table = self._adjacency.get(key)
+        if table is None:
+            data_map = TopTools_IndexedDataMapOfShapeListOfShape()
+            TopExp.MapShapesAndAncestors_s(self.shape.wrapped, SHAPE_KINDS[kind], SHAPE_KINDS[parent_kind], data_map)
+            child_map = self._map(kind); parent_map = self._map(parent_kind)
+            rows = [()] * child_map.Extent()
+            for i in range(1, data_map.Extent() + 1):
+                child = child_map.FindIndex(data_map.FindKey(i)) - 1
+                # Один родитель может встретиться дважды (шовное ребро) - убираем повторы
+                parents = {parent_map.FindIndex(p) - 1 for p in data_map.FindFromIndex(i)}
+                if child >= 0: rows[child] = tuple(sorted(parents))
+            table = self._adjacency[key] = tuple(rows)
+        return table
+
+    def _children(self, kind: str, child_kind: str) -> tuple:
+        """Inverse of `_ancestors`: for every `kind` shape, the indices of its `child_kind` shapes."""
+        key = (kind, child_kind)
+        table = self._adjacency.get(key)
+        if table is None:
+            rows = [[] for _ in range(self.count(kind))]
+            for child, parents in enumerate(self._ancestors(child_kind, kind)):
+                for parent in parents: rows[parent].append(child)
+            table = self._adjacency[key] = tuple(tuple(r) for r in rows)
+        return table
+
+    def edge_faces(self, edge_index: int) -> tuple: return self._ancestors('EDGE', 'FACE')[edge_index]
+    def face_edges(self, face_index: int) -> tuple: return self._children('FACE', 'EDGE')[face_index]
+    def vertex_edges(self, vertex_index: int) -> tuple: return self._ancestors('VERTEX', 'EDGE')[vertex_index]
+    def edge_vertices(self, edge_index: int) -> tuple: return self._children('EDGE', 'VERTEX')[edge_index]
+
+    def face_neighbors(self, face_index: int) -> tuple:
+        """Faces sharing at least one edge with the face."""
+        edge_faces = self._ancestors('EDGE', 'FACE')
+        return tuple(sorted({f for e in self.face_edges(face_index) for f in edge_faces[e] if f != face_index}))
+
+    # --- Граф для наращивания выделения ---
+    def vertex_points(self) -> np.ndarray:
+        """(N, 3) positions of all vertices."""
+        if self._vertex_points is None:
+            shape_map = self._map('VERTEX')
+            points = np.empty((shape_map.Extent(), 3))
+            for i in range(len(points)):
+                p = BRep_Tool.Pnt_s(TopoDS.Vertex_s(shape_map.FindKey(i + 1)))
+                points[i] = (p.X(), p.Y(), p.Z())
+            self._vertex_points = points
+        return self._vertex_points
+
+    def dihedral_angles(self) -> np.ndarray:
+        """Per edge, the angle between the normals of its two faces at the edge midpoint.
+
+        0 means the faces meet tangentially. NaN for boundary, seam,
+        degenerated and non-manifold edges (not exactly two faces).
+        """
+        if self._dihedral is None:
+            edge_faces = self._ancestors('EDGE', 'FACE')
+            edge_map = self._map('EDGE'); face_map = self._map('FACE')
+            angles = np.full(len(edge_faces), np.nan)
+            pnt = gp_Pnt(); vec = gp_Vec()
+            for e, faces in enumerate(edge_faces):
+                if len(faces) != 2: continue
+                edge = TopoDS.Edge_s(edge_map.FindKey(e + 1))
+                if BRep_Tool.Degenerated_s(edge): continue
+                normals = np.empty((2, 3))
+                for k, f in enumerate(faces):
+                    face = TopoDS.Face_s(face_map.FindKey(f + 1))
+                    pcurve = BRepAdaptor_Curve2d(edge, face) # UV середины ребра на каждой из граней
+                    uv = pcurve.Value(0.5 * (pcurve.FirstParameter() + pcurve.LastParameter()))
+                    BRepGProp_Face(face).Normal(uv.X(), uv.Y(), pnt, vec)
+                    normals[k] = (vec.X(), vec.Y(), vec.Z())
+                lengths = np.linalg.norm(normals, axis=1)
+                if (lengths < 1e-12).any(): continue
+                cos_a = np.dot(normals[0], normals[1]) / (lengths[0] * lengths[1])
+                angles[e] = np.arccos(np.clip(cos_a, -1.0, 1.0))
+            self._dihedral = angles
+        return self._dihedral
+
+    def grow_tangent_edges(self, seeds, max_angle: float, max_depth: int = 0) -> list:
+        """BFS from seed edges through shared vertices where tangents deviate by at most `max_angle`."""
+        table = self.properties('EDGE')
+        ends, tangents = table['ends'], table['end_tangents']
+        vertex_edges = self._ancestors('VERTEX', 'EDGE'); edge_vertices = self._children('EDGE', 'VERTEX')
+        vpos = self.vertex_points()
+        min_cos = np.cos(max_angle) - 1e-12
+
+        def tangent_at(e, v): # Касательная ребра на конце, совпадающем с вершиной
+            k = int(np.argmin(np.linalg.norm(ends[e] - vpos[v], axis=1)))
+            return tangents[e, k]
+
+        visited = set(seeds); frontier = deque((e, 0) for e in visited)
+        while frontier:
+            e, depth = frontier.popleft()
+            if max_depth and depth >= max_depth: continue
+            for v in edge_vertices[e]:
+                t_e = tangent_at(e, v)
+                for e2 in vertex_edges[v]:
+                    if e2 in visited or table['type'][e2] < 0: continue
+                    # Направления ребер произвольны - сравниваем по модулю
+                    if abs(float(np.dot(t_e, tangent_at(e2, v)))) >= min_cos:
+                        visited.add(e2); frontier.append((e2, depth + 1))
+        return sorted(visited)
+
+    def grow_faces(self, seeds, max_angle: float | None = None, same_type: bool = False, max_depth: int = 0) -> list:
+        """BFS from seed faces across shared edges.
+
+        A neighbour is accepted if the dihedral angle at the shared edge is
+        within `max_angle` (when given) and, with `same_type`, if it has the
+        same surface type as the face it is reached from.
+        """
+        edge_faces = self._ancestors('EDGE', 'FACE'); face_edges = self._children('FACE', 'EDGE')
+        dihedral = self.dihedral_angles() if max_angle is not None else None
+        types = self.properties('FACE')['type'] if same_type else None
+
+        visited = set(seeds); frontier = deque((f, 0) for f in visited)
+        while frontier:
+            f, depth = frontier.popleft()
+            if max_depth and depth >= max_depth: continue
+            for e in face_edges[f]:
+                if dihedral is not None and not (dihedral[e] <= max_angle): continue # NaN тоже отсекается
+                for f2 in edge_faces[e]:
+                    if f2 in visited: continue
+                    if types is not None and types[f2] != types[f]: continue
+                    visited.add(f2); frontier.append((f2, depth + 1))
+        return sorted(visited)
+
+    # --- Геометрические сигнатуры (отслеживание выбора между пересчетами) ---
+    def _adjacency_fingerprint(self, kind: str, i: int) -> list:
+        face_types = self.properties('FACE')['type']
+        if kind == 'EDGE': return sorted(int(face_types[f]) for f in self.edge_faces(i))
+        return [len(self.face_edges(i))] + sorted(int(face_types[f]) for f in self.face_neighbors(i))
+
+    def element_signature(self, kind: str, i: int) -> dict:
+        """JSON-serialisable signature of an edge/face: type, centre, direction, size, adjacency."""
+        table = self.properties(kind)
+        direction = table['direction'][i].copy()
+        if kind == 'EDGE':
+            # У ребра нет выделенного направления - приводим к каноническому знаку
+            nz = np.flatnonzero(np.abs(direction) > 1e-9)
+            if len(nz) and direction[nz[0]] < 0: direction = -direction
+        return {"kind": kind, "type": int(table['type'][i]), "center": table['center'][i].tolist(),
+                "direction": direction.tolist(), "size": float(table['size'][i]),
+                "adjacency": self._adjacency_fingerprint(kind, i)}
+
+    @staticmethod
+    def _signature_key(sig: dict) -> tuple:
+        q = lambda v: round(v / SIGNATURE_QUANTUM)
+        return (sig["type"], tuple(q(c) for c in sig["center"]), tuple(round(c, 4) for c in sig["direction"]),
+                q(sig["size"]), tuple(sig["adjacency"]))
+
+    def _signature_lookup(self, kind: str) -> dict:
+        entry = self._signatures.get(kind)
+        if entry is None:
+            lookup = {}
+            for i in range(self.count(kind)):
+                lookup.setdefault(self._signature_key(self.element_signature(kind, i)), []).append(i)
+            entry = self._signatures[kind] = lookup
+        return entry
+
+    def resolve_signature(self, sig: dict) -> int:
+        """Index of the element matching a signature: exact hash hit, else the closest close-enough match.
+
+        Returns -1 if no element of the same type is within SIGNATURE_MAX_COST.
+        """
+        kind = sig.get("kind")
+        if kind not in ('EDGE', 'FACE') or not self.count(kind): return -1
+        hits = self._signature_lookup(kind).get(self._signature_key(sig))
+        if hits: return hits[0]
+
+        # Запасной путь: ближайший элемент того же типа по взвешенной разнице свойств
+        table = self.properties(kind)
+        candidates = np.flatnonzero(table['type'] == sig["type"])
+        if not len(candidates): return -1 # Элемент другого типа - не тот же элемент
+        diag = max(self.shape.BoundingBox().DiagonalLength, 1e-9)
+        cost = np.linalg.norm(table['center'][candidates] - np.asarray(sig["center"]), axis=1) / diag
+        dots = table['direction'][candidates] @ np.asarray(sig["direction"])
+        cost += 1.0 - (np.abs(dots) if kind == 'EDGE' else dots)
+        cost += 0.5 * np.abs(table['size'][candidates] - sig["size"]) / max(abs(sig["size"]), 1e-9)
+        cost += 0.5 * np.array([self._adjacency_fingerprint(kind, int(i)) != sig["adjacency"] for i in candidates])
+        best = int(np.argmin(cost))
+        if cost[best] > SIGNATURE_MAX_COST: return -1 # Не перепривязываемся к постороннему элементу
+        return int(candidates[best])
+
+    # --- Таблицы геометрических свойств ---
+    def properties(self, kind: str) -> dict:
+        """Per-element property table of edges or faces as NumPy arrays.
+
+        Keys: 'type' (GeomAbs curve/surface type), 'curvature' (CURVATURE_*),
+        'size' (length or area), 'center' (N, 3), 'direction' (N, 3 unit edge
+        tangent at mid-parameter or face normal at the UV centre),
+        'bbox_min'/'bbox_max' (N, 3, +inf/-inf when void). Edge tables also hold 'ends' and
+        'end_tangents' (N, 2, 3) at the first/last parameter. Computed once
+        per index.
+        """
+        table = self._properties.get(kind)
+        if table is None:
+            if kind == 'EDGE': table = self._edge_properties()
+            elif kind == 'FACE': table = self._face_properties()
+            else: raise ValueError(f"No property table for '{kind}'")
+            self._properties[kind] = table
+        return table
+
+    def _empty_table(self, n: int) -> dict:
+        return {'type': np.full(n, -1, dtype=np.int32), 'curvature': np.full(n, CURVATURE_FREEFORM, dtype=np.int8),
+                'size': np.zeros(n), 'center': np.zeros((n, 3)), 'direction': np.zeros((n, 3)),
+                'bbox_min': np.full((n, 3), np.inf), 'bbox_max': np.full((n, 3), -np.inf)}
+
+    @staticmethod
+    def _classify(geom_type) -> int:
+        if geom_type in _FLAT_TYPES: return CURVATURE_FLAT
+        if geom_type in _ANALYTIC_TYPES: return CURVATURE_ANALYTIC
+        return CURVATURE_FREEFORM
+
+    @staticmethod
+    def _bounds(shape, table, i):
+        box = Bnd_Box()
+        BRepBndLib.Add_s(shape, box, False) # Без триангуляции
+        if box.IsVoid(): return
+        xmin, ymin, zmin, xmax, ymax, zmax = box.Get()
+        table['bbox_min'][i] = (xmin, ymin, zmin); table['bbox_max'][i] = (xmax, ymax, zmax)
+
+    def _edge_properties(self) -> dict:
+        shape_map = self._map('EDGE'); n = shape_map.Extent()
+        table = self._empty_table(n)
+        table['ends'] = np.zeros((n, 2, 3)); table['end_tangents'] = np.zeros((n, 2, 3))
+        pnt = gp_Pnt(); vec = gp_Vec()
+        for i in range(n):
+            edge = TopoDS.Edge_s(shape_map.FindKey(i + 1))
+            if BRep_Tool.Degenerated_s(edge): continue # Нет 3D-кривой (вершина конуса и т.п.)
+            curve = BRepAdaptor_Curve(edge)
+            geom_type = curve.GetType()
+            table['type'][i] = int(geom_type); table['curvature'][i] = self._classify(geom_type)
+            table['size'][i] = GCPnts_AbscissaPoint.Length_s(curve)
+            first, last = curve.FirstParameter(), curve.LastParameter()
+            curve.D1(0.5 * (first + last), pnt, vec)
+            table['center'][i] = (pnt.X(), pnt.Y(), pnt.Z())
+            table['direction'][i] = (vec.X(), vec.Y(), vec.Z())
+            for k, t in enumerate((first, last)):
+                curve.D1(t, pnt, vec)
+                table['ends'][i, k] = (pnt.X(), pnt.Y(), pnt.Z())
+                table['end_tangents'][i, k] = (vec.X(), vec.Y(), vec.Z())
+            self._bounds(edge, table, i)
+        self._normalize(table['direction'])
+        self._normalize(table['end_tangents'].reshape(-1, 3))
+        return table
+
+    def _face_properties(self) -> dict:
+        shape_map = self._map('FACE'); n = shape_map.Extent()
+        table = self._empty_table(n)
+        pnt = gp_Pnt(); vec = gp_Vec()
+        for i in range(n):
+            face = TopoDS.Face_s(shape_map.FindKey(i + 1))
+            geom_type = BRepAdaptor_Surface(face).GetType()
+            table['type'][i] = int(geom_type); table['curvature'][i] = self._classify(geom_type)
+            props = GProp_GProps()
+            BRepGProp.SurfaceProperties_s(face, props)
+            c = props.CentreOfMass()
+            table['size'][i] = props.Mass(); table['center'][i] = (c.X(), c.Y(), c.Z())
+            u0, u1, v0, v1 = BRepTools.UVBounds_s(face)
+            BRepGProp_Face(face).Normal(0.5 * (u0 + u1), 0.5 * (v0 + v1), pnt, vec) # С учетом ориентации грани
+            table['direction'][i] = (vec.X(), vec.Y(), vec.Z())
+            self._bounds(face, table, i)
+        self._normalize(table['direction'])
+        return table
+
+    # --- Пространственный индекс ---
+    def spatial_index(self, kind: str) -> "SpatialIndex":
+        """Bounding-box index over all faces or edges, built once per index."""
+        index = self._spatial.get(kind)
+        if index is None:
+            if kind not in ('FACE', 'EDGE'): raise ValueError(f"No spatial index for '{kind}'")
+            # Габариты берутся из таблицы свойств: Shape не триангулируется (общий с вьюером и кэшем граней)
+            table = self.properties(kind)
+            index = self._spatial[kind] = SpatialIndex(table['bbox_min'], table['bbox_max'],
+                                                       lambda i, kind=kind: self.get(kind, i))
+            logger.debug(f"Spatial index for {self.count(kind)} {kind.lower()}s")
+        return index
+
+    @staticmethod
+    def _normalize(vectors):
+        lengths = np.linalg.norm(vectors, axis=1)
+        np.divide(vectors, lengths[:, None], out=vectors, where=lengths[:, None] > 1e-12)
+
+
+class SpatialIndex:
+    """Element bounding boxes (a flat BVH) with exact OCC distance checks on the survivors.
+
+    Boxes only prune: every element whose box can still hold an answer is
+    measured with BRepExtrema, so large faces with few samples are never missed.
+    """
+
+    def __init__(self, bbox_min: np.ndarray, bbox_max: np.ndarray, element):
+        self.bbox_min = bbox_min
+        self.bbox_max = bbox_max
+        self.element = element # index -> cq.Shape
+        self.valid = np.all(bbox_min <= bbox_max, axis=1) # Пустые габариты (вырожденные ребра) не участвуют
+
+    def box_distances(self, point) -> np.ndarray:
+        """Distance from the point to every element box (inf for elements without one)."""
+        p = np.asarray(point, dtype=np.float64)
+        gap = np.maximum(np.maximum(self.bbox_min - p, p - self.bbox_max), 0.0)
+        distances = np.linalg.norm(gap, axis=1)
+        distances[~self.valid] = np.inf
+        return distances
+
+    def nearest(self, point) -> int:
+        """Index of the element closest to the point, or -1 if there is none."""
+        box_d = self.box_distances(point); vertex = cq.Vertex.makeVertex(*point)
+        best, best_d = -1, np.inf
+        for i in np.argsort(box_d, kind='stable'): # Габарит не дальше элемента: дальше лучшего - стоп
+            if not box_d[i] <= best_d or box_d[i] == np.inf: break
+            d = self.element(int(i)).distance(vertex)
+            if d < best_d: best, best_d = int(i), d
+        return best
+
+    def within_radius(self, point, radius: float) -> list:
+        """Elements within `radius` of the point, nearest first."""
+        box_d = self.box_distances(point); vertex = cq.Vertex.makeVertex(*point)
+        hits = [(self.element(int(i)).distance(vertex), int(i)) for i in np.flatnonzero(box_d <= radius)]
+        return [i for d, i in sorted(hits) if d <= radius]
+
+    def within_box(self, lo, hi) -> list:
+        """Elements reaching into the axis-aligned box."""
+        lo = np.asarray(lo, dtype=np.float64); hi = np.asarray(hi, dtype=np.float64)
+        overlap = self.valid & np.all((self.bbox_min <= hi) & (self.bbox_max >= lo), axis=1)
+        candidates = np.flatnonzero(overlap)
+        if not len(candidates): return []
+        size = np.maximum(hi - lo, BOX_QUERY_MIN_SIZE) # Плоский запрос - тонкий ящик
+        box = cq.Solid.makeBox(*size, pnt=cq.Vector(*lo))
+        return [int(i) for i in candidates if self.element(int(i)).distance(box) <= BOX_QUERY_MIN_SIZE]
+
+
+# --- Ссылки на выбор ---
+class SelectionRef:
+    """Lightweight selection: base shape fingerprint, element kind and indices.
+
+    Passed through selector sockets instead of live cq.Edge/cq.Face objects;
+    consumers turn it back into shapes with `resolve_selection`.
+    """
+    __slots__ = ("fingerprint", "kind", "indices")
+
+    def __init__(self, fingerprint: str, kind: str, indices):
+        self.fingerprint = fingerprint
+        self.kind = kind
+        self.indices = tuple(int(i) for i in indices)
+
+    def __len__(self): return len(self.indices)
+
+    def __eq__(self, other):
+        return isinstance(other, SelectionRef) and (self.fingerprint, self.kind, self.indices) == \
+            (other.fingerprint, other.kind, other.indices)
+
+    def __hash__(self): return hash((self.fingerprint, self.kind, self.indices))
+
+    def __repr__(self): return f"<SelectionRef {self.kind} {list(self.indices)} of {self.fingerprint}>"
+
+    def to_dict(self) -> dict:
+        return {"fingerprint": self.fingerprint, "kind": self.kind, "indices": list(self.indices)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SelectionRef":
+        return cls(data["fingerprint"], data["kind"], data["indices"])
+
+
+def make_selection(topology: TopologyIndex, kind: str, indices) -> SelectionRef:
+    """Reference to elements of the indexed shape."""
+    return SelectionRef(topology.fingerprint, kind, indices)
+
+
+def resolve_selection(data, shape=None, kind: str | None = None) -> list:
+    """Turns selector socket data into a list of cq sub-shapes.
+
+    Accepts SelectionRef, live cq shapes, Workplanes and lists of these. A
+    reference is resolved on `shape` when its fingerprint matches, otherwise
+    on the cached index of the shape it was made for. With `kind` set, other
+    element types are dropped. Raises LookupError for references to a shape
+    that is no longer cached.
+    """
+    if data is None: return []
+    if isinstance(data, (list, tuple)):
+        return [el for item in data for el in resolve_selection(item, shape, kind)]
+    if isinstance(data, cq.Workplane): return resolve_selection(data.vals(), shape, kind)
+    if isinstance(data, SelectionRef):
+        if kind and data.kind != kind: return []
+        topology = get_topology_index(shape) if shape is not None else None
+        if topology is None or topology.fingerprint != data.fingerprint:
+            topology = _fingerprint_cache.get(data.fingerprint)
+            if topology is None: raise LookupError(f"Selection refers to an unknown shape ({data.fingerprint})")
+        return [el for el in (topology.get(data.kind, i) for i in data.indices) if el is not None]
+    if isinstance(data, cq.Shape):
+        if kind and not isinstance(data, {'FACE': cq.Face, 'EDGE': cq.Edge, 'VERTEX': cq.Vertex}[kind]): return []
+        return [data]
+    return []
+
+
+# --- Отслеживание выбора по сигнатуре ---
+def track_element(topology: TopologyIndex, kind: str, index: int, signature_json: str,
+                  captured_index: int) -> tuple[int, str]:
+    """Re-resolves a stored selection on a (possibly changed) shape.
+
+    If `index` is still the index the signature was captured for, the element
+    is looked up by its signature, so it survives upstream edits that renumber
+    the topology. Otherwise the user picked a new index and it is captured
+    as is. Returns the index to use and the signature to store; raises
+    LookupError if the tracked element no longer exists.
+    """
+    if signature_json and index == captured_index:
+        try: sig = json.loads(signature_json)
+        except ValueError as e: sig = None; logger.warning(f"Ignoring unreadable selection signature: {e}")
+        if sig is not None:
+            try: resolved = topology.resolve_signature(sig)
+            except (KeyError, TypeError) as e: resolved = index; logger.warning(f"Ignoring unreadable selection signature: {e}")
+            if resolved < 0: raise LookupError(f"Tracked {kind.lower()} lost (no matching element on the new shape)")
+            index = resolved
+    if not (0 <= index < topology.count(kind)): return index, signature_json
+    return index, json.dumps(topology.element_signature(kind, index), separators=(',', ':'))
+
+
+def track_node_index(node, topology: TopologyIndex, kind: str, index: int, socket_idx) -> int:
+    """track_element for a selector node with index_/signature_/captured_index_ properties.
+
+    Keeps index_ and the Index socket in sync; a lost element raises NodeProcessingError
+    and leaves the stored signature untouched, so the element is found again if it returns.
+    """
+    try: index, signature = track_element(topology, kind, index, node.signature_, node.captured_index_)
+    except LookupError as e: raise NodeProcessingError(node, str(e))
+    if index != node.index_:
+        # Запись через ID-свойства - без update-колбэков и повторного пересчета
+        node["index_"] = index; socket_idx["default_property"] = index
+    node["signature_"] = signature; node["captured_index_"] = index
+    return index
+
+
+# --- Вход селекторов ---
+def input_shape(obj_in):
+    """First shape of a Workplane input, or the Shape itself; None for anything else."""
+    if isinstance(obj_in, cq.Workplane):
+        vals = [v for v in obj_in.vals() if isinstance(v, cq.Shape)]
+        return vals[0] if vals else None
+    if isinstance(obj_in, cq.Shape): return obj_in
+    return None
+
+
+# --- Кеш индексов ---
+# hash(Shape) -> TopologyIndex. cq.Shape хешируется по HashCode (TShape + Location),
+# совпадение дополнительно проверяется через IsSame.
+_topology_cache: "OrderedDict[int, TopologyIndex]" = OrderedDict()
+
+def get_topology_index(shape) -> TopologyIndex:
+    """Returns the shared topology index of a cq.Shape, building it on first use."""
+    key = hash(shape)
+    index = _topology_cache.get(key)
+    if index is not None and index.shape.isSame(shape):
+        _topology_cache.move_to_end(key)
+        return index
+    index = TopologyIndex(shape)
+    _topology_cache[key] = index
+    while len(_topology_cache) > TOPOLOGY_CACHE_SIZE:
+        _topology_cache.popitem(last=False)
+    return index
+
+
+# fingerprint -> TopologyIndex: разрешение SelectionRef без исходного Shape
+_fingerprint_cache: "OrderedDict[str, TopologyIndex]" = OrderedDict()
+
+def _register_fingerprint(index: TopologyIndex):
+    _fingerprint_cache[index.fingerprint] = index
+    _fingerprint_cache.move_to_end(index.fingerprint)
+    while len(_fingerprint_cache) > TOPOLOGY_CACHE_SIZE:
+        _fingerprint_cache.popitem(last=False)
+
+
+def clear_topology_cache():
+    """Drops all cached topology indices."""
+    _topology_cache.clear()
+    _fingerprint_cache.clear()
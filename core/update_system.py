@@ -19,6 +19,11 @@ class UpdateTreeState:
         self.dependencies: dict[str, set[str]] = defaultdict(set)
         self.execution_order: list[str] = [] # Порядок выполнения нод
         self.dirty_nodes: set[str] = set()
+        # Ноды с установленными извне результатами (импорт бандла) -> их зависимости на момент установки.
+        # Пропускаются один раз, если ни они, ни их предки не менялись
+        self.skip_once: dict[str, frozenset] = {}
+        self.stale_nodes: set[str] = set() # Ноды без данных, нужные только пропущенным: считаются по требованию
+        self.edited_nodes: set[str] = set() # Явно измененные с прошлого цикла (снимают пропуск ниже себя)
         self.needs_rebuild = True
         # Сразу помечаем все ноды как грязные при создании состояния
         # self.mark_all_dirty() # Делаем это при первом запросе на обновление
@@ -73,6 +78,10 @@ class UpdateTreeState:
         newly_dirty = set(node_names) & set(self.nodes.keys()) # Только существующие ноды
         if newly_dirty:
              self.dirty_nodes.update(newly_dirty)
+             self.stale_nodes -= newly_dirty # Явно измененная нода считается сразу
+             if self.skip_once:
+                 for node_name in newly_dirty: self.skip_once.pop(node_name, None)
+                 self.edited_nodes |= newly_dirty # Пропуск ниже по течению снимается в get_processing_list
         # Если граф нужно перестроить, перестраиваем сразу или при get_nodes_to_process?
         # Лучше при get_nodes_to_process, чтобы не делать это на каждое изменение свойства
 
@@ -111,6 +120,17 @@ class UpdateTreeState:
             for dep_name in deps:
                 reverse_deps[dep_name].add(node_name)
 
+         # Установленный результат недействителен ниже измененной ноды или при смене связей
+         if self.skip_once:
+             roots = [n for n in self.edited_nodes if n in self.nodes]
+             roots += [n for n, deps in self.skip_once.items() if frozenset(self.dependencies.get(n, ())) != deps]
+             below = set(roots)
+             while roots:
+                 for dependent_node in reverse_deps.get(roots.pop(), ()):
+                     if dependent_node not in below: below.add(dependent_node); roots.append(dependent_node)
+             for node_name in below: self.skip_once.pop(node_name, None)
+         self.edited_nodes.clear()
+
          # Обход вниз по течению от грязных нод
          while queue:
              node_name = queue.pop(0)
@@ -123,6 +143,15 @@ class UpdateTreeState:
                        if dependent_node not in visited_downstream:
                             queue.append(dependent_node)
 
+         # Устаревшие ноды (без данных) считаются, только если их ждет пересчитываемая нода
+         if self.stale_nodes:
+             pending = [n for n in nodes_to_evaluate if n not in self.stale_nodes and n not in self.skip_once]
+             while pending:
+                 for dep_name in self.dependencies.get(pending.pop(), ()):
+                     if dep_name in self.stale_nodes:
+                         self.stale_nodes.discard(dep_name); nodes_to_evaluate.add(dep_name); pending.append(dep_name)
+             nodes_to_evaluate -= self.stale_nodes
+
          # Теперь у нас есть все ноды, которые нужно пересчитать (грязные + зависимые от них)
          # Фильтруем полный порядок выполнения, оставляя только нужные ноды
          processing_list = [name for name in self.execution_order if name in nodes_to_evaluate]
@@ -141,6 +170,12 @@ class UpdateTreeState:
             logger.warning(f"[{self.tree.name}] Node '{node_name}' not found during processing.")
             return False # Сигнал об ошибке
 
+        # --- Результат уже установлен (импорт бандла) - без пересчета ---
+        if node_name in self.skip_once:
+            del self.skip_once[node_name]
+            node.set_error(None) # Ставит UPDATE_KEY
+            return True
+
         # --- Проверка готовности входов ---
         inputs_ready = True
         for dep_name in self.dependencies.get(node_name, set()):
@@ -177,6 +212,9 @@ class UpdateTreeState:
             start_time = time.perf_counter()
             node.process() # <--- Основной вызов
             end_time = time.perf_counter()
+            if hasattr(node, 'scene_key'): # Ноды, читающие сцену, - в реестр SceneEvent
+                from .event_system import track_scene_node # Импорт здесь - event_system импортирует этот модуль
+                track_scene_node(node)
 
             # Успех - ставим флаг обновления
             node[UPDATE_KEY] = True
@@ -224,6 +262,35 @@ class UpdateManager:
         logger.debug(f"Tree '{tree.name}' marked for graph rebuild.")
 
 
+    def rebuild_tree(self, tree: bpy.types.NodeTree):
+        """Rebuilds the graph of a tree once and marks all its nodes dirty (after bulk edits)."""
+        state = self.get_tree_state(tree)
+        state._build_graph_and_order()
+        state.mark_all_dirty()
+
+
+    def skip_nodes_once(self, tree: bpy.types.NodeTree, node_names):
+        """Marks nodes whose outputs were installed externally (bundle import) as done.
+
+        They are skipped in the next cycle. Their upstream nodes that feed nothing else are
+        kept stale and only evaluated once a node that needs their data is recomputed.
+        """
+        state = self.get_tree_state(tree)
+        if state.needs_rebuild: state._build_graph_and_order()
+        cached = set(node_names) & set(state.nodes)
+        reverse_deps = defaultdict(set)
+        for node_name, deps in state.dependencies.items():
+            for dep_name in deps: reverse_deps[dep_name].add(node_name)
+        stale = set()
+        for node_name in reversed(state.execution_order): # Потребители раньше поставщиков
+            if node_name in cached: continue
+            children = reverse_deps.get(node_name)
+            if children and all(c in cached or c in stale for c in children): stale.add(node_name)
+        state.skip_once.update({n: frozenset(state.dependencies.get(n, ())) for n in cached})
+        state.stale_nodes |= stale
+        logger.debug(f"Tree '{tree.name}': {len(cached)} node(s) skip once, {len(stale)} stale.")
+
+
     def mark_nodes_dirty(self, tree: bpy.types.NodeTree, nodes: list[bpy.types.Node]):
         """Marks specific nodes in a tree as dirty."""
         if not nodes: return
@@ -2,15 +2,18 @@
 import bpy
 from bpy.props import IntProperty, FloatProperty
 import logging
+import time
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQNumberSocket, CQIntSocket
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
 from ...dependencies import cq
 
 logger = logging.getLogger(__name__)
 
-class LinearArrayNode(CadQueryNode):
+class LinearArrayNode(BooleanOptionsMixin, CadQueryNode):
     """Creates a linear array of a CadQuery object by translating and uniting copies."""
     bl_idname = 'CQPNode_ArrayLinearArrayNode'
     bl_label = 'Linear Array'
@@ -43,6 +46,7 @@ class LinearArrayNode(CadQueryNode):
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout) # Ошибки
         # Поля ввода рисуются сокетами
+        self.draw_boolean_options(layout)
 
     # --- Обработка ---
     def process(self):
@@ -113,20 +117,14 @@ class LinearArrayNode(CadQueryNode):
 
             # --- Явно объединяем все Shape ---
             logger.debug(f"  Unioning {len(shapes_to_union)} shapes for linear array...")
-            final_result_shape = shapes_to_union[0]
-            if len(shapes_to_union) > 1:
-                for i in range(1, len(shapes_to_union)):
-                    try:
-                        # logger.debug(f"    Fusing with shape {i}...")
-                        # Используем fuse + clean для надежности
-                        fused = final_result_shape.fuse(shapes_to_union[i])
-                        cleaned = fused.clean()
-                        if cleaned and cleaned.isValid(): final_result_shape = cleaned
-                        elif fused and fused.isValid(): final_result_shape = fused; logger.warning("    fuse().clean() failed, using result of fuse()")
-                        else: raise NodeProcessingError(self, f"Fuse/Clean failed for array element {i}")
-                    except Exception as e_fuse:
-                        logger.error(f"    Exception during fuse/clean for shape {i}: {e_fuse}", exc_info=True)
-                        raise NodeProcessingError(self, f"Boolean fuse/clean failed for array element {i}: {e_fuse}")
+            # Один многоаргументный fuse + один clean вместо попарной цепочки
+            try:
+                options = self.boolean_options(); t0 = time.perf_counter()
+                final_result_shape = cad_manager.fuse_shapes(shapes_to_union, options=options)
+                self.record_boolean_profile(options, time.perf_counter() - t0)
+            except Exception as e_fuse:
+                logger.error(f"    Exception during fuse/clean of {len(shapes_to_union)} shapes: {e_fuse}", exc_info=True)
+                raise NodeProcessingError(self, f"Boolean fuse/clean of array elements failed: {e_fuse}")
 
             if not final_result_shape or not final_result_shape.isValid():
                  raise NodeProcessingError(self, "Union/Fuse of linear array elements resulted in invalid shape.")
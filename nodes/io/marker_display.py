@@ -6,14 +6,18 @@ from bpy.props import (
 )
 import logging
 
+import numpy as np
+
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQSelectorSocket # Принимаем геометрию и селекторы
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
 from ...dependencies import cq # Нужен для типов Vertex, Edge, Face
+from ...core.topology import resolve_selection, input_shape
+from ...utils import blender_utils, tessellation
 
 logger = logging.getLogger(__name__)
 
-# Типы маркеров, соответствующие bpy.types.Object.empty_display_type + CUBE/SPHERE
+# Типы маркеров, соответствующие bpy.types.Object.empty_display_type + CUBE/SPHERE (меш-глиф)
 MARKER_TYPES = [ # Список остается прежним
     ('PLAIN_AXES', "Axes", "Display marker as axes", 'EMPTY_AXIS', 0),
     ('ARROWS', "Arrows", "Display marker as arrows", 'EMPTY_ARROWS', 1),
@@ -24,6 +28,11 @@ MARKER_TYPES = [ # Список остается прежним
     ('IMAGE', "Image", "Display marker as image (not useful here)", 'IMAGE_PLANE', 7)
 ]
 
+DISPLAY_MODES = [
+    ('POINTS', "Points", "Markers at vertices, edge end points and face centres"),
+    ('CURVES', "Curves", "Edges as full curves and faces as outline loops in one wire mesh; vertices as markers"),
+]
+
 # --- Нода ---
 class MarkerDisplayNode(CadQueryNode):
     """Displays visual markers in the 3D View for selected CQ elements."""
@@ -36,18 +45,22 @@ class MarkerDisplayNode(CadQueryNode):
     marker_type_: EnumProperty( items=MARKER_TYPES, name="Marker Type", default='CUBE', update=CadQueryNode.process_node )
     marker_size_: FloatProperty( name="Size", default=0.05, min=0.001, subtype='DISTANCE', unit='LENGTH', update=CadQueryNode.process_node )
     marker_color_: FloatVectorProperty( name="Color", default=(0.1, 1.0, 0.1, 0.8), min=0.0, max=1.0, size=4, subtype='COLOR', update=CadQueryNode.process_node )
+    display_mode_: EnumProperty( items=DISPLAY_MODES, name="Display", default='POINTS', update=CadQueryNode.process_node )
+    curve_deflection_: FloatProperty( name="Deflection", default=0.01, min=0.00001, precision=5, subtype='DISTANCE', unit='LENGTH', description="Maximum chord deviation of the displayed curves", update=CadQueryNode.process_node )
+    # Имена объектов старого формата (по объекту на точку) - только для очистки
     marker_names: CollectionProperty(type=bpy.types.PropertyGroup)
 
-    # --- Внутреннее хранилище имен маркеров ---
-    # Используем CollectionProperty для хранения строк - имен созданных объектов
-    # Это не самый эффективный способ, но он работает и сохраняется с файлом.
-    # Альтернатива - использовать IDProperty на ноде (менее удобно для списка).
-    marker_names: CollectionProperty(type=bpy.types.PropertyGroup) # Будем хранить строки в name элемента
+    # --- Объекты маркеров ---
+    # Все точки - вершины одного меша (облако точек), глиф (куб/сфера/empty) -
+    # дочерний объект, размножаемый по вершинам (instance_type='VERTS').
+    marker_object_name: StringProperty( default="" )
+    glyph_object_name: StringProperty( default="" )
+    curve_object_name: StringProperty( default="" ) # Ребра/контуры граней - один меш из свободных ребер
 
     # --- Инициализация ---
     def sv_init(self, context):
         self.inputs.new(CQObjectSocket.bl_idname, "Geometry") # Геометрия, на которой искать элементы
-        self.inputs.new(CQSelectorSocket.bl_idname, "Selectors") # Выбранные элементы (cq.Vertex/Edge/Face или список)
+        self.inputs.new(CQSelectorSocket.bl_idname, "Selectors") # Выбранные элементы (SelectionRef, cq.Vertex/Edge/Face или список)
         # Нет выходов
 
     # --- UI ---
@@ -60,175 +73,178 @@ class MarkerDisplayNode(CadQueryNode):
         row = col.row(align=True)
         row.prop(self, "marker_size_")
         row.prop(self, "marker_color_", text="")
+        row = col.row(align=True)
+        row.prop(self, "display_mode_", text="")
+        if self.display_mode_ == 'CURVES': row.prop(self, "curve_deflection_", text="")
 
     # --- Очистка ---
     def clear_markers(self):
-        """Removes all markers previously created by this node."""
-        # logger.debug(f"Node {self.name}: Clearing markers...")
-        removed_count = 0
-        # Итерируемся по КОПИИ имен, так как будем удалять элементы из коллекции
-        names_to_remove = [item.name for item in self.marker_names]
-        for marker_name in names_to_remove:
-            if marker_name and marker_name in bpy.data.objects:
-                 try:
-                      bpy.data.objects.remove(bpy.data.objects[marker_name], do_unlink=True)
-                      removed_count += 1
-                 except Exception as e:
-                      logger.error(f"Failed to remove marker '{marker_name}': {e}")
-            else:
-                 # Имя есть в списке, но объекта нет - просто удаляем из списка
-                 pass # Удаление из CollectionProperty произойдет ниже
-
-        # Очищаем саму коллекцию свойств
-        if self.marker_names: # Проверяем, есть ли что чистить
-            self.marker_names.clear()
-            # logger.debug(f"Removed {removed_count} marker objects and cleared marker_names collection.")
+        """Removes the marker objects created by this node."""
+        for obj_name in (self.glyph_object_name, self.marker_object_name, self.curve_object_name):
+            obj = bpy.data.objects.get(obj_name) if obj_name else None
+            if obj is None: continue
+            data = obj.data
+            try:
+                bpy.data.objects.remove(obj, do_unlink=True)
+                if isinstance(data, bpy.types.Mesh) and data.users == 0: bpy.data.meshes.remove(data)
+            except Exception as e:
+                logger.error(f"Failed to remove marker object '{obj_name}': {e}")
+        if self.glyph_object_name: self.glyph_object_name = ""
+        if self.marker_object_name: self.marker_object_name = ""
+        if self.curve_object_name: self.curve_object_name = ""
+
+        # Маркеры старого формата (объект на точку) из ранее сохраненных файлов
+        for item in self.marker_names:
+            if item.name in bpy.data.objects:
+                try: bpy.data.objects.remove(bpy.data.objects[item.name], do_unlink=True)
+                except Exception as e: logger.error(f"Failed to remove marker '{item.name}': {e}")
+        if self.marker_names: self.marker_names.clear()
 
     def sv_free(self):
         """Called when node is removed."""
         self.clear_markers()
 
+    # --- Объекты ---
+    def ensure_marker_object(self, collection):
+        """Returns the point-cloud object that carries the marker positions."""
+        obj = bpy.data.objects.get(self.marker_object_name) if self.marker_object_name else None
+        if obj and obj.type == 'MESH': return obj
+        base_name = f"Markers_{self.id_data.name}_{self.name}"
+        mesh = bpy.data.meshes.new(f"{base_name}_Points")
+        obj = bpy.data.objects.new(base_name, mesh)
+        obj.instance_type = 'VERTS'
+        obj.show_instancer_for_viewport = False # Видны только глифы
+        obj.show_instancer_for_render = False
+        obj.hide_select = True
+        collection.objects.link(obj)
+        self.marker_object_name = obj.name
+        return obj
+
+    def ensure_curve_object(self, collection):
+        """Returns the loose-edge object that shows edge curves and face outlines."""
+        obj = bpy.data.objects.get(self.curve_object_name) if self.curve_object_name else None
+        if obj and obj.type == 'MESH': return obj
+        base_name = f"Markers_{self.id_data.name}_{self.name}_Curves"
+        obj = bpy.data.objects.new(base_name, bpy.data.meshes.new(base_name))
+        obj.show_in_front = True
+        obj.hide_select = True
+        collection.objects.link(obj)
+        self.curve_object_name = obj.name
+        return obj
+
+    def remove_curve_object(self):
+        obj = bpy.data.objects.get(self.curve_object_name) if self.curve_object_name else None
+        if obj is not None:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if mesh.users == 0: bpy.data.meshes.remove(mesh)
+        if self.curve_object_name: self.curve_object_name = ""
+
+    def ensure_glyph(self, parent, collection):
+        """Creates or updates the glyph object instanced on every marker point."""
+        is_mesh = self.marker_type_ in {'CUBE', 'SPHERE'}
+        glyph = bpy.data.objects.get(self.glyph_object_name) if self.glyph_object_name else None
+        glyph_kind = glyph.get("_cqpa_glyph") if glyph else None
+        if glyph is not None and glyph_kind != (self.marker_type_ if is_mesh else 'EMPTY'):
+            # Другой тип глифа - пересоздаем объект
+            data = glyph.data
+            bpy.data.objects.remove(glyph, do_unlink=True)
+            if isinstance(data, bpy.types.Mesh) and data.users == 0: bpy.data.meshes.remove(data)
+            glyph = None
+
+        color = tuple(self.marker_color_)
+        if glyph is None:
+            glyph_name = f"{parent.name}_Glyph"
+            if is_mesh:
+                mesh = bpy.data.meshes.new(glyph_name)
+                blender_utils.write_glyph_mesh(mesh, self.marker_type_)
+                glyph = bpy.data.objects.new(glyph_name, mesh)
+                glyph["_cqpa_glyph"] = self.marker_type_
+            else:
+                glyph = bpy.data.objects.new(glyph_name, None)
+                glyph["_cqpa_glyph"] = 'EMPTY'
+            collection.objects.link(glyph)
+            glyph.parent = parent
+            glyph.hide_select = True
+            self.glyph_object_name = glyph.name
+
+        # Размер/цвет меняются без пересоздания объекта
+        if is_mesh:
+            glyph.scale = (self.marker_size_,) * 3 # Геометрия глифа единичного размера
+            material = blender_utils.get_color_material("CQMarkerMat", color)
+            if glyph.data.materials: glyph.data.materials[0] = material
+            else: glyph.data.materials.append(material)
+        else:
+            glyph.empty_display_type = self.marker_type_
+            glyph.empty_display_size = self.marker_size_
+        glyph.color = color
+        return glyph
+
+    # --- Сбор точек ---
+    def collect_points(self, selectors, vertices_only=False) -> list:
+        """Marker positions for the selected elements (vertex, edge ends, face centres)."""
+        points = []
+        for i, sel in enumerate(selectors):
+            try:
+                if isinstance(sel, cq.Vertex): points.append(sel.toTuple())
+                elif vertices_only: continue
+                elif isinstance(sel, cq.Edge): points += [sel.startPoint().toTuple(), sel.endPoint().toTuple()]
+                elif isinstance(sel, cq.Face): points.append(sel.Center().toTuple())
+            except Exception as e:
+                logger.warning(f"Could not get marker position for selector {i} ({type(sel).__name__}): {e}")
+        return points
+
+    def collect_curve_edges(self, selectors) -> list:
+        """Unique edges to draw: selected edges plus the boundary edges of selected faces."""
+        edges = {} # cq.Shape: хеш по HashCode, сравнение через IsSame - общие ребра граней рисуются один раз
+        for sel in selectors:
+            if isinstance(sel, cq.Edge): edges.setdefault(sel, None)
+            elif isinstance(sel, cq.Face):
+                for edge in sel.Edges(): edges.setdefault(edge, None) # Внешний и внутренние контуры
+        return list(edges)
+
     # --- Обработка ---
     def process(self):
-        # 1. Очистить старые маркеры
-        self.clear_markers()
-
-        is_enabled = self.enabled_
-        marker_type = self.marker_type_
-        marker_size = self.marker_size_
-        marker_color = tuple(self.marker_color_)
-
-        # 2. Проверить входы и флаг Enabled
         socket_geo = self.inputs["Geometry"]
         socket_sel = self.inputs["Selectors"]
-        
-        if not self.enabled_ or not socket_geo.is_linked or not socket_sel.is_linked:
-            # logger.debug(f"Node {self.name}: Skipping marker creation (disabled or inputs not linked).")
-            return
-
-        # --- Получаем значения свойств ноды  ---
 
-        # marker_type = self.marker_type_
-        # marker_size = self.marker_size_
-        # marker_color = tuple(self.marker_color_) # Получаем цвет как tuple
-        # -------------------------------------------
+        if not self.enabled_ or not socket_geo.is_linked or not socket_sel.is_linked:
+            self.clear_markers(); return
 
-        # 3. Получить данные
         try:
-            #obj_in = socket_geo.sv_get()
-            selector_in = socket_sel.sv_get() # Ожидаем cq.Vertex/Edge/Face или список таких объектов
-            #if obj_in is None: raise NodeProcessingError(self, "Input Geometry is None")
-            if selector_in is None: logger.debug(f"Node {self.name}: No selector data."); return
+            selector_in = socket_sel.sv_get() # SelectionRef, cq.Vertex/Edge/Face или список
+            # Ссылки разрешаются на входной геометрии (или на Shape, для которого сделаны)
+            selectors = resolve_selection(selector_in, input_shape(socket_geo.sv_get()))
         except Exception as e:
             raise NodeProcessingError(self, f"Input error: {e}")
+        if not selectors:
+            logger.debug(f"Node {self.name}: No selector data."); self.clear_markers(); return
 
-        
-        # 5. Подготовить список селекторов (всегда список)
-        selectors = []
-        if isinstance(selector_in, list): selectors = selector_in
-        elif isinstance(selector_in, (cq.Vertex, cq.Edge, cq.Face)): selectors = [selector_in]
-        else: logger.warning(f"Node {self.name}: Invalid selector type: {type(selector_in)}."); return
-
-        # 6. Итерация и создание маркеров
-        # logger.debug(f"Node {self.name}: Processing {len(selectors)} selectors...")
-        context = bpy.context
-
-        if not context.collection: logger.error("No active collection for markers."); return
+        collection = bpy.context.collection
+        if not collection: logger.error("No active collection for markers."); return
 
-        collection = context.collection 
-        created_count = 0
-        base_name = f"Marker_{self.id_data.name}_{self.name}"
+        curves_mode = self.display_mode_ == 'CURVES'
+        points = np.array(self.collect_points(selectors, vertices_only=curves_mode), dtype=np.float64).reshape(-1, 3)
+        try:
+            if curves_mode:
+                # Все кривые - один меш, одна запись и одно обновление depsgraph
+                lines = tessellation.edge_lines(self.collect_curve_edges(selectors), self.curve_deflection_)
+                curve_obj = self.ensure_curve_object(collection)
+                blender_utils.write_line_buffers(curve_obj.data, lines)
+                curve_obj.color = tuple(self.marker_color_)
+                curve_obj.update_tag(refresh={'DATA'})
+            else:
+                self.remove_curve_object()
 
-        for i, sel in enumerate(selectors):
-            points_to_mark = []
-            if isinstance(sel, cq.Vertex):
-                 try: points_to_mark.append(sel.toTuple())
-                 except: logger.warning(f"Could not get coordinates for Vertex selector {i}")
-            elif isinstance(sel, cq.Edge):
-                 try:
-                      points_to_mark.append(sel.startPoint().toTuple())
-                      points_to_mark.append(sel.endPoint().toTuple())
-                 except: logger.warning(f"Could not get coordinates for Edge selector {i}")
-            elif isinstance(sel, cq.Face):
-                try:
-                    # Получаем центр грани
-                    center_pt = sel.Center()
-                    points_to_mark.append(center_pt.toTuple())
-                except Exception as e_face:
-                    logger.warning(f"Could not get center for Face selector {i}: {e_face}")
-
-            # Создаем маркеры для найденных точек
-            for point_idx, loc in enumerate(points_to_mark):
-                try:
-                    marker_name = f"{base_name}_{i}_{point_idx}"
-                    marker = None; is_mesh_marker = False
-                    if marker_type in {'CUBE', 'SPHERE'}:
-                        is_mesh_marker = True
-                        current_active = context.view_layer.objects.active
-                        bpy.ops.object.select_all(action='DESELECT')
-
-                        if marker_type == 'CUBE': bpy.ops.mesh.primitive_cube_add(size=marker_size, location=loc)
-                        else: bpy.ops.mesh.primitive_ico_sphere_add(radius=marker_size/2.0, subdivisions=1, location=loc) # Уменьшил subdivisions
-                        
-                        marker = context.view_layer.objects.active
-                        if not marker: raise RuntimeError("Failed to get created mesh primitive.")
-                        marker.name = marker_name
-                        
-                        mat_rgba = marker_color
-                        mat_name = f"CQMarkerMat_{mat_rgba[0]:.2f}_{mat_rgba[1]:.2f}_{mat_rgba[2]:.2f}_{mat_rgba[3]:.2f}"
-                        marker_mat = bpy.data.materials.get(mat_name)
-                        
-                        if not marker_mat:
-                            marker_mat = bpy.data.materials.new(name=mat_name)
-                            marker_mat.use_nodes = True # Используем ноды
-                            nodes = marker_mat.node_tree.nodes
-                            links = marker_mat.node_tree.links
-                            # Ищем ноду Principled BSDF или создаем ее
-                            bsdf = nodes.get("Principled BSDF")
-                            if not bsdf: # Если нет стандартной, создаем (маловероятно)
-                                bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-                                # Позиционируем ее (не обязательно)
-                                bsdf.location = 0,0
-                                # Если создали BSDF, нужно связать ее с выходом
-                                output_node = nodes.get("Material Output")
-                                if not output_node: output_node = nodes.new(type='ShaderNodeOutputMaterial')
-                                output_node.location = 200, 0
-                                links.new(bsdf.outputs['BSDF'], output_node.inputs['Surface'])
-
-                            # Устанавливаем цвет и альфу
-                            if bsdf:
-                                    bsdf.inputs["Base Color"].default_value = mat_rgba # Передаем RGBA
-                                    # Для прозрачности в Eevee/Cycles нужно настроить Blend Mode
-                                    marker_mat.blend_method = 'BLEND' # или 'HASHED'
-                                    marker_mat.shadow_method = 'HASHED' # или 'NONE'
-                                    # Также можно настроить другие параметры BSDF, если нужно
-                                    bsdf.inputs["Roughness"].default_value = 0.8
-                                    bsdf.inputs["Metallic"].default_value = 0.1
-                                    marker_mat.diffuse_color = mat_rgba # RGBA
-
-                        
-                        
-                        
-                        if marker.data.materials: marker.data.materials[0] = marker_mat
-                        else: marker.data.materials.append(marker_mat)
-                        
-                        bpy.context.view_layer.objects.active = current_active
-
-                    else: # Empty
-                        marker = bpy.data.objects.new(marker_name, None)
-                        marker.location = loc
-                        marker.empty_display_size = marker_size
-                        marker.empty_display_type = marker_type
-                        marker.color = marker_color # Для Empty цвет устанавливается так
-                        collection.objects.link(marker)
-
-                    item = self.marker_names.add(); item.name = marker.name
-                    created_count += 1
-                except Exception as e_create:
-                    logger.error(f"Failed to create marker at {loc} for selector {i}: {e_create}", exc_info=True)
-                    if marker and marker.name in bpy.data.objects:
-                        try: bpy.data.objects.remove(marker, do_unlink=True)
-                        except: pass
+            cloud = self.ensure_marker_object(collection)
+            # Координаты переписываются на месте, если число точек не изменилось
+            blender_utils.write_point_cloud(cloud.data, points)
+            self.ensure_glyph(cloud, collection)
+            cloud.update_tag(refresh={'DATA'})
+        except Exception as e:
+            logger.error(f"Failed to update markers of node '{self.name}': {e}", exc_info=True)
+            self.clear_markers()
+            raise NodeProcessingError(self, f"Marker update failed: {e}")
 
 
 # --- Регистрация ---
@@ -2,27 +2,56 @@
 # (Или nodes/io/cq_viewer.py, если вы переименовали)
 
 import bpy
-from bpy.props import StringProperty, FloatProperty, BoolProperty
+from bpy.props import StringProperty, FloatProperty, BoolProperty, EnumProperty, IntProperty
 import logging
 import math
+import functools
+import traceback
 
 from ...core.node_tree import CadQueryNode
-from ...core.sockets import CQObjectSocket, CQNumberSocket
-from ...utils import cq_utils
+from ...core.sockets import CQObjectSocket, CQNumberSocket, CQSelectorSocket
+from ...utils import tessellation, blender_utils
 from ...core.exceptions import NodeProcessingError, ViewerError, SocketConnectionError
+from ...core.constants import POSTPROCESS_TIMINGS_KEY
+from ...core.topology import resolve_selection
 from ...dependencies import cq
 
 
 logger = logging.getLogger(__name__)
-# Импорт оператора (если он в отдельном файле)
-try:
-    # Пытаемся импортировать, если он в отдельном файле
-    from ...operators.process_mesh import CQP_OT_ProcessMeshOp
-except ImportError:
-    logger.warning("CQP_OT_ProcessMeshOp not found in operators.process_mesh. Buttons might not work.")
-    # Определяем заглушку, чтобы код не падал
-    class CQP_OT_ProcessMeshOp: pass
 
+TESSELLATION_MODES = [
+    ('EDGE_RELATIVE', "Per Edge", "Tolerance is relative to the size of each edge (OCC relative mode)"),
+    ('BBOX_RELATIVE', "Relative to Size", "Deflection is a fraction of the bounding box diagonal of the input"),
+]
+DISPLAY_MODES = [
+    ('MESH', "Mesh", "Full tessellated mesh"),
+    ('BBOX', "Bounding Box", "Axis-aligned bounding box as a wire box"),
+    ('OBB', "Oriented Box", "Oriented bounding box as a wire box"),
+    ('EDGES', "Feature Edges", "B-rep edges discretised into a loose-edge wireframe"),
+]
+DRAG_PROXY_MODES = [('NONE', "None", "Always show the selected display mode")] + DISPLAY_MODES[1:]
+
+# --- Прогрессивная тесселяция ---
+# (tree name, node name) -> номер последнего запроса на уточнение. Таймер уточняет меш,
+# только если после него не было новых обновлений (пользователь перестал тянуть параметр).
+_refine_generation: dict[tuple[str, str], int] = {}
+
+def _refine_timer(key: tuple[str, str], generation: int):
+    """Timer callback: runs the fine tessellation pass once the viewer went idle."""
+    if _refine_generation.get(key) != generation: return None # Был более новый апдейт
+    tree_name, node_name = key
+    tree = bpy.data.node_groups.get(tree_name)
+    node = tree.nodes.get(node_name) if tree else None
+    if node is None: return None # Нода или дерево удалены
+    try:
+        node.process(final_pass=True)
+        node.set_error(None)
+    except Exception as e:
+        # Как в UpdateManager: ошибка видна на ноде, UPDATE_KEY сброшен
+        logger.error(f"Viewer '{tree_name}/{node_name}': refinement pass failed: {e}")
+        message = str(e) if isinstance(e, (NodeProcessingError, ViewerError, SocketConnectionError)) else f"Unexpected error: {e}"
+        node.set_error(message, traceback.format_exc())
+    return None # Одноразовый таймер
 
 
 # --- Нода ---
@@ -37,12 +66,34 @@ class CQViewerNode(CadQueryNode):
     target_object_name: StringProperty( default="" )
     tessellation_tolerance_: FloatProperty( name="Tolerance", default=0.1, min=0.001, max=1.0, precision=3, subtype='FACTOR', update=CadQueryNode.process_node )
     tessellation_angular_: FloatProperty( name="Angular Tol.", default=0.1, min=0.01, max=1.0, precision=2, subtype='FACTOR', update=CadQueryNode.process_node )
+    display_mode_: EnumProperty( items=DISPLAY_MODES, name="Display", default='MESH', update=CadQueryNode.process_node )
+    drag_proxy_: EnumProperty( items=DRAG_PROXY_MODES, name="While Dragging", default='NONE', description="Proxy shown on every update; the full mesh is restored after the refine delay", update=CadQueryNode.process_node )
+    tessellation_mode_: EnumProperty( items=TESSELLATION_MODES, name="Quality Mode", default='EDGE_RELATIVE', update=CadQueryNode.process_node )
+    relative_deflection_: FloatProperty( name="Relative Deflection", default=0.001, min=0.00001, max=0.1, precision=5, description="Deflection as a fraction of the bounding box diagonal", update=CadQueryNode.process_node )
+    triangle_budget_: IntProperty( name="Triangle Budget", default=0, min=0, description="Upper limit for the triangle count (0 = no limit). Deflection is coarsened to fit", update=CadQueryNode.process_node )
+    progressive_: BoolProperty( name="Progressive", default=False, description="Show a coarse mesh on every update and refine it to the final tolerance once updates stop", update=CadQueryNode.process_node )
+    coarse_factor_: FloatProperty( name="Coarse Factor", default=0.01, min=0.0001, max=0.5, precision=4, description="Deflection of the coarse pass as a fraction of the bounding box diagonal", update=CadQueryNode.process_node )
+    refine_delay_: FloatProperty( name="Refine Delay", default=0.5, min=0.0, max=10.0, subtype='TIME', unit='TIME', description="Idle time in seconds before the final tolerance pass runs" )
+    face_cache_: BoolProperty( name="Reuse Face Meshes", default=True, description="Keep meshes of unchanged faces between evaluations and mesh only new or changed faces", update=CadQueryNode.process_node )
+    weld_: BoolProperty( name="Weld Vertices", default=False, description="Merge duplicated vertices on shared face boundaries into one watertight mesh", update=CadQueryNode.process_node )
+    weld_distance_: FloatProperty( name="Weld Distance", default=0.0001, min=0.0, precision=6, subtype='DISTANCE', unit='LENGTH', description="Vertices closer than this are merged", update=CadQueryNode.process_node )
+    # --- Пост-обработка меша (применяется при каждом пересчете) ---
+    post_merge_: BoolProperty( name="Merge by Distance", default=False, update=CadQueryNode.process_node )
+    post_merge_distance_: FloatProperty( name="Merge Distance", default=0.001, min=0.0, precision=4, subtype='DISTANCE', unit='LENGTH', update=CadQueryNode.process_node )
+    post_quads_: BoolProperty( name="Tris to Quads", default=False, update=CadQueryNode.process_node )
+    post_quads_angle_: FloatProperty( name="Max Angle", default=math.radians(40.0), min=0.0, max=math.pi, subtype='ANGLE', update=CadQueryNode.process_node )
+    post_dissolve_: BoolProperty( name="Limited Dissolve", default=False, update=CadQueryNode.process_node )
+    post_dissolve_angle_: FloatProperty( name="Dissolve Angle", default=math.radians(5.0), min=0.0, max=math.pi, subtype='ANGLE', update=CadQueryNode.process_node )
+    post_smooth_: BoolProperty( name="Smooth by Angle", default=False, update=CadQueryNode.process_node )
+    post_smooth_angle_: FloatProperty( name="Smooth Angle", default=math.radians(30.0), min=0.0, max=math.pi, subtype='ANGLE', update=CadQueryNode.process_node )
+    parallel_meshing_: BoolProperty( name="Parallel Meshing", default=True, description="Mesh faces on all cores using OCC's parallel BRepMesh mode", update=CadQueryNode.process_node )
 
     # --- Инициализация ---
     def sv_init(self, context):
         self.inputs.new(CQObjectSocket.bl_idname, "Object In")
         socket_tol = self.inputs.new(CQNumberSocket.bl_idname, "Tolerance"); socket_tol.prop_name = 'tessellation_tolerance_'
         socket_ang = self.inputs.new(CQNumberSocket.bl_idname, "Angular Tol."); socket_ang.prop_name = 'tessellation_angular_'
+        self.inputs.new(CQSelectorSocket.bl_idname, "Highlight") # Грани для подсветки (cq_selected)
         try: # Синхронизация UI сокетов
             socket_tol.default_property = self.tessellation_tolerance_
             socket_ang.default_property = self.tessellation_angular_
@@ -53,27 +104,49 @@ class CQViewerNode(CadQueryNode):
         super().draw_buttons(context, layout)
         layout.prop(self, "target_object_name", text="Output Name")
 
+        row_disp = layout.row(align=True)
+        row_disp.prop(self, "display_mode_", text="")
+        row_disp.prop(self, "drag_proxy_", text="Drag")
+        op_pick = layout.operator("cqp.pick_face", text="Pick Face", icon='RESTRICT_SELECT_OFF')
+        op_pick.node_path = self.get_path()
+
         box_tess = layout.box()
         box_tess.label(text="Tessellation:")
+        box_tess.prop(self, "tessellation_mode_", text="")
         row_tess = box_tess.row(align=True)
-        row_tess.prop(self, "tessellation_tolerance_", text="Tol", slider=True)
+        if self.tessellation_mode_ == 'BBOX_RELATIVE':
+            row_tess.prop(self, "relative_deflection_", text="Rel")
+        else:
+            row_tess.prop(self, "tessellation_tolerance_", text="Tol", slider=True)
         row_tess.prop(self, "tessellation_angular_", text="Ang", slider=True)
+        if self.tessellation_mode_ == 'BBOX_RELATIVE':
+            box_tess.prop(self, "triangle_budget_", text="Budget")
+        row_opts = box_tess.row(align=True)
+        row_opts.prop(self, "parallel_meshing_", text="Parallel")
+        row_opts.prop(self, "face_cache_", text="Face Cache")
+        row_weld = box_tess.row(align=True)
+        row_weld.prop(self, "weld_", text="Weld")
+        sub_weld = row_weld.row(align=True); sub_weld.enabled = self.weld_
+        sub_weld.prop(self, "weld_distance_", text="")
+        box_tess.prop(self, "progressive_")
+        if self.progressive_ or self.drag_proxy_ != 'NONE':
+            row_lod = box_tess.row(align=True)
+            row_lod.prop(self, "coarse_factor_", text="Coarse")
+            row_lod.prop(self, "refine_delay_", text="Delay")
 
-        layout.separator()
-        col_ops = layout.column(align=True)
-        col_ops.label(text="Mesh Ops:")
-        
-        can_process = bool(self.target_object_name and self.target_object_name in bpy.data.objects)
-
-        row_merge = col_ops.row(align=True)
-        row_merge.enabled = can_process
-        op_merge = row_merge.operator("cqp.process_mesh_op", text="Merge by Distance", icon='AUTOMERGE_ON')
-        op_merge.node_path = self.get_path()
-        op_merge.operation = 'MERGE'
-        row_quads = col_ops.row(align=True)
-        row_quads.enabled = can_process
-        op_quads = row_quads.operator("cqp.process_mesh_op", text="Tris to Quads", icon='MOD_TRIANGULATE')
-        op_quads.node_path = self.get_path(); op_quads.operation = 'QUADS'
+        box_post = layout.box()
+        box_post.label(text="Post-Processing:")
+        col_post = box_post.column(align=True)
+        for flag, value in (("post_merge_", "post_merge_distance_"), ("post_quads_", "post_quads_angle_"),
+                            ("post_dissolve_", "post_dissolve_angle_"), ("post_smooth_", "post_smooth_angle_")):
+            row = col_post.row(align=True)
+            row.prop(self, flag)
+            sub = row.row(align=True); sub.enabled = getattr(self, flag)
+            sub.prop(self, value, text="")
+        timings = self.get(POSTPROCESS_TIMINGS_KEY)
+        if timings:
+            col_t = box_post.column(align=True); col_t.scale_y = 0.7
+            for stage, seconds in timings.items(): col_t.label(text=f"{stage}: {seconds * 1000.0:.1f} ms")
 
     def draw_buttons_ext(self, context, layout): self.draw_buttons(context, layout)
 
@@ -91,8 +164,102 @@ class CQViewerNode(CadQueryNode):
 
     def sv_free(self): self.clear_object()
 
+    def ensure_target_object(self):
+        """Returns the output mesh object, creating it (and its mesh) if needed."""
+        obj = bpy.data.objects.get(self.target_object_name) if self.target_object_name else None
+        if obj and obj.type == 'MESH': return obj
+
+        # Генерация уникального имени объекта
+        base_name = f"CQ_{self.id_data.name}_{self.name}"; cn = base_name; count = 1
+        while cn in bpy.data.objects: cn = f"{base_name}.{count:03d}"; count += 1
+        self.target_object_name = cn
+
+        mesh = bpy.data.meshes.new(f"CQ_{self.id_data.name}_{self.name}_Mesh")
+        obj = bpy.data.objects.new(self.target_object_name, mesh)
+        bpy.context.collection.objects.link(obj)
+        return obj
+
+    def tessellate(self, shapes, tolerance, angular, final_pass):
+        """Tessellates the shapes according to the quality and progressive settings."""
+        if self.progressive_ and not final_pass:
+            # Грубый проход: прогиб относительно габарита, уточнение - по таймеру
+            coarse_tol = tessellation.snap_deflection(max(tessellation.bounding_diagonal(shapes) * self.coarse_factor_, 1e-6))
+            buffers = tessellation.tessellate_shapes(shapes, coarse_tol, max(angular, 0.5),
+                                                     relative=False, parallel=self.parallel_meshing_,
+                                                     use_face_cache=self.face_cache_)
+            self.schedule_refine()
+        elif self.tessellation_mode_ == 'BBOX_RELATIVE':
+            # Прогиб от габарита (на лестнице значений - кеш граней переживает изменение размеров)
+            # + ограничение по числу треугольников
+            target = tessellation.snap_deflection(max(tessellation.bounding_diagonal(shapes) * self.relative_deflection_, 1e-6))
+            deflection, clean = tessellation.budget_deflection(shapes, target, self.triangle_budget_, angular,
+                                                               parallel=self.parallel_meshing_, use_face_cache=self.face_cache_)
+            buffers = tessellation.tessellate_shapes(shapes, deflection, angular, relative=False,
+                                                     parallel=self.parallel_meshing_, clean=clean,
+                                                     use_face_cache=self.face_cache_)
+        else:
+            buffers = tessellation.tessellate_shapes(shapes, tolerance, angular, parallel=self.parallel_meshing_,
+                                                     use_face_cache=self.face_cache_)
+        if self.weld_: buffers = tessellation.weld_vertices(buffers, self.weld_distance_)
+        return buffers
+
+    def build_proxy(self, shapes, mode):
+        """Builds the loose-edge proxy (bounding box or feature edges) for the shapes."""
+        if mode == 'BBOX': return tessellation.aabb_lines(shapes)
+        if mode == 'OBB': return tessellation.obb_lines(shapes)
+        # Ребра дискретизуются с грубым прогибом от габарита
+        deflection = max(tessellation.bounding_diagonal(shapes) * self.coarse_factor_, 1e-6)
+        return tessellation.feature_edge_lines(shapes, deflection)
+
+    def apply_highlight(self, mesh, shapes, selection):
+        """Writes the `cq_selected` polygon attribute for the faces in `selection`."""
+        face_index = tessellation.face_index_map(shapes)
+        selected = {face_index[f] for sel in resolve_selection(selection, shapes[0] if shapes else None)
+                    for f in sel.Faces() if f in face_index}
+        count = blender_utils.write_face_selection(mesh, selected)
+        logger.debug(f"Viewer '{self.name}': highlighted {len(selected)} face(s), {count} polygon(s).")
+
+    def apply_post_processing(self, mesh):
+        """Runs the enabled post-processing stages on the freshly written mesh."""
+        timings = blender_utils.post_process_mesh(
+            mesh,
+            merge_distance=self.post_merge_distance_ if self.post_merge_ else None,
+            quads_angle=self.post_quads_angle_ if self.post_quads_ else None,
+            dissolve_angle=self.post_dissolve_angle_ if self.post_dissolve_ else None,
+            smooth_angle=self.post_smooth_angle_ if self.post_smooth_ else None,
+        )
+        self[POSTPROCESS_TIMINGS_KEY] = {stage: seconds for stage, seconds in timings}
+
+    def export_buffers(self):
+        """Final-quality mesh of the current input (bundle export), or None if there is nothing to show."""
+        input_socket = self.inputs.get("Object In")
+        if not input_socket or not input_socket.is_linked: return None
+        cq_input = input_socket.sv_get()
+        if not isinstance(cq_input, (cq.Workplane, cq.Shape)): return None
+        shapes = tessellation.collect_shapes(cq_input)
+        if not shapes: return None
+        socket_tol = self.inputs.get("Tolerance"); socket_ang = self.inputs.get("Angular Tol.")
+        tolerance = socket_tol.sv_get() if socket_tol.is_linked else self.tessellation_tolerance_
+        angular = socket_ang.sv_get() if socket_ang.is_linked else self.tessellation_angular_
+        return self.tessellate(shapes, max(tolerance, 0.001), max(angular, 0.01), final_pass=True)
+
+    def install_buffers(self, buffers):
+        """Writes precomputed buffers (bundle import) into the output mesh without tessellating."""
+        target_obj = self.ensure_target_object()
+        blender_utils.write_mesh_buffers(target_obj.data, buffers)
+        self.apply_post_processing(target_obj.data)
+        target_obj.update_tag(refresh={'DATA'})
+
+    def schedule_refine(self):
+        """Schedules the fine tessellation pass after `refine_delay_` seconds of idle time."""
+        key = (self.id_data.name, self.name)
+        generation = _refine_generation.get(key, 0) + 1
+        _refine_generation[key] = generation
+        bpy.app.timers.register(functools.partial(_refine_timer, key, generation),
+                                first_interval=max(self.refine_delay_, 0.001))
+
     # --- Обработка (без объединения здесь) ---
-    def process(self):
+    def process(self, final_pass=False):
         # logger.debug(f"--- CQViewerNode process START for node {self.name} ---")
         input_socket = self.inputs.get("Object In")
         socket_tol = self.inputs.get("Tolerance"); socket_ang = self.inputs.get("Angular Tol.")
@@ -100,7 +267,7 @@ class CQViewerNode(CadQueryNode):
 
         if not input_socket.is_linked: self.clear_object(); return
 
-        cq_input = None; target_obj = None; old_mesh_to_remove = None
+        cq_input = None; target_obj = None
         try:
             cq_input = input_socket.sv_get()
             tolerance = socket_tol.sv_get() if socket_tol.is_linked else self.tessellation_tolerance_
@@ -110,45 +277,34 @@ class CQViewerNode(CadQueryNode):
 
             if cq_input is None: self.clear_object(); return
 
-            # --- Получение Shape из cq_input (ожидаем один Shape) ---
-            shape_to_convert = None
-            if isinstance(cq_input, cq.Workplane):
-                vals = cq_input.vals()
-                if vals and isinstance(vals[0], cq.Shape):
-                    shape_to_convert = vals[0]
-                    if len(vals) > 1: logger.warning(f"Viewer '{self.name}': Input WP has multiple shapes ({len(vals)}). Using first.")
-                else: raise ViewerError(self, "Input Workplane empty or invalid.")
-            elif isinstance(cq_input, cq.Shape):
-                shape_to_convert = cq_input
-            else: raise NodeProcessingError(self, f"Unsupported input type: {type(cq_input)}")
-
-            if not shape_to_convert or not shape_to_convert.isValid():
-                 self.clear_object(); raise ViewerError(self, "Final shape to convert is invalid.")
+            # --- Получение всех Shape из cq_input ---
+            if not isinstance(cq_input, (cq.Workplane, cq.Shape)):
+                raise NodeProcessingError(self, f"Unsupported input type: {type(cq_input)}")
+            shapes_to_convert = tessellation.collect_shapes(cq_input)
+            if not shapes_to_convert:
+                self.clear_object(); raise ViewerError(self, "Input is empty or contains no valid shapes.")
             # ---------------------------------------------------
 
-            # --- Конвертация ---
-            mesh_name = f"CQ_{self.id_data.name}_{self.name}_Mesh"
-            new_blender_mesh = cq_utils.shape_to_blender_mesh(shape_to_convert, mesh_name, tolerance=tolerance, angular_tolerance=angular)
-            if new_blender_mesh is None: raise ViewerError(self, "Mesh conversion returned None.")
+            # --- Прокси вместо меша (постоянно или на время перетаскивания) ---
+            proxy_mode = self.display_mode_ if self.display_mode_ != 'MESH' else None
+            if proxy_mode is None and self.drag_proxy_ != 'NONE' and not final_pass:
+                proxy_mode = self.drag_proxy_
+                self.schedule_refine() # Полный меш вернется по таймеру
 
-            # --- Обновление/Создание объекта Blender ---
-            if self.target_object_name and self.target_object_name in bpy.data.objects:
-                target_obj = bpy.data.objects[self.target_object_name]
-                old_mesh_to_remove = target_obj.data
-                target_obj.data = new_blender_mesh
+            target_obj = self.ensure_target_object()
+            if proxy_mode:
+                lines = self.build_proxy(shapes_to_convert, proxy_mode)
+                blender_utils.write_line_buffers(target_obj.data, lines)
+                self[POSTPROCESS_TIMINGS_KEY] = {}
             else:
-                # ... (генерация уникального имени target_object_name) ...
-                if not self.target_object_name or self.target_object_name in bpy.data.objects:
-                     base_name = f"CQ_{self.id_data.name}_{self.name}"; cn = base_name; count = 1
-                     while cn in bpy.data.objects: cn = f"{base_name}.{count:03d}"; count += 1
-                     self.target_object_name = cn
-                target_obj = bpy.data.objects.new(self.target_object_name, new_blender_mesh)
-                bpy.context.collection.objects.link(target_obj)
-
-            # --- Очистка старого меша ---
-            if old_mesh_to_remove and old_mesh_to_remove != new_blender_mesh and old_mesh_to_remove.users == 0:
-                try: bpy.data.meshes.remove(old_mesh_to_remove, do_unlink=True)
-                except: logger.warning(f"Old mesh '{old_mesh_to_remove.name}' failed to remove?")
+                buffers = self.tessellate(shapes_to_convert, tolerance, angular, final_pass)
+                if not buffers.triangle_count: raise ViewerError(self, "Tessellation produced no triangles.")
+                # --- Запись в меш объекта (datablock переиспользуется) ---
+                blender_utils.write_mesh_buffers(target_obj.data, buffers)
+                self.apply_post_processing(target_obj.data)
+                socket_hl = self.inputs.get("Highlight")
+                if socket_hl and socket_hl.is_linked:
+                    self.apply_highlight(target_obj.data, shapes_to_convert, socket_hl.sv_get())
 
             if target_obj: target_obj.update_tag(refresh={'DATA'})
 
@@ -1,11 +1,14 @@
 # cadquery_parametric_addon/nodes/operations/bevel.py
 import bpy
-from bpy.props import FloatProperty, IntProperty
+from bpy.props import FloatProperty, IntProperty, BoolProperty
 import logging
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQNumberSocket
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import resolve_selection, get_topology_index
+from ...core.cad_manager import cad_manager
+from ...core.constants import BEVEL_FAILED_EDGES_KEY
 from ...dependencies import cq
 
 logger = logging.getLogger(__name__)
@@ -27,13 +30,19 @@ class BevelNode(CadQueryNode):
         description="Number of segments. 1 creates a chamfer (flat), >1 creates a fillet (rounded)",
         update=CadQueryNode.process_node
     )
+    skip_failed_: BoolProperty(
+        name="Skip Failing Edges", default=True,
+        description="If the batch fails, bevel all edges except the ones that cannot be beveled (found by bisection)",
+        update=CadQueryNode.process_node
+    )
     # Добавить выбор режима (Fillet/Chamfer)? Пока определяется сегментами.
 
     # --- Инициализация ---
     def sv_init(self, context):
         self.inputs.new(CQObjectSocket.bl_idname, "Object In")
-        # Вход для селекторов (пока только ребра)
+        # Вход для селекторов: SelectionRef, cq.Edge или список ребер
         self.inputs.new(CQSelectorSocket.bl_idname, "Selected Edges")
+        # Amount: одно число или список (по значению на ребро)
         self.inputs.new(CQNumberSocket.bl_idname, "Amount").prop_name = 'amount_'
         self.inputs.new(CQNumberSocket.bl_idname, "Segments").prop_name = 'segments_'
         self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
@@ -46,7 +55,9 @@ class BevelNode(CadQueryNode):
     # --- UI ---
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
-        # UI будет нарисовано сокетами
+        layout.prop(self, "skip_failed_")
+        failed = self.get(BEVEL_FAILED_EDGES_KEY)
+        if failed: layout.label(text=f"Failed edges: {failed}", icon='ERROR')
 
     # --- Обработка ---
     def process(self):
@@ -55,7 +66,7 @@ class BevelNode(CadQueryNode):
         socket_amount = self.inputs["Amount"]
         socket_segments = self.inputs["Segments"]
         out_socket = self.outputs["Object Out"]
-
+        if BEVEL_FAILED_EDGES_KEY in self: del self[BEVEL_FAILED_EDGES_KEY]
 
         if not socket_obj.is_linked:
             raise SocketConnectionError(self, "'Object In' must be connected")
@@ -75,7 +86,8 @@ class BevelNode(CadQueryNode):
             segments = int(socket_segments.sv_get()) if socket_segments.is_linked else self.segments_
 
             if obj_in is None: raise NodeProcessingError(self, "Input object is None")
-            if amount <= 0: raise NodeProcessingError(self, "Amount must be positive")
+            amounts = [float(a) for a in amount] if isinstance(amount, (list, tuple)) else [float(amount)]
+            if not amounts or min(amounts) <= 0: raise NodeProcessingError(self, "Amount must be positive")
             if segments < 1: raise NodeProcessingError(self, "Segments must be 1 or greater")
 
             # Получаем Shape
@@ -89,50 +101,59 @@ class BevelNode(CadQueryNode):
             else:
                 raise NodeProcessingError(self, f"Unsupported input object type: {type(obj_in)}")
 
-            # Обрабатываем селектор (пока только один)
-            edge_list = []
-            if isinstance(selector_data, cq.Edge): # Проверяем тип напрямую
-              edge_list.append(selector_data)
-              logger.debug(f"Node {self.name}: Identified edge {selector_data} for beveling.")
-            elif selector_data is not None:
-              logger.warning(f"Node {self.name}: Received invalid selector data type: {type(selector_data)}. Expected cq.Edge.")
+            # Ребра из селектора (SelectionRef, cq.Edge или список)
+            try: edge_list = resolve_selection(selector_data, shape_in, kind='EDGE')
+            except LookupError as e: raise NodeProcessingError(self, str(e))
+            if selector_data is not None and not edge_list:
+              logger.warning(f"Node {self.name}: Selector input contains no edges ({selector_data!r}).")
 
             if not edge_list:
                 logger.debug(f"Node {self.name}: No valid edges selected for beveling. Passing original shape.")
                 out_socket.sv_set(obj_in) # Передаем исходный объект
                 return
 
+            # Одно значение - на все ребра, список - по ребру
+            if len(amounts) == 1: amounts = amounts * len(edge_list)
+            elif len(amounts) != len(edge_list):
+                raise NodeProcessingError(self, f"Got {len(amounts)} amounts for {len(edge_list)} edges")
+
         except Exception as e:
              if isinstance(e, (NodeProcessingError, SocketConnectionError)): raise
              else: raise NodeProcessingError(self, f"Input error: {e}")
 
 
-        # Применяем фаску или скругление
+        # Применяем фаску или скругление - одной сборкой OCC на все ребра
+        chamfer = segments == 1
         try:
-            result_shape = None
-            if edge_list: # Применяем только если есть ребра
-                if segments == 1:
-                    # Chamfer
-                    logger.debug(f"Applying chamfer with distance {amount} to edge(s): {edge_list}")
-                    result_shape = shape_in.chamfer(amount, amount, edge_list)
-                else:
-                    # Fillet
-                    logger.debug(f"Applying fillet with radius {amount} to edge(s): {edge_list}")
-                    result_shape = shape_in.fillet(amount, edge_list)
-            else:
-                # Если ребер для обработки не было, возвращаем исходную форму
-                result_shape = shape_in
-
-            if result_shape is None or not result_shape.isValid():
-                 # Проверка нужна, даже если edge_list был пуст, т.к. shape_in мог быть невалидным
-                 raise NodeProcessingError(self, "Bevel operation resulted in an invalid shape.")
-
-            # Возвращаем результат как Shape (или обернуть в Workplane?)
-            # Возвращаем Shape, чтобы не терять контекст, если вход был Shape
+            topology = None; reports = []
+            keep = list(range(len(edge_list))) # Позиции ребер текущей попытки
+            while True:
+                try:
+                    result_shape = cad_manager.bevel_edges(shape_in, [edge_list[i] for i in keep], [amounts[i] for i in keep], chamfer)
+                    break
+                except ValueError as batch_error:
+                    # Пакет не собрался - бисекцией ищем ребра (или группы ребер), которые не обрабатываются
+                    failing, groups = cad_manager.find_failing_edges(
+                        shape_in, [edge_list[i] for i in keep], [amounts[i] for i in keep], chamfer)
+                    if topology is None: topology = get_topology_index(shape_in)
+                    edge_id = lambda pos: str(topology.index_of(edge_list[keep[pos]]))
+                    found = ([", ".join(edge_id(p) for p in failing)] if failing else []) + \
+                            [f"({', '.join(edge_id(p) for p in group)}) together" for group in groups]
+                    reports += found
+                    self[BEVEL_FAILED_EDGES_KEY] = "; ".join(reports)
+                    dropped = set(failing).union(*groups)
+                    if not self.skip_failed_ or len(dropped) == len(keep):
+                        raise NodeProcessingError(self, f"{batch_error}. Failing edges: {self[BEVEL_FAILED_EDGES_KEY]}")
+                    logger.warning(f"Node {self.name}: skipping {len(dropped)} failing edge(s): {'; '.join(found)}")
+                    # Оставшиеся ребра пробуем снова: они тоже могут не собираться вместе
+                    keep = [i for pos, i in enumerate(keep) if pos not in dropped]
+
+            # Возвращаем результат как Workplane
             result_wp = cq.Workplane("XY").add(result_shape)
-            out_socket.sv_set(result_wp) 
-            logger.debug(f"Node {self.name}: Bevel operation successful.")
+            out_socket.sv_set(result_wp)
+            logger.debug(f"Node {self.name}: {'Chamfer' if chamfer else 'Fillet'} of {len(edge_list)} edge(s) successful.")
 
+        except NodeProcessingError: raise
         except Exception as e:
              logger.error(f"CadQuery bevel operation failed: {e}", exc_info=True)
              raise NodeProcessingError(self, f"Bevel operation failed: {e}")
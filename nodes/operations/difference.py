@@ -1,27 +1,40 @@
 # cadquery_parametric_addon/nodes/operations/difference.py
 import bpy
+from bpy.props import BoolProperty
+import logging
+import time
+
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket
 from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
 from ...dependencies import cq # Нужен cq для проверки типов
 
-class DifferenceNode(CadQueryNode):
-    """Performs a boolean difference (cut) of two CadQuery objects (A - B)."""
+logger = logging.getLogger(__name__)
+
+class DifferenceNode(BooleanOptionsMixin, CadQueryNode):
+    """Performs a boolean difference (cut) of CadQuery objects (A - B), all tools in one pass."""
     bl_idname = 'CQPNode_OperationDifferenceNode'
     bl_label = 'Difference (Cut)'
     sv_category = 'Operations'
 
+    # --- Свойства ---
+    skip_disjoint_: BoolProperty( name="Skip Disjoint Tools", default=True, description="Drop tools whose bounding box misses the base before cutting", update=CadQueryNode.process_node )
+
     def sv_init(self, context):
         """Initialize sockets."""
         self.inputs.new(CQObjectSocket.bl_idname, "Object A (Base)")
-        self.inputs.new(CQObjectSocket.bl_idname, "Object B (Tool)")
+        # Инструменты: несколько связей, списки, Workplane или Compound (экземпляры)
+        self.inputs.new(CQObjectSocket.bl_idname, "Object B (Tool)", use_multi_input=True)
         self.outputs.new(CQObjectSocket.bl_idname, "Result")
 
     def draw_buttons(self, context, layout):
          super().draw_buttons(context, layout) # Ошибки
          # Можно добавить подсказку о порядке операндов
          layout.label(text="Output = A - B")
+         layout.prop(self, "skip_disjoint_")
+         self.draw_boolean_options(layout)
 
     def process(self):
         """Node's core logic."""
@@ -35,24 +48,28 @@ class DifferenceNode(CadQueryNode):
         # Получаем объекты
         try:
             obj_a = socket_a.sv_get() # Базовый объект
-            obj_b = socket_b.sv_get() # Инструмент (вычитаемый)
+            tools_in = socket_b.sv_get_all() # Инструменты (вычитаемые), по одному на связь
         except Exception as e:
             raise SocketConnectionError(self, f"Could not get input data: {e}")
 
-        if obj_a is None or obj_b is None:
-            raise NodeProcessingError(self, "One or both input objects are None")
+        if obj_a is None or any(t is None for t in tools_in):
+            raise NodeProcessingError(self, "One or more input objects are None")
 
-        # Проверяем типы (хотя cad_manager тоже может это делать)
+        # Проверяем типы
         if not isinstance(obj_a, (cq.Workplane, cq.Shape)):
              raise NodeProcessingError(self, f"Object A must be Workplane/Shape, got {type(obj_a)}")
-        # if not isinstance(obj_b, (cq.Workplane, cq.Shape)): # cad_manager обработает
-        #      raise NodeProcessingError(self, f"Object B must be Workplane/Shape, got {type(obj_b)}")
+        bases = cad_manager.shapes_of(obj_a)
+        tools = cad_manager.shapes_of(tools_in)
+        if not bases or not bases[0].isValid(): raise NodeProcessingError(self, "Object A is empty or invalid")
+        if not tools: raise NodeProcessingError(self, f"Object B contains no shapes (got {[type(t) for t in tools_in]})")
 
-        # Выполняем операцию 'cut' через менеджер
+        # Все инструменты вычитаются одним BRepAlgoAPI_Cut
         try:
-            # cut ожидает Shape или Workplane для второго аргумента
-            result_obj = cad_manager.execute_operation(obj_a, obj_b, "cut")
-            self.outputs["Result"].sv_set(result_obj)
+            options = self.boolean_options(); t0 = time.perf_counter()
+            result_shape = cad_manager.cut_shapes(bases, tools, skip_disjoint=self.skip_disjoint_, options=options)
+            self.record_boolean_profile(options, time.perf_counter() - t0)
+            logger.debug(f"DifferenceNode '{self.name}': cut {len(tools)} tool(s) in {time.perf_counter() - t0:.4f}s")
+            self.outputs["Result"].sv_set(cq.Workplane("XY").add(result_shape))
         except Exception as e:
             # Ловим ошибки CadQuery или менеджера
             raise NodeProcessingError(self, f"Difference (cut) operation failed: {e}")
@@ -60,4 +77,4 @@ class DifferenceNode(CadQueryNode):
 # --- Список классов для регистрации ---
 classes = (
     DifferenceNode,
-)
\ No newline at end of file
+)
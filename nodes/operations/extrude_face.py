@@ -1,15 +1,23 @@
 # cadquery_parametric_addon/nodes/operations/extrude_face.py
 import bpy
-from bpy.props import FloatProperty
+from bpy.props import FloatProperty, EnumProperty
 import logging
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQNumberSocket
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import resolve_selection, input_shape
+from ...core.cad_manager import cad_manager
+from ...core.constants import EXTRUDE_METHOD_KEY
 from ...dependencies import cq
 
 logger = logging.getLogger(__name__)
 
+EXTRUDE_METHODS = [
+    ('LOCAL', "Local Feature", "Rebuild only the faces around the extrusion (BRepFeat_MakePrism), falling back to Boolean"),
+    ('BOOLEAN', "Boolean", "Build a prism and union/cut it with the whole solid"),
+]
+
 class ExtrudeFaceNode(CadQueryNode):
     """Extrudes a selected face of a CadQuery object."""
     bl_idname = 'CQPNode_OperationExtrudeFaceNode'
@@ -22,12 +30,13 @@ class ExtrudeFaceNode(CadQueryNode):
         description="Distance to extrude. Positive for outward, negative for inward.",
         update=CadQueryNode.process_node
     )
+    method_: EnumProperty( items=EXTRUDE_METHODS, name="Method", default='BOOLEAN', update=CadQueryNode.process_node )
     # Можно добавить опцию "taper" (сужение/расширение)
 
     # --- Инициализация ---
     def sv_init(self, context):
         self.inputs.new(CQObjectSocket.bl_idname, "Object In")
-        self.inputs.new(CQSelectorSocket.bl_idname, "Selected Face") # Ожидаем cq.Face
+        self.inputs.new(CQSelectorSocket.bl_idname, "Selected Face") # SelectionRef или cq.Face
         self.inputs.new(CQNumberSocket.bl_idname, "Distance").prop_name = 'distance_'
         self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
 
@@ -38,6 +47,9 @@ class ExtrudeFaceNode(CadQueryNode):
     # --- UI ---
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout)
+        layout.prop(self, "method_", text="")
+        used = self.get(EXTRUDE_METHOD_KEY)
+        if used: layout.label(text=f"Last: {used}", icon='INFO')
         # Поле ввода будет нарисовано сокетом
 
     # --- Обработка ---
@@ -52,6 +64,7 @@ class ExtrudeFaceNode(CadQueryNode):
             logger.warning(f"Node {self.name}: Sockets not fully initialized. Skipping."); return
 
         obj_in_for_passthrough = None # Для передачи объекта, если операция не выполняется
+        if EXTRUDE_METHOD_KEY in self: del self[EXTRUDE_METHOD_KEY]
         try:
             if socket_obj.is_linked:
                 obj_in_for_passthrough = socket_obj.sv_get()
@@ -64,7 +77,11 @@ class ExtrudeFaceNode(CadQueryNode):
                 logger.debug(f"Node {self.name}: No face selected, passing object through.")
                 return
 
-            selected_cq_face = socket_sel.sv_get() # Это объект cq.Face
+            # SelectionRef (или cq.Face) разрешается на входном Shape
+            try: faces = resolve_selection(socket_sel.sv_get(), input_shape(obj_in_for_passthrough), kind='FACE')
+            except LookupError as e: raise NodeProcessingError(self, str(e))
+            if len(faces) > 1: logger.warning(f"Node {self.name}: {len(faces)} faces selected, extruding the first one.")
+            selected_cq_face = faces[0] if faces else None
             distance = socket_dist.sv_get() if socket_dist.is_linked else self.distance_
 
             if selected_cq_face is None:
@@ -108,29 +125,43 @@ class ExtrudeFaceNode(CadQueryNode):
                 except Exception as e:
                     raise NodeProcessingError(self, f"Could not get normal of the selected face: {e}")
 
-                try:
-                    # Вектор выдавливания: нормаль * расстояние
-                    # extrusion_vector = face_normal.multiply(distance)
+                # 2a. Локальная фича: перестраиваются только грани вокруг выбранной
+                method_used = "boolean"
+                if self.method_ == 'LOCAL':
+                    try:
+                        local_shape = cad_manager.extrude_face_local(base_shape_for_op, selected_cq_face, face_normal, float(distance))
+                        final_result_wp = cq.Workplane("XY").add(local_shape)
+                        method_used = "local feature"
+                    except ValueError as e_local:
+                        logger.warning(f"Node {self.name}: {e_local}. Falling back to Boolean extrusion.")
+                        method_used = "boolean (fallback)"
+
+                # 2b. Булева операция (режим BOOLEAN или откат локальной фичи)
+                if final_result_wp is None:
+                    try:
+                        # Вектор выдавливания: нормаль * расстояние
+                        # extrusion_vector = face_normal.multiply(distance)
 
-                    extrude_distance = float(distance)
+                        extrude_distance = float(distance)
 
-                    extruded_part_shape = cq.Solid.extrudeLinear(selected_cq_face, face_normal.multiply(extrude_distance))
+                        extruded_part_shape = cq.Solid.extrudeLinear(selected_cq_face, face_normal.multiply(extrude_distance))
 
-                except Exception as e_extrude:
-                    logger.error(f"cq.Solid.extrudeLinear failed: {e_extrude}", exc_info=True)
-                    raise NodeProcessingError(self, f"Extrusion operation (extrudeLinear) failed: {e_extrude}")
+                    except Exception as e_extrude:
+                        logger.error(f"cq.Solid.extrudeLinear failed: {e_extrude}", exc_info=True)
+                        raise NodeProcessingError(self, f"Extrusion operation (extrudeLinear) failed: {e_extrude}")
 
-                if not extruded_part_shape or not extruded_part_shape.isValid():
-                    raise NodeProcessingError(self, "Extrusion (extrudeLinear) resulted in an invalid or empty shape.")
-                # logger.debug(f"  Extruded part type: {type(extruded_part_shape)}")
+                    if not extruded_part_shape or not extruded_part_shape.isValid():
+                        raise NodeProcessingError(self, "Extrusion (extrudeLinear) resulted in an invalid or empty shape.")
+                    # logger.debug(f"  Extruded part type: {type(extruded_part_shape)}")
 
 
-                # 3. Булева операция между ИСХОДНЫМ Workplane (base_wp) и НОВЫМ телом (extruded_part_shape)
+                    # 3. Булева операция между ИСХОДНЫМ Workplane (base_wp) и НОВЫМ телом (extruded_part_shape)
       
-                if distance > 0: # Положительное значение - объединяем
-                    final_result_wp = base_wp.union(extruded_part_shape)
-                else: 
-                    final_result_wp = base_wp.cut(extruded_part_shape)
+                    if distance > 0: # Положительное значение - объединяем
+                        final_result_wp = base_wp.union(extruded_part_shape)
+                    else: 
+                        final_result_wp = base_wp.cut(extruded_part_shape)
+                self[EXTRUDE_METHOD_KEY] = method_used
                 
             # --- Конец логики выдавливания ---
 
@@ -1,16 +1,18 @@
 # cadquery_parametric_addon/nodes/operations/intersect.py
 import bpy
 import logging
+import time
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket
 from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
 from ...dependencies import cq
 
 logger = logging.getLogger(__name__)
 
-class IntersectNode(CadQueryNode):
+class IntersectNode(BooleanOptionsMixin, CadQueryNode):
     """Performs a boolean intersection of two CadQuery objects."""
     bl_idname = 'CQPNode_OperationIntersectNode'
     bl_label = 'Intersect (Boolean)'
@@ -24,6 +26,7 @@ class IntersectNode(CadQueryNode):
 
     def draw_buttons(self, context, layout):
          super().draw_buttons(context, layout) # Ошибки
+         self.draw_boolean_options(layout)
 
     def process(self):
         """Node's core logic."""
@@ -45,7 +48,9 @@ class IntersectNode(CadQueryNode):
         # Выполняем операцию 'intersect' через менеджер
         try:
             # logger.debug(f"Node {self.name}: Intersecting {type(obj_a)} with {type(obj_b)}")
-            result_obj = cad_manager.execute_operation(obj_a, obj_b, "intersect")
+            options = self.boolean_options(); t0 = time.perf_counter()
+            result_obj = cad_manager.execute_operation(obj_a, obj_b, "intersect", options)
+            self.record_boolean_profile(options, time.perf_counter() - t0)
             self.outputs["Result"].sv_set(result_obj)
         except Exception as e:
             raise NodeProcessingError(self, f"Intersect operation failed: {e}")
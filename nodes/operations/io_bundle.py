@@ -0,0 +1,251 @@
+# cadquery_parametric_addon/operators/io_bundle.py
+# Бандл .cqpz: zip с деревом (JSON V2), BREP результатами выбранных нод и буферами мешей вьюеров.
+# При импорте результаты кладутся в кэш сокетов, и дерево отображается без пересчета OCC.
+import bpy
+import io
+import json
+import hashlib
+import logging
+import time
+import zipfile
+from collections import defaultdict
+from mathutils import Vector
+from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+import numpy as np
+
+from ...core.node_tree import CadQueryNodeTree, CadQueryNode
+from ...core.data_cache import sv_get_socket
+from ...core.cad_manager import cad_manager
+from ...core.constants import UPDATE_KEY
+from ...utils.tessellation import MeshBuffers
+from ...dependencies import cq
+from .io_json import tree_to_dict_v2, import_tree_data
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = "cqpz"
+BUNDLE_VERSION = 1
+TREE_ENTRY = "tree.json"
+MANIFEST_ENTRY = "manifest.json"
+
+BUNDLE_RESULTS = [
+    ('SINKS', "Sinks", "Results feeding viewers and outputs that are not connected"),
+    ('SELECTED', "Sinks + Selected", "Also store the results of the selected nodes (e.g. expensive Booleans)"),
+    ('NONE', "None", "Only the tree, everything is recomputed on import"),
+]
+
+# --- Структурный хеш ---
+
+def structural_hashes(tree_data: dict) -> dict:
+    """{node name: hex digest} over each node's type, properties and everything upstream of it.
+
+    Computed from the V2 tree dict, so names and locations don't matter and export and
+    import agree on the keys.
+    """
+    nodes = {n["name"]: n for n in tree_data.get("nodes", []) if n.get("name")}
+    inputs = defaultdict(list) # to_node -> связи (в порядке дерева, важно для мульти-входов)
+    for link in tree_data.get("links", []):
+        if link.get("from_node") in nodes and link.get("to_node") in nodes: inputs[link["to_node"]].append(link)
+
+    hashes = {}; visiting = set()
+    for root in nodes:
+        stack = [root]
+        while stack: # Итеративный обход: цепочки в тысячи нод не упираются в лимит рекурсии
+            name = stack[-1]
+            if name in hashes: stack.pop(); continue
+            pending = [l["from_node"] for l in inputs[name] if l["from_node"] not in hashes]
+            if pending and name not in visiting:
+                visiting.add(name); stack.extend(pending); continue
+            # Остались непосчитанные предки только при цикле - хешируются как "cycle"
+            node = nodes[name]
+            upstream = sorted(((l.get("to_socket") or "", hashes.get(l["from_node"], "cycle"), l.get("from_socket") or "")
+                               for l in inputs[name]), key=lambda item: item[0])
+            payload = json.dumps([node.get("bl_idname"), node.get("mute", False), node.get("properties", {}), upstream],
+                                 sort_keys=True, separators=(',', ':'))
+            hashes[name] = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+            visiting.discard(name); stack.pop()
+    return hashes
+
+# --- Вспомогательные функции ---
+
+def node_is_current(node, dirty_nodes) -> bool:
+    """True if the node's cached outputs were computed from its current inputs and properties."""
+    return not node.get_error() and bool(node.get(UPDATE_KEY)) and node.name not in dirty_nodes
+
+def bundle_candidates(tree, include_selected: bool) -> list:
+    """Nodes whose results go into the bundle: viewers, their sources, unconnected sinks (and the selection).
+
+    Only current nodes qualify: the socket cache keeps outputs of failed or not yet
+    recomputed nodes, which would not match the structural hash of their properties.
+    """
+    from ...core.update_system import update_manager
+    state = update_manager.get_tree_state(tree)
+    dirty_nodes = set(state.nodes) if state.needs_rebuild else state.dirty_nodes
+    picked = {}; sources = {} # sources: вьюер -> ноды, из которых строится его меш
+    for node in tree.nodes:
+        if not isinstance(node, CadQueryNode) or node.mute: continue
+        if hasattr(node, "export_buffers"): # Вьюер: меш + результат его источника
+            picked[node.name] = node
+            sources[node.name] = [link.from_node for socket in node.inputs for link in socket.links]
+            for source in sources[node.name]: picked[source.name] = source
+        elif node.outputs and (not any(s.is_linked for s in node.outputs) or (include_selected and node.select)):
+            picked[node.name] = node
+    outdated = {name for name, node in picked.items()
+                if not node_is_current(node, dirty_nodes)
+                or not all(node_is_current(source, dirty_nodes) for source in sources.get(name, ()))}
+    if outdated: logger.info(f"Bundle: results of {len(outdated)} node(s) not stored (not processed or failed): {sorted(outdated)}")
+    return [node for node in picked.values() if node.name not in outdated]
+
+def write_node_results(zf, node, node_hash: str) -> dict:
+    """Writes the node's cached CadQuery outputs as BREP, returns {socket name: entry}."""
+    entry = {}
+    for index, socket in enumerate(node.outputs):
+        try: data = sv_get_socket(socket.socket_id)
+        except KeyError: continue
+        if not isinstance(data, (cq.Workplane, cq.Shape)): continue # Селекторы и числа пересчитываются
+        shapes = cad_manager.shapes_of(data)
+        if not shapes: continue
+        shape = shapes[0] if len(shapes) == 1 else cq.Compound.makeCompound(shapes)
+        buffer = io.BytesIO(); shape.exportBrep(buffer)
+        path = f"results/{node_hash}/{index}.brep"
+        zf.writestr(path, buffer.getvalue())
+        entry[socket.name] = {"path": path, "kind": "shape" if isinstance(data, cq.Shape) else "workplane", "count": len(shapes)}
+    return entry
+
+def write_mesh(zf, buffers: MeshBuffers, node_hash: str) -> str:
+    """Writes viewer mesh buffers as an .npz entry, returns its path."""
+    arrays = {"vertices": buffers.vertices, "triangles": buffers.triangles}
+    if buffers.face_ids is not None: arrays["face_ids"] = buffers.face_ids
+    buffer = io.BytesIO(); np.savez_compressed(buffer, **arrays)
+    path = f"meshes/{node_hash}.npz"
+    zf.writestr(path, buffer.getvalue())
+    return path
+
+def read_result(zf, entry: dict):
+    """Loads one stored output back into the form the node produced (Workplane or Shape)."""
+    shape = cq.Shape.importBrep(io.BytesIO(zf.read(entry["path"])))
+    if entry.get("kind") == "shape": return shape
+    return cq.Workplane("XY").add(list(shape) if entry.get("count", 1) > 1 else shape)
+
+def read_mesh(zf, path: str) -> MeshBuffers:
+    with np.load(io.BytesIO(zf.read(path))) as arrays:
+        return MeshBuffers(arrays["vertices"], arrays["triangles"], arrays["face_ids"] if "face_ids" in arrays else None)
+
+# --- Оператор Экспорта ---
+class CQP_OT_ExportBundle(bpy.types.Operator, ExportHelper):
+    """Export the active CadQuery Node Tree with its computed results (.cqpz bundle)"""
+    bl_idname = "cqp.export_bundle"
+    bl_label = "Export CadQuery Bundle"
+    bl_options = {'PRESET'}
+
+    filename_ext = ".cqpz"
+    filter_glob: StringProperty(default="*.cqpz", options={'HIDDEN'})
+    results: EnumProperty(items=BUNDLE_RESULTS, name="Results", default='SINKS')
+    include_meshes: BoolProperty(name="Viewer Meshes", default=True, description="Store the tessellated viewer meshes")
+
+    @classmethod
+    def poll(cls, context):
+        space = context.space_data
+        return (space and space.type == 'NODE_EDITOR' and
+                space.node_tree and isinstance(space.node_tree, CadQueryNodeTree))
+
+    def execute(self, context):
+        node_tree = context.space_data.node_tree
+        logger.info(f"Exporting bundle of '{node_tree.name}' to {self.filepath}")
+        start_time = time.perf_counter()
+        try:
+            tree_data = tree_to_dict_v2(node_tree)
+            hashes = structural_hashes(tree_data)
+            manifest = {"format": BUNDLE_FORMAT, "version": BUNDLE_VERSION, "results": {}, "meshes": {}}
+
+            with zipfile.ZipFile(self.filepath, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(TREE_ENTRY, json.dumps(tree_data, separators=(',', ':'), ensure_ascii=False))
+                if self.results != 'NONE':
+                    for node in bundle_candidates(node_tree, self.results == 'SELECTED'):
+                        node_hash = hashes.get(node.name)
+                        if not node_hash or node_hash in manifest["results"] or node_hash in manifest["meshes"]: continue
+                        try:
+                            entry = write_node_results(zf, node, node_hash)
+                            if entry: manifest["results"][node_hash] = entry
+                            if self.include_meshes and hasattr(node, "export_buffers"):
+                                buffers = node.export_buffers()
+                                if buffers is not None and buffers.triangle_count:
+                                    manifest["meshes"][node_hash] = write_mesh(zf, buffers, node_hash)
+                        except Exception as e_node: logger.warning(f"Results of node '{node.name}' not stored: {e_node}")
+                zf.writestr(MANIFEST_ENTRY, json.dumps(manifest, separators=(',', ':')))
+
+            logger.info(f"Bundle exported in {time.perf_counter() - start_time:.4f}s: "
+                        f"{len(manifest['results'])} result(s), {len(manifest['meshes'])} mesh(es).")
+            self.report({'INFO'}, f"Exported bundle to {self.filepath}")
+        except Exception as e:
+            logger.error(f"Bundle export failed: {e}", exc_info=True)
+            self.report({'ERROR'}, f"Bundle export failed: {e}"); return {'CANCELLED'}
+        return {'FINISHED'}
+
+# --- Оператор Импорта ---
+class CQP_OT_ImportBundle(bpy.types.Operator, ImportHelper):
+    """Import a .cqpz bundle into the active CadQuery Node Tree, reusing its stored results"""
+    bl_idname = "cqp.import_bundle"
+    bl_label = "Import CadQuery Bundle"
+    bl_options = {'PRESET', 'UNDO'}
+
+    filename_ext = ".cqpz"; filter_glob: StringProperty(default="*.cqpz", options={'HIDDEN'})
+    use_results: BoolProperty(name="Use Stored Results", default=True, description="Install stored results instead of recomputing them")
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.type == 'NODE_EDITOR'
+
+    def execute(self, context):
+        from ...core.update_system import update_manager
+
+        target_tree = context.space_data.node_tree
+        if not target_tree or not isinstance(target_tree, CadQueryNodeTree):
+            self.report({'WARNING'}, "No active CadQuery Node Tree."); return {'CANCELLED'}
+
+        logger.info(f"Importing bundle {self.filepath} into tree '{target_tree.name}'")
+        start_time = time.perf_counter()
+        try:
+            with zipfile.ZipFile(self.filepath, 'r') as zf:
+                manifest = json.loads(zf.read(MANIFEST_ENTRY))
+                if manifest.get("format") != BUNDLE_FORMAT or manifest.get("version", 0) > BUNDLE_VERSION:
+                    self.report({'ERROR'}, "Not a supported .cqpz bundle."); return {'CANCELLED'}
+                tree_data = json.loads(zf.read(TREE_ENTRY))
+                created_nodes_map = import_tree_data(target_tree, tree_data, Vector((0.0, 0.0)))
+
+                # --- Установка результатов по структурному хешу ---
+                installed = []
+                if self.use_results:
+                    hashes = structural_hashes(tree_data)
+                    for json_name, node in created_nodes_map.items():
+                        node_hash = hashes.get(json_name)
+                        entry = manifest["results"].get(node_hash, {}); mesh_path = manifest["meshes"].get(node_hash)
+                        if not entry and not mesh_path: continue
+                        # Пропускать можно, только если есть данные каждого подключенного выхода
+                        if any(s.is_linked and s.name not in entry for s in node.outputs): continue
+                        try:
+                            for socket_name, socket_entry in entry.items():
+                                socket = node.outputs.get(socket_name)
+                                if socket: socket.sv_set(read_result(zf, socket_entry))
+                            if mesh_path and hasattr(node, "install_buffers"): node.install_buffers(read_mesh(zf, mesh_path))
+                            installed.append(node.name)
+                        except Exception as e_node: logger.warning(f"Stored results of node '{node.name}' not used: {e_node}")
+                    update_manager.skip_nodes_once(target_tree, installed)
+
+            logger.info(f"Imported {len(created_nodes_map)} nodes ({len(installed)} with stored results) "
+                        f"in {time.perf_counter() - start_time:.4f}s.")
+            if target_tree.sv_process: update_manager.request_update(target_tree)
+            self.report({'INFO'}, f"Imported bundle into tree '{target_tree.name}'")
+        except Exception as e:
+            logger.error(f"Bundle import failed: {e}", exc_info=True)
+            self.report({'ERROR'}, f"Bundle import failed: {e}"); return {'CANCELLED'}
+        return {'FINISHED'}
+
+
+# --- Регистрация ---
+classes = (
+    CQP_OT_ExportBundle,
+    CQP_OT_ImportBundle,
+)
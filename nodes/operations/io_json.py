@@ -2,6 +2,7 @@
 import bpy
 import json
 import logging
+import time
 from mathutils import Vector, Color, Euler, Quaternion # Импорт нужен и для экспорта, и для импорта
 from bpy.props import StringProperty, BoolProperty
 from bpy_extras.io_utils import ExportHelper, ImportHelper
@@ -50,10 +51,10 @@ def node_to_dict_v2(node: CadQueryNode) -> dict:
         "properties": {},
     }
 
-    try:
-        cls_annotations = node.__class__.__annotations__
-    except AttributeError:
-        cls_annotations = {}
+    # Аннотации всего MRO: свойства из миксинов (например, BooleanOptionsMixin) тоже сохраняются
+    cls_annotations = {}
+    for cls in reversed(node.__class__.__mro__):
+        cls_annotations.update(cls.__dict__.get('__annotations__', {}))
 
     for prop_id, prop_obj in cls_annotations.items():
         is_bpy_prop = False
@@ -168,6 +169,107 @@ class CQP_OT_ExportJsonV2(bpy.types.Operator, ExportHelper):
         return {'FINISHED'}
 
 
+# --- Массовый импорт ---
+# bl_idname -> {"props": {prop_id}, "sockets": {prop_id: индекс входа с таким prop_name}}
+# Только идентификаторы: объекты bl_rna не переживают перезагрузку аддона
+_class_schemas: dict[str, dict] = {}
+
+def get_class_schema(node) -> dict:
+    """Property/socket schema of a node class, built once from its first instance."""
+    schema = _class_schemas.get(node.bl_idname)
+    if schema is None:
+        props = {p.identifier for p in node.bl_rna.properties if not p.is_readonly}
+        sockets = {}
+        for index, input_socket in enumerate(node.inputs):
+            prop_name = getattr(input_socket, 'prop_name', None)
+            if prop_name and prop_name not in sockets: sockets[prop_name] = index
+        schema = _class_schemas[node.bl_idname] = {"props": props, "sockets": sockets}
+    return schema
+
+def sync_socket_value(socket, prop_id, value):
+    """Writes a node property value (already coerced by the node) into the UI default of its input socket."""
+    if not hasattr(socket, 'default_property'): return
+    # Преобразуем в tuple для свойств сокета типа Vector/Color и т.д.
+    if isinstance(value, (Vector, Color, Euler, Quaternion, bpy.types.bpy_prop_array)): value = tuple(value)
+    # ID-свойство другого типа Blender отбрасывает: int из JSON на Float-сокете -> float
+    if isinstance(socket.default_property, float) and isinstance(value, int) and not isinstance(value, bool): value = float(value)
+    # Проверка типа перед присваиванием сокету (избегаем ошибок)
+    if isinstance(socket.default_property, bpy.types.bpy_prop_array) and not isinstance(value, (list, tuple)):
+        logger.warning(f"      Type mismatch for socket UI sync: node prop '{prop_id}', socket '{socket.name}'. Skipping socket update.")
+        return
+    # Запись через ID-свойство - без колбэка socket_value_update
+    try: socket["default_property"] = value
+    except Exception as e: logger.warning(f"      Failed to sync UI for socket linked to '{prop_id}': {e}")
+
+def import_tree_data(target_tree, tree_data: dict, offset=None) -> dict:
+    """Adds the nodes and links of a V2 tree dict to `target_tree` in one bulk pass.
+
+    Events are suspended for the whole import; the dependency graph is built once at the
+    end. Returns {json node name: created node}.
+    """
+    from ...core.event_system import suspend_events
+    from ...core.update_system import update_manager
+
+    if offset is None: offset = Vector((0.0, 0.0))
+    nodes_data = tree_data.get("nodes", []); links_data = tree_data.get("links", [])
+    created_nodes_map = {} # {json_name: actual_node}
+    used_names = set(target_tree.nodes.keys())
+
+    with suspend_events():
+        target_tree["_is_importing"] = True
+        try:
+            # --- Создание нод ---
+            logger.debug(f"Importing {len(nodes_data)} nodes...")
+            for node_data in nodes_data:
+                node_idname = node_data.get("bl_idname"); original_name = node_data.get("name")
+                if not node_idname or not original_name: continue
+
+                try:
+                    new_node = target_tree.nodes.new(type=node_idname)
+                    # Генерация уникального имени
+                    new_node_name = original_name; count = 1
+                    while new_node_name in used_names: new_node_name = f"{original_name}.{count:03d}"; count += 1
+                    new_node.name = new_node_name; used_names.add(new_node.name)
+
+                    new_node.label = node_data.get("label", ""); loc = node_data.get("location")
+                    new_node.location = Vector(loc) + offset if loc else offset
+                    new_node.width = node_data.get("width", new_node.width); new_node.height = node_data.get("height", new_node.height)
+                    new_node.hide = node_data.get("hide", False); new_node.mute = node_data.get("mute", False)
+
+                    # --- Свойства ноды и UI сокетов по схеме класса ---
+                    schema = get_class_schema(new_node)
+                    for prop_id, value_data in node_data.get("properties", {}).items():
+                        if prop_id not in schema["props"]: continue
+                        try:
+                            final_value = get_value_from_dict(value_data) # Преобразуем из JSON
+                            setattr(new_node, prop_id, final_value) # process_node пропускается (_is_importing)
+                            socket_index = schema["sockets"].get(prop_id)
+                            if socket_index is not None and socket_index < len(new_node.inputs):
+                                sync_socket_value(new_node.inputs[socket_index], prop_id, getattr(new_node, prop_id))
+                        except Exception as e_prop: logger.error(f"    Failed to set property '{prop_id}' on node '{new_node_name}': {e_prop}", exc_info=True)
+                    created_nodes_map[original_name] = new_node # Используем оригинальное имя как ключ
+
+                except Exception as e_node: logger.error(f"Error creating node '{original_name}': {e_node}", exc_info=True)
+
+            # --- Создание связей ---
+            logger.debug(f"Creating {len(links_data)} links...")
+            for link_data in links_data:
+                from_node = created_nodes_map.get(link_data.get("from_node")) # Ищем по оригинальному имени
+                to_node = created_nodes_map.get(link_data.get("to_node"))
+                if not from_node or not to_node: continue
+                from_socket = from_node.outputs.get(link_data.get("from_socket") or "")
+                to_socket = to_node.inputs.get(link_data.get("to_socket") or "")
+                if not from_socket or not to_socket: continue
+                try: target_tree.links.new(from_socket, to_socket)
+                except Exception as e_link: logger.error(f"Failed to create link: {e_link}")
+        finally:
+            if "_is_importing" in target_tree: del target_tree["_is_importing"]
+
+    # --- Один раз строим граф и помечаем дерево к пересчету ---
+    update_manager.rebuild_tree(target_tree)
+    return created_nodes_map
+
+
 # --- Оператор Импорта (V2, с добавлением и синхронизацией UI сокета) ---
 class CQP_OT_ImportJsonV2(bpy.types.Operator, ImportHelper):
     """Import and add nodes from a JSON file to the active CadQuery Node Tree (V2 Format)"""
@@ -194,15 +296,10 @@ class CQP_OT_ImportJsonV2(bpy.types.Operator, ImportHelper):
             if tree_data.get("bl_idname") != CadQueryNodeTree.bl_idname: logger.warning(f"JSON may be for different tree type ({tree_data.get('bl_idname')}).")
         except Exception as e: logger.error(f"Error reading file: {e}", exc_info=True); self.report({'ERROR'}, f"Error reading file: {e}"); return {'CANCELLED'}
 
-        nodes_data = tree_data.get("nodes", []); links_data = tree_data.get("links", [])
+        nodes_data = tree_data.get("nodes", [])
         if not nodes_data: self.report({'WARNING'}, "JSON has no node data."); return {'CANCELLED'}
 
         try:
-            # --- Устанавливаем флаг импорта и отключаем обновление ---
-            target_tree["_is_importing"] = True; logger.debug("Set _is_importing flag.")
-            was_processing = target_tree.sv_process; target_tree.sv_process = False; logger.debug("Disabled tree processing.")
-            # -------------------------------------------------------
-
             # --- Определяем смещение ---
             offset = Vector((0.0, 0.0))
             if self.offset_nodes and hasattr(context, "cursor_location"):
@@ -213,98 +310,19 @@ class CQP_OT_ImportJsonV2(bpy.types.Operator, ImportHelper):
                  if valid_locs > 0: avg_loc /= valid_locs; offset -= avg_loc
             # ---------------------------
 
-            created_nodes_map = {} # {json_name: actual_node}
-            # --- Создание нод ---
-            logger.debug(f"Importing {len(nodes_data)} nodes...")
-            for node_data in nodes_data:
-                node_idname = node_data.get("bl_idname"); original_name = node_data.get("name")
-                if not node_idname or not original_name: continue
-
-                try:
-                    new_node = target_tree.nodes.new(type=node_idname)
-                    # Генерация уникального имени
-                    new_node_name = original_name; count = 1
-                    while new_node_name in target_tree.nodes: new_node_name = f"{original_name}.{count:03d}"; count += 1
-                    new_node.name = new_node_name
-
-                    new_node.label = node_data.get("label", ""); loc = node_data.get("location")
-                    new_node.location = Vector(loc) + offset if loc else offset
-                    new_node.width = node_data.get("width", new_node.width); new_node.height = node_data.get("height", new_node.height)
-                    new_node.hide = node_data.get("hide", False); new_node.mute = node_data.get("mute", False)
-
-                    # --- Устанавливаем свойства ноды и синхронизируем UI сокета ---
-                    logger.debug(f"  Setting properties for node '{new_node_name}' (original: '{original_name}')")
-                    for prop_id, value_data in node_data.get("properties", {}).items():
-                        if hasattr(new_node, prop_id):
-                            try:
-                                final_value = get_value_from_dict(value_data) # Преобразуем из JSON
-                                setattr(new_node, prop_id, final_value) # Устанавливаем свойство ноды
-                                # logger.debug(f"    Set node prop {prop_id} = {final_value}")
-
-                                # Ищем сокет и синхронизируем его default_property для UI
-                                corresponding_socket = None
-                                for input_socket in new_node.inputs:
-                                    sock_prop_name = getattr(input_socket, 'prop_name', None)
-                                    if sock_prop_name == prop_id: corresponding_socket = input_socket; break
-
-                                if corresponding_socket and hasattr(corresponding_socket, 'default_property'):
-                                    try:
-                                        # Используем final_value, которое уже преобразовано
-                                        socket_value_to_set = final_value
-                                        # Преобразуем в tuple для свойств сокета типа Vector/Color и т.д.
-                                        if isinstance(final_value, (Vector, Color, Euler, Quaternion)):
-                                            socket_value_to_set = tuple(final_value)
-
-                                        # Проверка типа перед присваиванием сокету (избегаем ошибок)
-                                        socket_prop = getattr(corresponding_socket, 'default_property', None)
-                                        if isinstance(socket_prop, bpy.types.bpy_prop_array) and not isinstance(socket_value_to_set, (list, tuple)):
-                                             logger.warning(f"      Type mismatch for socket UI sync: node prop '{prop_id}', socket '{corresponding_socket.name}'. Skipping socket update.")
-                                        else:
-                                             corresponding_socket.default_property = socket_value_to_set
-                                             # logger.debug(f"      Synced socket '{corresponding_socket.name}' UI to: {socket_value_to_set}")
-                                    except Exception as e_sock_set: logger.warning(f"      Failed to sync UI for socket linked to '{prop_id}': {e_sock_set}")
-
-                            except Exception as e_prop: logger.error(f"    Failed to set property '{prop_id}' on node '{new_node_name}': {e_prop}", exc_info=True)
-                        # else: logger.warning(f"    Property '{prop_id}' not found on new node '{new_node_name}'.")
-                    # -------------------------------------------------------------
-                    created_nodes_map[original_name] = new_node # Используем оригинальное имя как ключ
-
-                except Exception as e_node: logger.error(f"Error creating node '{original_name}': {e_node}", exc_info=True)
-
-            # --- Создание связей ---
-            logger.debug(f"Creating {len(links_data)} links...")
-            for link_data in links_data:
-                from_node_name = link_data.get("from_node"); from_sock_name = link_data.get("from_socket")
-                to_node_name = link_data.get("to_node"); to_sock_name = link_data.get("to_socket")
-                if not all([from_node_name, from_sock_name, to_node_name, to_sock_name]): continue
-
-                from_node = created_nodes_map.get(from_node_name) # Ищем по оригинальному имени
-                to_node = created_nodes_map.get(to_node_name)     # Ищем по оригинальному имени
-                if not from_node or not to_node: continue
-
-                from_socket = from_node.outputs.get(from_sock_name); to_socket = to_node.inputs.get(to_sock_name)
-                if not from_socket or not to_socket: continue
-
-                try: target_tree.links.new(from_socket, to_socket)
-                except Exception as e_link: logger.error(f"Failed to create link: {e_link}")
-
-            # --- Восстанавливаем состояние обновления ---
-            if "_is_importing" in target_tree: del target_tree["_is_importing"]; logger.debug("Removed _is_importing flag.")
-            target_tree.sv_process = was_processing; logger.debug(f"Restored sv_process: {was_processing}")
-            # -------------------------------------------
+            start_time = time.perf_counter()
+            created_nodes_map = import_tree_data(target_tree, tree_data, offset)
+            logger.info(f"Imported {len(created_nodes_map)} nodes in {time.perf_counter() - start_time:.4f}s.")
 
             if target_tree.sv_process:
                 from ...core.update_system import update_manager
                 logger.info(f"Requesting update for tree '{target_tree.name}' after import")
-                state = update_manager.get_tree_state(target_tree)
-                state.mark_all_dirty()
                 update_manager.request_update(target_tree)
 
             logger.info(f"Import successful into tree '{target_tree.name}'.")
             self.report({'INFO'}, f"Imported nodes into tree '{target_tree.name}'")
 
         except Exception as e:
-            if target_tree and "_is_importing" in target_tree: del target_tree["_is_importing"]
             logger.error(f"Import failed: {e}", exc_info=True)
             self.report({'ERROR'}, f"Import failed: {e}")
             # Не удаляем ноды, так как добавляли в существующее дерево
@@ -0,0 +1,109 @@
+# cadquery_parametric_addon/operators/pick_face.py
+import bpy
+from bpy.props import StringProperty
+from bpy_extras import view3d_utils
+import logging
+
+from ...core.constants import FACE_ID_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+# bl_idname ноды Select Face (без импорта модуля ноды)
+SELECT_FACE_IDNAME = 'CQPNode_SelectorSelectFaceNode'
+
+
+class CQP_OT_PickFace(bpy.types.Operator):
+    """Click a polygon of the CQ Viewer object in the 3D View to get its CadQuery face index.
+
+    The index is read from the `cq_face_id` polygon attribute. If the viewer's
+    Highlight input comes from a Select Face node, its index is set as well.
+    """
+    bl_idname = "cqp.pick_face"
+    bl_label = "Pick Face"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    node_path: StringProperty(name="Node Path", description="Path to the CQ Viewer node")
+
+    def get_viewer(self):
+        tree_name, node_name = self.node_path.split('/')
+        return bpy.data.node_groups[tree_name].nodes[node_name]
+
+    def invoke(self, context, event):
+        try:
+            node = self.get_viewer()
+            obj = bpy.data.objects.get(node.target_object_name)
+            if not obj or obj.type != 'MESH' or FACE_ID_ATTRIBUTE not in obj.data.attributes:
+                raise LookupError("viewer has no mesh with face ids")
+        except (ValueError, KeyError, LookupError) as e:
+            self.report({'ERROR'}, f"Cannot pick face: {e}"); return {'CANCELLED'}
+
+        context.window_manager.modal_handler_add(self)
+        context.workspace.status_text_set("Pick Face: click a face in the 3D View, Esc/Right click to cancel")
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context, result):
+        context.workspace.status_text_set(None)
+        return result
+
+    def modal(self, context, event):
+        if event.type in {'ESC', 'RIGHTMOUSE'}: return self.finish(context, {'CANCELLED'})
+        if event.type != 'LEFTMOUSE' or event.value != 'PRESS': return {'PASS_THROUGH'}
+
+        # --- Ищем 3D View под курсором (оператор запускается из редактора нод) ---
+        hit = None
+        for area in context.window.screen.areas:
+            if area.type != 'VIEW_3D': continue
+            for region in area.regions:
+                if region.type == 'WINDOW' and region.x <= event.mouse_x < region.x + region.width \
+                        and region.y <= event.mouse_y < region.y + region.height:
+                    hit = (region, area.spaces.active.region_3d)
+        if hit is None: return {'PASS_THROUGH'} # Клик не в 3D View
+
+        region, rv3d = hit
+        coord = (event.mouse_x - region.x, event.mouse_y - region.y)
+        try:
+            node = self.get_viewer()
+            face_id = self.pick(context, node, region, rv3d, coord)
+        except (ValueError, KeyError) as e:
+            self.report({'ERROR'}, f"Cannot pick face: {e}"); return self.finish(context, {'CANCELLED'})
+        if face_id is None:
+            self.report({'WARNING'}, "No viewer face under the cursor."); return {'RUNNING_MODAL'}
+
+        self.report({'INFO'}, f"Face index: {face_id}")
+        # --- Передаем индекс в Select Face, подключенную к Highlight ---
+        socket_hl = node.inputs.get("Highlight")
+        if socket_hl and socket_hl.is_linked:
+            src = socket_hl.links[0].from_node
+            if src.bl_idname == SELECT_FACE_IDNAME: src.index_ = face_id
+        return self.finish(context, {'FINISHED'})
+
+    def pick(self, context, node, region, rv3d, coord):
+        """Ray-casts the viewer object and returns the face id of the hit polygon (or None)."""
+        obj = bpy.data.objects.get(node.target_object_name)
+        if not obj or obj.type != 'MESH': return None
+        origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+        direction = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
+        inv = obj.matrix_world.inverted()
+        local_origin = inv @ origin
+        local_dir = (inv.to_3x3() @ direction).normalized()
+        hit, _loc, _normal, poly_index = obj.ray_cast(local_origin, local_dir)
+        if not hit or poly_index < 0: return None
+        attr = obj.data.attributes.get(FACE_ID_ATTRIBUTE)
+        if attr is None or poly_index >= len(attr.data): return None
+        return attr.data[poly_index].value # Прямое чтение атрибута - O(1)
+
+
+# --- Регистрация ---
+classes = (
+    CQP_OT_PickFace,
+)
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes: register_class(cls)
+
+def unregister():
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        try: unregister_class(cls)
+        except RuntimeError: print(f"Warning: Could not unregister operator class {cls.__name__}")
@@ -4,10 +4,16 @@ from bpy.props import StringProperty, EnumProperty, FloatProperty
 import logging
 import math
 
+from ...utils.blender_utils import post_process_mesh
+
 logger = logging.getLogger(__name__)
 
 class CQP_OT_ProcessMeshOp(bpy.types.Operator):
-    """Applies mesh processing operations to the CQ Viewer output object."""
+    """Applies a one-off mesh processing operation to the CQ Viewer output object.
+
+    The viewer's own post-processing options are re-applied on every update;
+    this operator only changes the current mesh.
+    """
     bl_idname = "cqp.process_mesh_op"
     bl_label = "Process Viewer Mesh"
     bl_options = {'REGISTER', 'UNDO'}
@@ -21,12 +27,11 @@ class CQP_OT_ProcessMeshOp(bpy.types.Operator):
     )
     # Опции для операций (можно добавить как свойства оператора)
     merge_distance: FloatProperty(name="Merge Distance", default=0.001, min=0.0, subtype='DISTANCE')
-    quad_face_angle: FloatProperty(name="Max Face Angle", default=45.0, min=0.0, max=180.0, subtype='ANGLE')
-    quad_shape_angle: FloatProperty(name="Max Shape Angle", default=45.0, min=0.0, max=180.0, subtype='ANGLE')
+    quad_face_angle: FloatProperty(name="Max Angle", default=math.radians(45.0), min=0.0, max=math.pi, subtype='ANGLE')
 
     @classmethod
     def poll(cls, context):
-        # Проверяем, что мы в объектном режиме (операторы редактирования требуют этого)
+        # В режиме редактирования данные меша не синхронизированы с bmesh
         return context.mode == 'OBJECT'
 
     def invoke(self, context, event):
@@ -44,7 +49,6 @@ class CQP_OT_ProcessMeshOp(bpy.types.Operator):
              layout.prop(self, "merge_distance")
         elif self.operation == 'QUADS':
              layout.prop(self, "quad_face_angle")
-             layout.prop(self, "quad_shape_angle")
 
 
     def execute(self, context):
@@ -65,55 +69,19 @@ class CQP_OT_ProcessMeshOp(bpy.types.Operator):
         except (ValueError, KeyError, LookupError, TypeError, AttributeError) as e:
             self.report({'ERROR'}, f"Cannot find target node or object: {e}"); return {'CANCELLED'}
 
-        # --- Выполняем операцию ---
+        # --- Выполняем операцию (bmesh в памяти, без смены режима и выделения) ---
         logger.info(f"Applying '{self.operation}' to object '{obj.name}'...")
-        # Запоминаем активный объект и режим
-        current_active = context.view_layer.objects.active
-        current_mode = context.object.mode if context.object else 'OBJECT'
-        selected_objects = context.selected_objects[:]
-
         try:
-            # Переключаемся в объектный режим и делаем объект активным/выделенным
-            if current_mode != 'OBJECT': bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.select_all(action='DESELECT')
-            context.view_layer.objects.active = obj
-            obj.select_set(True)
-
-            # Вызов оператора редактирования
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='SELECT') # Выделяем все в меше
-
             if self.operation == 'MERGE':
-                bpy.ops.mesh.remove_doubles(threshold=self.merge_distance)
-                self.report({'INFO'}, f"Applied Merge by Distance (Threshold: {self.merge_distance:.4f})")
+                timings = post_process_mesh(obj.data, merge_distance=self.merge_distance)
+                self.report({'INFO'}, f"Applied Merge by Distance (Threshold: {self.merge_distance:.4f}, {timings[0][1]:.3f}s)")
             elif self.operation == 'QUADS':
-                # bpy.ops.mesh.tris_convert_to_quads() # Старый оператор
-                bpy.ops.mesh.beautify_fill(angle_limit=math.radians(self.quad_shape_angle)) # Попробуем этот
-                self.report({'INFO'}, f"Applied Tris to Quads (Beautify Fill)")
-
-            bpy.ops.mesh.select_all(action='DESELECT')
-            bpy.ops.object.mode_set(mode='OBJECT') # Возвращаемся в объектный режим
-
+                timings = post_process_mesh(obj.data, quads_angle=self.quad_face_angle)
+                self.report({'INFO'}, f"Applied Tris to Quads ({timings[0][1]:.3f}s)")
         except Exception as e:
             logger.error(f"Operation '{self.operation}' failed: {e}", exc_info=True)
             self.report({'ERROR'}, f"Operation '{self.operation}' failed: {e}")
-            # Пытаемся вернуться в исходный режим
-            try: bpy.ops.object.mode_set(mode=current_mode)
-            except: pass
             return {'CANCELLED'}
-        finally:
-            # Восстанавливаем выделение и активный объект
-            bpy.ops.object.select_all(action='DESELECT')
-            for sel_obj in selected_objects:
-                 if sel_obj and sel_obj.name in context.view_layer.objects: # Проверяем существование
-                      sel_obj.select_set(True)
-            if current_active and current_active.name in context.view_layer.objects:
-                 context.view_layer.objects.active = current_active
-            # Возвращаемся в исходный режим, если не вернулись в try
-            if context.object and context.object.mode != current_mode:
-                 try: bpy.ops.object.mode_set(mode=current_mode)
-                 except: pass
-
 
         return {'FINISHED'}
 
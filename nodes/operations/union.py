@@ -1,16 +1,18 @@
 # cadquery_parametric_addon/nodes/operations/union.py
 import bpy
 import logging
+import time
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket
 from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
 from ...dependencies import cq # Нужен для проверки типов
 
 logger = logging.getLogger(__name__)
 
-class UnionNode(CadQueryNode):
+class UnionNode(BooleanOptionsMixin, CadQueryNode):
     """Performs a boolean union of two CadQuery objects (A + B)."""
     bl_idname = 'CQPNode_OperationUnionNode'
     bl_label = 'Union (Boolean)'
@@ -24,6 +26,7 @@ class UnionNode(CadQueryNode):
 
     def draw_buttons(self, context, layout):
          super().draw_buttons(context, layout) # Ошибки
+         self.draw_boolean_options(layout)
 
     def process(self):
         """Node's core logic."""
@@ -67,7 +70,9 @@ class UnionNode(CadQueryNode):
         # Выполняем операцию 'union' через менеджер
         try:
             # Передаем подготовленные obj_a (Workplane) и obj_b (Workplane/Shape)
-            result_obj = cad_manager.execute_operation(obj_a, obj_b, "union")
+            options = self.boolean_options(); t0 = time.perf_counter()
+            result_obj = cad_manager.execute_operation(obj_a, obj_b, "union", options)
+            self.record_boolean_profile(options, time.perf_counter() - t0)
             # execute_operation должен вернуть Workplane
             if not isinstance(result_obj, cq.Workplane):
                  logger.error(f"UnionNode '{self.name}': cad_manager.execute_operation did not return a Workplane for 'union' (got {type(result_obj)}).")
@@ -0,0 +1,69 @@
+# cadquery_parametric_addon/nodes/operations/union_multi.py
+import bpy
+from bpy.props import BoolProperty
+import logging
+import time
+
+from ...core.node_tree import CadQueryNode
+from ...core.sockets import CQObjectSocket
+from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
+from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...dependencies import cq
+
+logger = logging.getLogger(__name__)
+
+class UnionMultiNode(BooleanOptionsMixin, CadQueryNode):
+    """Fuses any number of CadQuery objects in a single multi-argument Boolean."""
+    bl_idname = 'CQPNode_OperationUnionMultiNode'
+    bl_label = 'Union (Multi)'
+    sv_category = 'Operations'
+
+    # --- Свойства ---
+    clean_: BoolProperty( name="Clean", default=True, description="Merge coplanar faces and collinear edges after the fuse", update=CadQueryNode.process_node )
+
+    # --- Инициализация ---
+    def sv_init(self, context):
+        # Мульти-вход: сколько угодно объектов (Workplane, Shape или списки)
+        self.inputs.new(CQObjectSocket.bl_idname, "Objects", use_multi_input=True)
+        self.outputs.new(CQObjectSocket.bl_idname, "Result")
+
+    # --- UI ---
+    def draw_buttons(self, context, layout):
+        super().draw_buttons(context, layout) # Ошибки
+        layout.prop(self, "clean_")
+        self.draw_boolean_options(layout)
+
+    # --- Обработка ---
+    def process(self):
+        socket_in = self.inputs["Objects"]
+        out_socket = self.outputs["Result"]
+        out_socket.sv_set(None)
+
+        if not socket_in.is_linked:
+            raise SocketConnectionError(self, "At least one object must be connected")
+
+        try:
+            shapes = cad_manager.shapes_of(socket_in.sv_get_all())
+            if not shapes: raise NodeProcessingError(self, "No shapes on the inputs")
+            invalid = [i for i, s in enumerate(shapes) if not s.isValid()]
+            if invalid: raise NodeProcessingError(self, f"Invalid input shape(s) at position(s): {invalid}")
+
+            # Один BRepAlgoAPI_Fuse: первый Shape - аргумент, остальные - инструменты
+            options = self.boolean_options(); t0 = time.perf_counter()
+            result_shape = cad_manager.fuse_shapes(shapes, clean=self.clean_, options=options)
+            self.record_boolean_profile(options, time.perf_counter() - t0)
+            logger.debug(f"UnionMultiNode '{self.name}': fused {len(shapes)} shapes in {time.perf_counter() - t0:.4f}s")
+
+            out_socket.sv_set(cq.Workplane("XY").add(result_shape))
+
+        except Exception as e:
+            out_socket.sv_set(None)
+            if isinstance(e, (NodeProcessingError, SocketConnectionError)): raise
+            logger.error(f"Error during union operation in node '{self.name}': {e}", exc_info=True)
+            raise NodeProcessingError(self, f"Union operation failed: {e}")
+
+# --- Список классов ---
+classes = (
+    UnionMultiNode,
+)
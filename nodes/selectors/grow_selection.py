@@ -0,0 +1,92 @@
+# cadquery_parametric_addon/nodes/selectors/grow_selection.py
+import bpy
+from bpy.props import EnumProperty, FloatProperty, IntProperty
+import logging
+import math
+import time
+
+from ...core.node_tree import CadQueryNode
+from ...core.sockets import CQObjectSocket, CQSelectorSocket
+from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import get_topology_index, input_shape, make_selection, resolve_selection
+
+logger = logging.getLogger(__name__)
+
+GROW_MODES = [
+    ('TANGENT_EDGES', "Tangent Edges", "Edges continuing the seed edges tangentially (e.g. a rounded rim)"),
+    ('SMOOTH_FACES', "Smooth Faces", "Faces meeting the region at a dihedral angle within the limit"),
+    ('SAME_TYPE_FACES', "Same Surface Type", "Connected faces with the same surface type as their neighbour"),
+]
+
+
+class GrowSelectionNode(CadQueryNode):
+    """Grows a selection of seed edges or faces across the shape's adjacency graph."""
+    bl_idname = 'CQPNode_SelectorGrowSelectionNode'
+    bl_label = 'Grow Selection'
+    sv_category = 'Selectors'
+
+    # --- Свойства ---
+    mode_: EnumProperty( items=GROW_MODES, name="Mode", default='TANGENT_EDGES', update=CadQueryNode.process_node )
+    angle_: FloatProperty( name="Angle", default=math.radians(1.0), min=0.0, max=math.pi, subtype='ANGLE', description="Maximum tangent / normal deviation between neighbours", update=CadQueryNode.process_node )
+    max_depth_: IntProperty( name="Max Steps", default=0, min=0, description="Maximum number of growth steps (0 = unlimited)", update=CadQueryNode.process_node )
+
+    # --- Инициализация ---
+    def sv_init(self, context):
+        self.inputs.new(CQObjectSocket.bl_idname, "Object In")
+        self.inputs.new(CQSelectorSocket.bl_idname, "Seeds") # SelectionRef, cq.Edge/Face или список
+        self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
+        self.outputs.new(CQSelectorSocket.bl_idname, "Selected") # SelectionRef на ребра / грани
+
+    # --- UI ---
+    def draw_buttons(self, context, layout):
+        super().draw_buttons(context, layout)
+        layout.prop(self, "mode_", text="")
+        row = layout.row(align=True)
+        if self.mode_ != 'SAME_TYPE_FACES': row.prop(self, "angle_")
+        row.prop(self, "max_depth_", text="Steps")
+
+    # --- Обработка ---
+    def process(self):
+        socket_obj = self.inputs["Object In"]; socket_seeds = self.inputs["Seeds"]
+        out_obj_socket = self.outputs["Object Out"]; out_sel_socket = self.outputs["Selected"]
+        out_sel_socket.sv_set(None)
+
+        try:
+            if not socket_obj.is_linked: raise SocketConnectionError(self, "'Object In' must be connected")
+            if not socket_seeds.is_linked: raise SocketConnectionError(self, "'Seeds' must be connected")
+            obj_in = socket_obj.sv_get(); seeds_in = socket_seeds.sv_get()
+            if obj_in is None: raise NodeProcessingError(self, "Input object is None")
+            shape = input_shape(obj_in)
+            if shape is None: raise NodeProcessingError(self, f"Unsupported input type: {type(obj_in)}")
+
+            kind = 'EDGE' if self.mode_ == 'TANGENT_EDGES' else 'FACE'
+            topology = get_topology_index(shape)
+            seeds = {topology.index_of(s) for s in resolve_selection(seeds_in, shape, kind)}
+            seeds.discard(-1)
+            if not seeds:
+                raise NodeProcessingError(self, f"No seed {kind.lower()}s of the input shape in 'Seeds'")
+
+            t0 = time.perf_counter()
+            if self.mode_ == 'TANGENT_EDGES':
+                indices = topology.grow_tangent_edges(seeds, self.angle_, self.max_depth_)
+            elif self.mode_ == 'SMOOTH_FACES':
+                indices = topology.grow_faces(seeds, max_angle=self.angle_, max_depth=self.max_depth_)
+            else:
+                indices = topology.grow_faces(seeds, same_type=True, max_depth=self.max_depth_)
+            logger.debug(f"Node {self.name}: grew {len(seeds)} -> {len(indices)} {kind.lower()}s "
+                         f"in {time.perf_counter() - t0:.4f}s")
+
+            out_sel_socket.sv_set(make_selection(topology, kind, indices))
+            out_obj_socket.sv_set(obj_in)
+
+        except Exception as e:
+            out_sel_socket.sv_set(None); out_obj_socket.sv_set(None)
+            if isinstance(e, (NodeProcessingError, SocketConnectionError)): raise
+            logger.error(f"Error in GrowSelectionNode '{self.name}': {e}", exc_info=True)
+            raise NodeProcessingError(self, f"Processing failed: {e}")
+
+
+# --- Регистрация ---
+classes = (
+    GrowSelectionNode,
+)
@@ -0,0 +1,144 @@
+# cadquery_parametric_addon/nodes/selectors/select_by_properties.py
+import bpy
+from bpy.props import EnumProperty, BoolProperty, FloatProperty, FloatVectorProperty, IntProperty
+import logging
+import math
+
+import numpy as np
+
+from ...core.node_tree import CadQueryNode
+from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQVectorSocket
+from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import (get_topology_index, input_shape, make_selection,
+                              CURVATURE_FLAT, CURVATURE_ANALYTIC, CURVATURE_FREEFORM)
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_TYPES = [
+    ('EDGE', "Edges", "Select edges"),
+    ('FACE', "Faces", "Select faces"),
+]
+CURVATURE_FILTERS = [
+    ('ANY', "Any", "Do not filter by curvature"),
+    ('FLAT', "Flat", "Lines / planes"),
+    ('ANALYTIC', "Analytic", "Circles, ellipses, cylinders, cones, spheres, tori"),
+    ('FREEFORM', "Freeform", "B-spline, Bezier and other surfaces/curves"),
+]
+_CURVATURE_CODES = {'FLAT': CURVATURE_FLAT, 'ANALYTIC': CURVATURE_ANALYTIC, 'FREEFORM': CURVATURE_FREEFORM}
+
+
+class SelectByPropertiesNode(CadQueryNode):
+    """Selects all edges or faces matching geometric predicates (size, direction, box, nearest)."""
+    bl_idname = 'CQPNode_SelectorSelectByPropertiesNode'
+    bl_label = 'Select By Properties'
+    sv_category = 'Selectors'
+
+    # --- Свойства ---
+    element_type_: EnumProperty( items=ELEMENT_TYPES, name="Elements", default='EDGE', update=CadQueryNode.process_node )
+    curvature_: EnumProperty( items=CURVATURE_FILTERS, name="Curvature", default='ANY', update=CadQueryNode.process_node )
+    use_size_: BoolProperty( name="Size", default=False, description="Filter by edge length / face area", update=CadQueryNode.process_node )
+    size_min_: FloatProperty( name="Min", default=0.0, min=0.0, precision=4, update=CadQueryNode.process_node )
+    size_max_: FloatProperty( name="Max", default=1000.0, min=0.0, precision=4, update=CadQueryNode.process_node )
+    use_direction_: BoolProperty( name="Direction", default=False, description="Filter by edge tangent / face normal", update=CadQueryNode.process_node )
+    direction_: FloatVectorProperty( name="Direction", default=(0.0, 0.0, 1.0), size=3, subtype='DIRECTION', update=CadQueryNode.process_node )
+    angle_: FloatProperty( name="Angle", default=math.radians(1.0), min=0.0, max=math.pi, subtype='ANGLE', description="Maximum deviation from the direction", update=CadQueryNode.process_node )
+    ignore_sign_: BoolProperty( name="Both Senses", default=True, description="Accept the opposite direction as well (edge tangents have no preferred sense)", update=CadQueryNode.process_node )
+    use_box_: BoolProperty( name="In Box", default=False, description="Element centre must lie inside the box", update=CadQueryNode.process_node )
+    box_min_: FloatVectorProperty( name="Box Min", default=(-1.0, -1.0, -1.0), size=3, subtype='XYZ', update=CadQueryNode.process_node )
+    box_max_: FloatVectorProperty( name="Box Max", default=(1.0, 1.0, 1.0), size=3, subtype='XYZ', update=CadQueryNode.process_node )
+    use_nearest_: BoolProperty( name="Nearest", default=False, description="Keep only the k elements whose centres are closest to the point", update=CadQueryNode.process_node )
+    point_: FloatVectorProperty( name="Point", default=(0.0, 0.0, 0.0), size=3, subtype='XYZ', update=CadQueryNode.process_node )
+    nearest_count_: IntProperty( name="Count", default=1, min=1, update=CadQueryNode.process_node )
+
+    # --- Инициализация ---
+    def sv_init(self, context):
+        self.inputs.new(CQObjectSocket.bl_idname, "Object In")
+        self.inputs.new(CQVectorSocket.bl_idname, "Point").prop_name = 'point_'
+        self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
+        self.outputs.new(CQSelectorSocket.bl_idname, "Selected") # SelectionRef на ребра / грани
+
+    # --- UI ---
+    def draw_buttons(self, context, layout):
+        super().draw_buttons(context, layout)
+        row = layout.row(align=True)
+        row.prop(self, "element_type_", expand=True)
+        layout.prop(self, "curvature_", text="")
+        col = layout.column(align=True)
+        col.prop(self, "use_size_", text="Length" if self.element_type_ == 'EDGE' else "Area")
+        if self.use_size_:
+            row = col.row(align=True); row.prop(self, "size_min_"); row.prop(self, "size_max_")
+        col = layout.column(align=True)
+        col.prop(self, "use_direction_", text="Tangent" if self.element_type_ == 'EDGE' else "Normal")
+        if self.use_direction_:
+            col.prop(self, "direction_", text="")
+            row = col.row(align=True); row.prop(self, "angle_"); row.prop(self, "ignore_sign_", text="±")
+        col = layout.column(align=True)
+        col.prop(self, "use_box_")
+        if self.use_box_:
+            col.prop(self, "box_min_", text=""); col.prop(self, "box_max_", text="")
+        row = layout.row(align=True)
+        row.prop(self, "use_nearest_")
+        sub = row.row(align=True); sub.enabled = self.use_nearest_
+        sub.prop(self, "nearest_count_", text="k")
+
+    # --- Предикаты ---
+    def evaluate_mask(self, props: dict, point) -> np.ndarray:
+        """Returns the indices of the elements passing all enabled predicates."""
+        mask = np.ones(len(props['size']), dtype=bool)
+        mask &= props['type'] >= 0 # Вырожденные ребра не выбираются
+        if self.curvature_ != 'ANY':
+            mask &= props['curvature'] == _CURVATURE_CODES[self.curvature_]
+        if self.use_size_:
+            mask &= (props['size'] >= self.size_min_) & (props['size'] <= self.size_max_)
+        if self.use_direction_:
+            axis = np.array(self.direction_, dtype=np.float64)
+            norm = np.linalg.norm(axis)
+            if norm < 1e-12: raise NodeProcessingError(self, "Direction cannot be a zero vector")
+            dots = props['direction'] @ (axis / norm)
+            if self.ignore_sign_: dots = np.abs(dots)
+            mask &= dots >= math.cos(self.angle_) - 1e-12
+        if self.use_box_:
+            lo = np.minimum(self.box_min_, self.box_max_); hi = np.maximum(self.box_min_, self.box_max_)
+            mask &= np.all((props['center'] >= lo) & (props['center'] <= hi), axis=1)
+
+        indices = np.flatnonzero(mask)
+        if self.use_nearest_ and len(indices) > self.nearest_count_:
+            dist = np.linalg.norm(props['center'][indices] - np.asarray(point, dtype=np.float64), axis=1)
+            nearest = np.argpartition(dist, self.nearest_count_ - 1)[:self.nearest_count_]
+            indices = indices[nearest[np.argsort(dist[nearest])]] # Ближайшие - первыми
+        return indices
+
+    # --- Обработка ---
+    def process(self):
+        socket_obj = self.inputs["Object In"]; socket_pt = self.inputs["Point"]
+        out_obj_socket = self.outputs["Object Out"]; out_sel_socket = self.outputs["Selected"]
+        out_sel_socket.sv_set(None)
+
+        try:
+            if not socket_obj.is_linked: raise SocketConnectionError(self, "'Object In' must be connected")
+            obj_in = socket_obj.sv_get()
+            point = tuple(socket_pt.sv_get()) if socket_pt.is_linked else tuple(self.point_)
+            if obj_in is None: raise NodeProcessingError(self, "Input object is None")
+            shape = input_shape(obj_in)
+            if shape is None: raise NodeProcessingError(self, f"Unsupported input type: {type(obj_in)}")
+
+            kind = self.element_type_
+            topology = get_topology_index(shape)
+            indices = self.evaluate_mask(topology.properties(kind), point)
+            selected = make_selection(topology, kind, indices)
+            logger.debug(f"Node {self.name}: {len(selected)} of {topology.count(kind)} {kind.lower()}s selected.")
+
+            out_sel_socket.sv_set(selected)
+            out_obj_socket.sv_set(obj_in)
+
+        except Exception as e:
+            out_sel_socket.sv_set(None); out_obj_socket.sv_set(None)
+            if isinstance(e, (NodeProcessingError, SocketConnectionError)): raise
+            logger.error(f"Error in SelectByPropertiesNode '{self.name}': {e}", exc_info=True)
+            raise NodeProcessingError(self, f"Processing failed: {e}")
+
+
+# --- Регистрация ---
+classes = (
+    SelectByPropertiesNode,
+)
@@ -1,11 +1,12 @@
 # cadquery_parametric_addon/nodes/selectors/select_edge.py
 import bpy
-from bpy.props import IntProperty, BoolProperty, StringProperty # Bool/String убраны, но импорт оставим на всякий случай
+from bpy.props import IntProperty, BoolProperty, StringProperty
 import logging
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQNumberSocket, CQIntSocket # Используем CQIntSocket
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import get_topology_index, track_node_index, make_selection
 from ...dependencies import cq # Нужен cq для работы с Shape
 
 logger = logging.getLogger(__name__)
@@ -27,6 +28,13 @@ class SelectEdgeNode(CadQueryNode):
         description="Index of the edge to select (starting from 0)",
         update=CadQueryNode.process_node
     )
+    track_: BoolProperty(
+        name="Track", default=True,
+        description="Re-find the selected edge by its geometric signature when the input shape changes",
+        update=CadQueryNode.process_node
+    )
+    signature_: StringProperty(default="") # JSON-сигнатура выбранного элемента
+    captured_index_: IntProperty(default=-1) # Индекс, для которого снята сигнатура
     # --- show_marker_ и marker_object_name УДАЛЕНЫ ---
 
     # --- Инициализация (с prop_name и синхронизацией) ---
@@ -41,7 +49,7 @@ class SelectEdgeNode(CadQueryNode):
             # Синхронизируем IntProperty сокета с IntProperty ноды
             socket_idx.default_property = self.index_ # <-- Синхронизация int -> int
             self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
-            self.outputs.new(CQSelectorSocket.bl_idname, "Selected Edge") # Передаем cq.Edge
+            self.outputs.new(CQSelectorSocket.bl_idname, "Selected Edge") # Передаем SelectionRef
             logger.debug(f"  Created sockets and synced Index default: {socket_idx.default_property}")
         except Exception as e:
              logger.error(f"Error during socket creation/sync in {self.name}: {e}", exc_info=True)
@@ -50,6 +58,7 @@ class SelectEdgeNode(CadQueryNode):
     # --- UI (только ошибки) ---
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout) # Ошибка
+        layout.prop(self, "track_")
         # Поле ввода индекса будет нарисовано методом draw() сокета "Index", если он не подключен
 
     # --- Очистка (ничего не делаем) ---
@@ -110,22 +119,20 @@ class SelectEdgeNode(CadQueryNode):
             else:
                 raise NodeProcessingError(self, f"Unsupported input type: {type(obj_in)}")
 
-            # Получаем ребра и выбранное ребро
-            edges = current_shape.Edges()
-            num_edges = len(edges)
+            # Получаем ребра из общего индекса топологии (без обхода всех ребер)
+            topology = get_topology_index(current_shape)
+            num_edges = topology.count('EDGE')
+            if self.track_ and not socket_idx.is_linked:
+                index = track_node_index(self, topology, 'EDGE', index, socket_idx)
             # logger.debug(f"Node {self.name}: Found {num_edges} edges. Requesting index {index}.")
 
             if num_edges == 0: logger.warning(f"Node {self.name}: Input shape has no edges.")
             elif not (0 <= index < num_edges): logger.warning(f"Node {self.name}: Index {index} out of bounds (0-{num_edges-1}).")
             else:
-                try:
-                    selected_edge_object = edges[index] # Получаем cq.Edge
-                    # logger.debug(f"Node {self.name}: Successfully selected edge index {index}")
-                except Exception as e:
-                    logger.error(f"Node {self.name}: Failed to get edge object at index {index}: {e}")
-                    selected_edge_object = None # Сбрасываем, если ошибка
-
-            # Передаем объект ребра или None
+                # Ссылка (отпечаток Shape + индекс) вместо живого cq.Edge
+                selected_edge_object = make_selection(topology, 'EDGE', [index])
+
+            # Передаем ссылку на ребро или None
             out_sel_socket.sv_set(selected_edge_object)
             # Передаем исходный объект дальше (даже если ребро не выбрано)
             out_obj_socket.sv_set(obj_in)
@@ -1,11 +1,12 @@
 # cadquery_parametric_addon/nodes/selectors/select_face.py
 import bpy
-from bpy.props import IntProperty
+from bpy.props import IntProperty, BoolProperty, StringProperty
 import logging
 
 from ...core.node_tree import CadQueryNode
 from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQIntSocket # Используем IntSocket
 from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import get_topology_index, track_node_index, make_selection
 from ...dependencies import cq
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,13 @@ class SelectFaceNode(CadQueryNode):
         description="Index of the face to select (starting from 0)",
         update=CadQueryNode.process_node
     )
+    track_: BoolProperty(
+        name="Track", default=True,
+        description="Re-find the selected face by its geometric signature when the input shape changes",
+        update=CadQueryNode.process_node
+    )
+    signature_: StringProperty(default="") # JSON-сигнатура выбранного элемента
+    captured_index_: IntProperty(default=-1) # Индекс, для которого снята сигнатура
 
     # --- Инициализация ---
     def sv_init(self, context):
@@ -32,7 +40,7 @@ class SelectFaceNode(CadQueryNode):
             socket_idx.prop_name = 'index_'
             socket_idx.default_property = self.index_
             self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
-            self.outputs.new(CQSelectorSocket.bl_idname, "Selected Face") # Передаем cq.Face
+            self.outputs.new(CQSelectorSocket.bl_idname, "Selected Face") # Передаем SelectionRef
             logger.debug(f"  Created sockets and synced Index default: {socket_idx.default_property}")
         except Exception as e:
              logger.error(f"Error during socket creation/sync in {self.name}: {e}", exc_info=True)
@@ -41,6 +49,7 @@ class SelectFaceNode(CadQueryNode):
     # --- UI ---
     def draw_buttons(self, context, layout):
         super().draw_buttons(context, layout) # Ошибка
+        layout.prop(self, "track_")
         # Поле ввода индекса будет нарисовано сокетом
 
     # --- Обработка ---
@@ -81,14 +90,15 @@ class SelectFaceNode(CadQueryNode):
             if not current_shape or not current_shape.isValid():
                  raise NodeProcessingError(self, "Input shape for face selection is invalid.")
 
-            faces = current_shape.Faces()
-            num_faces = len(faces)
+            topology = get_topology_index(current_shape) # Общий индекс граней
+            num_faces = topology.count('FACE')
+            if self.track_ and not socket_idx.is_linked:
+                index = track_node_index(self, topology, 'FACE', index, socket_idx)
 
             if num_faces == 0: logger.warning(f"Node {self.name}: Input shape has no faces.")
             elif not (0 <= index < num_faces): logger.warning(f"Node {self.name}: Index {index} out of bounds for faces (0-{num_faces-1}).")
             else:
-                try: selected_face_object = faces[index] # Получаем cq.Face
-                except Exception as e: logger.error(f"Failed to get face object at index {index}: {e}")
+                selected_face_object = make_selection(topology, 'FACE', [index]) # Ссылка вместо cq.Face
 
             out_sel_socket.sv_set(selected_face_object)
             out_obj_socket.sv_set(obj_in)
@@ -0,0 +1,122 @@
+# cadquery_parametric_addon/nodes/selectors/select_nearest.py
+import bpy
+from bpy.props import EnumProperty, FloatProperty, FloatVectorProperty, StringProperty
+import logging
+
+from ...core.node_tree import CadQueryNode
+from ...core.sockets import CQObjectSocket, CQSelectorSocket, CQVectorSocket
+from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...core.topology import get_topology_index, input_shape, make_selection
+from ...dependencies import cq
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_TYPES = [
+    ('EDGE', "Edges", "Select edges"),
+    ('FACE', "Faces", "Select faces"),
+]
+QUERY_TYPES = [
+    ('NEAREST', "Nearest", "The single element closest to the probe"),
+    ('RADIUS', "Radius", "All elements within a distance of the probe"),
+    ('BOX', "Box", "All elements reaching into a box centred on the probe"),
+]
+PROBE_SOURCES = [
+    ('POINT', "Point", "Point input / property"),
+    ('CURSOR', "3D Cursor", "Location of the scene 3D cursor"),
+    ('OBJECT', "Object", "Location of a scene object (e.g. an empty)"),
+]
+
+
+class SelectNearestNode(CadQueryNode):
+    """Selects edges or faces near a probe location using a cached spatial index."""
+    bl_idname = 'CQPNode_SelectorSelectNearestNode'
+    bl_label = 'Select Nearest'
+    sv_category = 'Selectors'
+
+    # --- Свойства ---
+    element_type_: EnumProperty( items=ELEMENT_TYPES, name="Elements", default='FACE', update=CadQueryNode.process_node )
+    query_: EnumProperty( items=QUERY_TYPES, name="Query", default='NEAREST', update=CadQueryNode.process_node )
+    probe_: EnumProperty( items=PROBE_SOURCES, name="Probe", default='POINT', update=CadQueryNode.process_node )
+    point_: FloatVectorProperty( name="Point", default=(0.0, 0.0, 0.0), size=3, subtype='XYZ', update=CadQueryNode.process_node )
+    probe_object_: StringProperty( name="Object", default="", description="Object whose location is the probe", update=CadQueryNode.process_node )
+    radius_: FloatProperty( name="Radius", default=1.0, min=0.0, subtype='DISTANCE', unit='LENGTH', update=CadQueryNode.process_node )
+    box_size_: FloatVectorProperty( name="Box Size", default=(1.0, 1.0, 1.0), min=0.0, size=3, subtype='XYZ', update=CadQueryNode.process_node )
+
+    # --- Инициализация ---
+    def sv_init(self, context):
+        self.inputs.new(CQObjectSocket.bl_idname, "Object In")
+        self.inputs.new(CQVectorSocket.bl_idname, "Point").prop_name = 'point_'
+        self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
+        self.outputs.new(CQSelectorSocket.bl_idname, "Selected") # SelectionRef на ребра / грани
+
+    # --- UI ---
+    def draw_buttons(self, context, layout):
+        super().draw_buttons(context, layout)
+        row = layout.row(align=True)
+        row.prop(self, "element_type_", expand=True)
+        layout.prop(self, "query_", text="")
+        if self.query_ == 'RADIUS': layout.prop(self, "radius_")
+        elif self.query_ == 'BOX': layout.column(align=True).prop(self, "box_size_", text="")
+        layout.prop(self, "probe_", text="Probe")
+        if self.probe_ == 'OBJECT': layout.prop_search(self, "probe_object_", bpy.data, "objects", text="")
+
+    # --- Сцена ---
+    def scene_key(self):
+        """The probe location when it comes from the scene (cursor or object)."""
+        if self.probe_ == 'POINT': return None
+        location = self.probe_location()
+        return tuple(round(c, 9) for c in location) if location is not None else ()
+
+    def probe_location(self):
+        if self.probe_ == 'CURSOR':
+            return tuple(bpy.context.scene.cursor.location)
+        if self.probe_ == 'OBJECT':
+            obj = bpy.data.objects.get(self.probe_object_) if self.probe_object_ else None
+            return tuple(obj.matrix_world.translation) if obj else None
+        socket_pt = self.inputs.get("Point")
+        return tuple(socket_pt.sv_get()) if socket_pt and socket_pt.is_linked else tuple(self.point_)
+
+    # --- Обработка ---
+    def process(self):
+        socket_obj = self.inputs["Object In"]
+        out_obj_socket = self.outputs["Object Out"]; out_sel_socket = self.outputs["Selected"]
+        out_sel_socket.sv_set(None)
+
+        try:
+            if not socket_obj.is_linked: raise SocketConnectionError(self, "'Object In' must be connected")
+            obj_in = socket_obj.sv_get()
+            if obj_in is None: raise NodeProcessingError(self, "Input object is None")
+            shape = input_shape(obj_in)
+            if shape is None: raise NodeProcessingError(self, f"Unsupported input type: {type(obj_in)}")
+            probe = self.probe_location()
+            if probe is None: raise NodeProcessingError(self, f"Probe object '{self.probe_object_}' not found")
+
+            kind = self.element_type_
+            topology = get_topology_index(shape)
+            spatial = topology.spatial_index(kind)
+
+            if self.query_ == 'NEAREST':
+                # Отсечение по габаритам, точное расстояние для оставшихся
+                nearest = spatial.nearest(probe)
+                indices = [nearest] if nearest >= 0 else []
+            elif self.query_ == 'RADIUS':
+                indices = spatial.within_radius(probe, self.radius_)
+            else:
+                half = [0.5 * s for s in self.box_size_]
+                lo = [p - h for p, h in zip(probe, half)]; hi = [p + h for p, h in zip(probe, half)]
+                indices = spatial.within_box(lo, hi)
+
+            out_sel_socket.sv_set(make_selection(topology, kind, indices))
+            out_obj_socket.sv_set(obj_in)
+
+        except Exception as e:
+            out_sel_socket.sv_set(None); out_obj_socket.sv_set(None)
+            if isinstance(e, (NodeProcessingError, SocketConnectionError)): raise
+            logger.error(f"Error in SelectNearestNode '{self.name}': {e}", exc_info=True)
+            raise NodeProcessingError(self, f"Processing failed: {e}")
+
+
+# --- Регистрация ---
+classes = (
+    SelectNearestNode,
+)
@@ -0,0 +1,148 @@
+# cadquery_parametric_addon/nodes/transformations/mirror.py
+import bpy
+from bpy.props import FloatVectorProperty, EnumProperty, BoolProperty
+import itertools
+import logging
+import time
+
+from ...core.node_tree import CadQueryNode
+from ...core.sockets import CQObjectSocket, CQVectorSocket
+from ...core.cad_manager import cad_manager
+from ...core.boolean_options import BooleanOptionsMixin
+from ...core.exceptions import NodeProcessingError, SocketConnectionError
+from ...dependencies import cq
+
+logger = logging.getLogger(__name__)
+
+MIRROR_OUTPUTS = [
+    ('FUSE', "Fuse", "Original and mirrored halves fused into one solid"),
+    ('COMPOUND', "Compound", "Original and mirrored halves as a compound (no Boolean)"),
+    ('MIRROR', "Mirror Only", "Only the mirrored copy"),
+]
+# Допуск знакового расстояния до плоскости при проверке для glue
+GLUE_PLANE_TOLERANCE = 1e-5
+
+def one_side_of_plane(shapes, origin, normal) -> bool:
+    """True if the bounding boxes of all shapes lie on one side of the plane (touching allowed)."""
+    length = sum(n * n for n in normal) ** 0.5
+    unit = [n / length for n in normal]
+    above = below = False
+    for shape in shapes:
+        xmin, ymin, zmin, xmax, ymax, zmax = cad_manager.aabb(shape).Get()
+        for corner in itertools.product((xmin, xmax), (ymin, ymax), (zmin, zmax)):
+            distance = sum((c - o) * u for c, o, u in zip(corner, origin, unit))
+            above |= distance > GLUE_PLANE_TOLERANCE; below |= distance < -GLUE_PLANE_TOLERANCE
+            if above and below: return False
+    return True
+
+
+class MirrorNode(BooleanOptionsMixin, CadQueryNode):
+    """Mirrors a CadQuery object across a plane and optionally joins it with the original."""
+    bl_idname = 'CQPNode_TransformationMirrorNode'
+    bl_label = 'Mirror'
+    sv_category = 'Transformations'
+
+    # --- Свойства Ноды ---
+    origin_: FloatVectorProperty(
+        name="Origin", default=(0.0, 0.0, 0.0), size=3, subtype='XYZ',
+        description="Point on the mirror plane",
+        update=CadQueryNode.process_node
+    )
+    normal_: FloatVectorProperty(
+        name="Normal", default=(1.0, 0.0, 0.0), size=3, subtype='DIRECTION',
+        description="Normal of the mirror plane (will be normalized)",
+        update=CadQueryNode.process_node
+    )
+    output_: EnumProperty( items=MIRROR_OUTPUTS, name="Output", default='FUSE', update=CadQueryNode.process_node )
+    glue_: BoolProperty(
+        name="Glue", default=False,
+        description="Fuse in glue mode when the input lies on one side of the mirror plane: the halves then only share faces on the plane, so the join is much cheaper",
+        update=CadQueryNode.process_node
+    )
+
+    # --- Инициализация ---
+    def sv_init(self, context):
+        """Initialize sockets."""
+        self.inputs.new(CQObjectSocket.bl_idname, "Object In")
+        self.inputs.new(CQVectorSocket.bl_idname, "Origin").prop_name = 'origin_'
+        self.inputs.new(CQVectorSocket.bl_idname, "Normal").prop_name = 'normal_'
+        self.outputs.new(CQObjectSocket.bl_idname, "Object Out")
+        try: # Синхронизация UI сокетов
+            self.inputs["Origin"].default_property = self.origin_
+            self.inputs["Normal"].default_property = self.normal_
+        except Exception as e: logger.error(f"Error syncing sockets in {self.name}: {e}")
+
+    # --- UI ---
+    def draw_buttons(self, context, layout):
+        """Draw UI."""
+        super().draw_buttons(context, layout) # Ошибки
+        layout.prop(self, "output_", text="")
+        if self.output_ == 'FUSE':
+            layout.prop(self, "glue_")
+            self.draw_boolean_options(layout)
+
+    # --- Обработка ---
+    def process(self):
+        """Node's core logic."""
+        socket_obj = self.inputs["Object In"]
+        socket_origin = self.inputs["Origin"]
+        socket_normal = self.inputs["Normal"]
+        out_socket = self.outputs["Object Out"]
+
+        if not socket_obj.is_linked:
+            raise SocketConnectionError(self, "'Object In' must be connected")
+
+        # Получаем входные данные
+        try:
+            obj_in = socket_obj.sv_get()
+            origin = tuple(socket_origin.sv_get()) if socket_origin.is_linked else tuple(self.origin_)
+            normal = tuple(socket_normal.sv_get()) if socket_normal.is_linked else tuple(self.normal_)
+
+            if obj_in is None: raise NodeProcessingError(self, "Input object is None")
+            if sum(abs(n) for n in normal) < 1e-6:
+                 raise NodeProcessingError(self, "Mirror normal cannot be a zero vector")
+            shapes = cad_manager.shapes_of(obj_in)
+            if not shapes: raise NodeProcessingError(self, f"Input object of type {type(obj_in)} contains no shapes")
+
+        except NodeProcessingError: raise
+        except Exception as e:
+            raise NodeProcessingError(self, f"Input error: {e}")
+
+        try:
+            mirrored = [s.mirror(cq.Vector(normal), cq.Vector(origin)) for s in shapes]
+
+            if self.output_ == 'MIRROR':
+                result_shape = mirrored[0] if len(mirrored) == 1 else cq.Compound.makeCompound(mirrored)
+            elif self.output_ == 'COMPOUND':
+                result_shape = cq.Compound.makeCompound(shapes + mirrored)
+            else:
+                # Glue только если вход целиком по одну сторону плоскости: иначе половины
+                # перекрываются, и OCC в режиме glue может молча вернуть неверный результат
+                options = self.boolean_options(); t0 = time.perf_counter()
+                if self.glue_ or options.glue != 'OFF':
+                    if one_side_of_plane(shapes, origin, normal):
+                        if self.glue_: options.glue = 'FULL'
+                    else:
+                        logger.debug(f"Node {self.name}: input crosses the mirror plane, fusing without glue.")
+                        options.glue = 'OFF'
+                try:
+                    result_shape = cad_manager.fuse_shapes(shapes + mirrored, options=options)
+                except ValueError as e_glue:
+                    if options.glue == 'OFF': raise
+                    logger.warning(f"Node {self.name}: glue fuse failed ({e_glue}), retrying as a general fuse.")
+                    options.glue = 'OFF'
+                    result_shape = cad_manager.fuse_shapes(shapes + mirrored, options=options)
+                self.record_boolean_profile(options, time.perf_counter() - t0)
+
+            out_socket.sv_set(cq.Workplane("XY").add(result_shape))
+
+        except Exception as e:
+            out_socket.sv_set(None)
+            logger.error(f"Error in MirrorNode '{self.name}': {e}", exc_info=True)
+            raise NodeProcessingError(self, f"Mirror operation failed: {e}")
+
+
+# --- Регистрация ---
+classes = (
+    MirrorNode,
+)
@@ -24,11 +24,22 @@ class CQP_OT_AddNodeTree(bpy.types.Operator):
 
         return {'FINISHED'}
 
+class CQP_OT_ResetBooleanStats(bpy.types.Operator):
+    """Resets the Boolean fast-path counters"""
+    bl_idname = "cqp.reset_boolean_stats"
+    bl_label = "Reset Boolean Stats"
+
+    def execute(self, context):
+        from ..core.cad_manager import cad_manager
+        cad_manager.reset_boolean_stats()
+        return {'FINISHED'}
+
 # Можно добавить операторы для других действий с нодами/деревом, если нужно
 
 # --- Registration ---
 classes = (
     CQP_OT_AddNodeTree,
+    CQP_OT_ResetBooleanStats,
 )
 
 def register():
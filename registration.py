@@ -13,7 +13,9 @@ core_modules_order = [
     ".core.data_cache",
     ".core.sockets",
     ".core.cad_manager", # До сокетов и нод
+    ".core.topology",
     ".core.node_tree",
+    ".core.boolean_options",
     ".core.update_system",
     ".core.event_system",
     ".core.handlers",
@@ -1,6 +1,7 @@
 # cadquery_parametric_addon/ui/panels.py
 import bpy
 from ..core.node_tree import CadQueryNodeTree
+from ..core.cad_manager import cad_manager, BOOLEAN_STAT_OPERATIONS
 
 class CQP_PT_NodeEditorPanel(bpy.types.Panel):
     """Creates a Panel in the Node Editor Sidebar"""
@@ -48,9 +49,62 @@ class CQP_PT_NodeEditorPanel(bpy.types.Panel):
         # Кнопка Импорта (активна всегда, оператор сам проверит дерево)
         row.operator("cqp.import_json_v2", text="Import Add", icon='IMPORT')
 
+        # Бандл .cqpz: дерево + посчитанные результаты
+        row = box.row(align=True)
+        row_bundle = row.row(align=True); row_bundle.enabled = is_cqp_tree
+        row_bundle.operator("cqp.export_bundle", text="Export Bundle", icon='PACKAGE')
+        row.operator("cqp.import_bundle", text="Import Bundle", icon='UGLYPACKAGE')
+
+
+class CQP_PT_BooleanStatsPanel(bpy.types.Panel):
+    """Shows how often Boolean operations took the bounding-box fast path"""
+    bl_label = "Boolean Fast Paths"
+    bl_idname = "CQP_PT_BooleanStatsPanel"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "CadQuery"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and context.space_data.type == 'NODE_EDITOR'
+
+    def draw(self, context):
+        layout = self.layout
+        stats = cad_manager.boolean_stats
+        col = layout.column(align=True)
+        for op in BOOLEAN_STAT_OPERATIONS:
+            counts = stats.get(op, {'calls': 0, 'fast': 0})
+            col.label(text=f"{op.capitalize()}: {counts['fast']} / {counts['calls']} fast")
+        col.label(text=f"Cut tools skipped: {stats.get('tools_skipped', 0)}")
+        layout.operator("cqp.reset_boolean_stats", text="Reset", icon='LOOP_BACK')
+
+
+class CQP_PT_BooleanDefaultsPanel(bpy.types.Panel):
+    """Boolean options used by nodes set to 'Tree Defaults'"""
+    bl_label = "Boolean Defaults"
+    bl_idname = "CQP_PT_BooleanDefaultsPanel"
+    bl_space_type = 'NODE_EDITOR'
+    bl_region_type = 'UI'
+    bl_category = "CadQuery"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.space_data and isinstance(context.space_data.node_tree, CadQueryNodeTree)
+
+    def draw(self, context):
+        layout = self.layout
+        tree = context.space_data.node_tree
+        row = layout.row(align=True)
+        row.prop(tree, "bool_parallel", toggle=True); row.prop(tree, "bool_use_obb", toggle=True)
+        layout.prop(tree, "bool_fuzzy"); layout.prop(tree, "bool_glue")
+
 # --- Регистрация ---
 classes = (
     CQP_PT_NodeEditorPanel,
+    CQP_PT_BooleanStatsPanel,
+    CQP_PT_BooleanDefaultsPanel,
 )
 
 def register():
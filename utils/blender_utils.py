@@ -1,6 +1,173 @@
 # cadquery_parametric_addon/utils/blender_utils.py
-# Пока пустой, можно добавить общие утилиты для Blender
+# Общие утилиты для Blender
 import bpy
+import bmesh
 import logging
+import time
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+import numpy as np
+
+from ..core.constants import FACE_ID_ATTRIBUTE, SELECTED_ATTRIBUTE
+
+logger = logging.getLogger(__name__)
+
+
+def write_mesh_buffers(mesh: bpy.types.Mesh, buffers) -> bpy.types.Mesh:
+    """Replaces the geometry of an existing mesh datablock with indexed triangle buffers.
+
+    The datablock itself is reused, so objects, materials and modifiers that
+    reference it stay intact. All data is written in bulk with foreach_set.
+    """
+    n_verts = buffers.vertex_count
+    n_tris = buffers.triangle_count
+
+    mesh.clear_geometry()
+    mesh.vertices.add(n_verts)
+    mesh.vertices.foreach_set("co", buffers.vertices.astype(np.float32, copy=False).ravel())
+    mesh.loops.add(n_tris * 3)
+    mesh.loops.foreach_set("vertex_index", buffers.triangles.astype(np.int32, copy=False).ravel())
+    mesh.polygons.add(n_tris)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, n_tris * 3, 3, dtype=np.int32))
+    if buffers.face_ids is not None:
+        attr = mesh.attributes.new(FACE_ID_ATTRIBUTE, 'INT', 'FACE')
+        attr.data.foreach_set("value", buffers.face_ids.astype(np.int32, copy=False))
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def write_point_cloud(mesh: bpy.types.Mesh, points) -> bpy.types.Mesh:
+    """Writes (N, 3) points as loose vertices of a mesh.
+
+    When the vertex count is unchanged only the coordinates are rewritten in
+    place; otherwise the geometry is rebuilt.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    if len(mesh.vertices) != len(points) or len(mesh.edges) or len(mesh.polygons):
+        mesh.clear_geometry()
+        mesh.vertices.add(len(points))
+    mesh.vertices.foreach_set("co", points.ravel())
+    mesh.update()
+    return mesh
+
+
+def write_glyph_mesh(mesh: bpy.types.Mesh, glyph_type: str) -> bpy.types.Mesh:
+    """Fills a mesh with a unit-size marker glyph ('CUBE' edge 1, 'SPHERE' diameter 1)."""
+    bm = bmesh.new()
+    try:
+        if glyph_type == 'CUBE': bmesh.ops.create_cube(bm, size=1.0)
+        else: bmesh.ops.create_icosphere(bm, subdivisions=1, radius=0.5)
+        bm.to_mesh(mesh)
+    finally:
+        bm.free()
+    mesh.update()
+    return mesh
+
+
+def get_color_material(prefix: str, rgba) -> bpy.types.Material:
+    """Returns a shared flat-colour material for an RGBA value, creating it once."""
+    mat_name = f"{prefix}_{rgba[0]:.2f}_{rgba[1]:.2f}_{rgba[2]:.2f}_{rgba[3]:.2f}"
+    material = bpy.data.materials.get(mat_name)
+    if material: return material
+
+    material = bpy.data.materials.new(name=mat_name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    bsdf = nodes.get("Principled BSDF")
+    if not bsdf: # Если нет стандартной, создаем (маловероятно)
+        bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+        output_node = nodes.get("Material Output") or nodes.new(type='ShaderNodeOutputMaterial')
+        output_node.location = 200, 0
+        material.node_tree.links.new(bsdf.outputs['BSDF'], output_node.inputs['Surface'])
+    bsdf.inputs["Base Color"].default_value = rgba
+    bsdf.inputs["Alpha"].default_value = rgba[3]
+    bsdf.inputs["Roughness"].default_value = 0.8
+    bsdf.inputs["Metallic"].default_value = 0.1
+    # Для прозрачности в Eevee/Cycles нужен Blend Mode
+    material.blend_method = 'BLEND'
+    material.shadow_method = 'HASHED'
+    material.diffuse_color = rgba
+    return material
+
+
+def read_face_ids(mesh: bpy.types.Mesh):
+    """Returns the per-polygon face ids of a viewer mesh, or None if the mesh has none."""
+    attr = mesh.attributes.get(FACE_ID_ATTRIBUTE)
+    if attr is None or attr.domain != 'FACE' or attr.data_type != 'INT': return None
+    face_ids = np.empty(len(mesh.polygons), dtype=np.int32)
+    attr.data.foreach_get("value", face_ids)
+    return face_ids
+
+
+def write_face_selection(mesh: bpy.types.Mesh, selected_face_ids) -> int:
+    """Marks polygons whose face id is in `selected_face_ids` (attribute and polygon select).
+
+    Passing an empty collection clears the highlight. Returns the number of
+    selected polygons.
+    """
+    face_ids = read_face_ids(mesh)
+    if face_ids is None: return 0
+    selected = np.isin(face_ids, np.fromiter(selected_face_ids, dtype=np.int32))
+    attr = mesh.attributes.get(SELECTED_ATTRIBUTE)
+    if attr is None or attr.domain != 'FACE' or attr.data_type != 'BOOLEAN':
+        if attr is not None: mesh.attributes.remove(attr)
+        attr = mesh.attributes.new(SELECTED_ATTRIBUTE, 'BOOLEAN', 'FACE')
+    attr.data.foreach_set("value", selected)
+    mesh.polygons.foreach_set("select", selected) # Видно в режиме редактирования
+    mesh.update()
+    return int(selected.sum())
+
+
+def write_line_buffers(mesh: bpy.types.Mesh, lines) -> bpy.types.Mesh:
+    """Replaces the geometry of an existing mesh datablock with loose edges."""
+    mesh.clear_geometry()
+    mesh.vertices.add(lines.vertex_count)
+    mesh.vertices.foreach_set("co", lines.vertices.astype(np.float32, copy=False).ravel())
+    mesh.edges.add(lines.edge_count)
+    mesh.edges.foreach_set("vertices", lines.edges.astype(np.int32, copy=False).ravel())
+    mesh.update()
+    return mesh
+
+
+def post_process_mesh(mesh: bpy.types.Mesh, merge_distance: float | None = None,
+                      quads_angle: float | None = None, dissolve_angle: float | None = None,
+                      smooth_angle: float | None = None) -> list[tuple[str, float]]:
+    """Runs in-memory clean-up stages on a mesh datablock.
+
+    Each stage runs only when its parameter is not None (angles in radians):
+    merge by distance, tris to quads, limited dissolve (bmesh.ops on one
+    bmesh), then smoothing by angle on the mesh itself. Nothing depends on
+    the active object, selection or edit mode, so this works from timers and
+    in background mode and adds no undo steps. Returns (stage, seconds) pairs.
+    """
+    timings = []
+    if merge_distance is not None or quads_angle is not None or dissolve_angle is not None:
+        bm = bmesh.new()
+        try:
+            bm.from_mesh(mesh)
+            if merge_distance is not None:
+                t0 = time.perf_counter()
+                bmesh.ops.remove_doubles(bm, verts=bm.verts[:], dist=merge_distance)
+                timings.append(('MERGE', time.perf_counter() - t0))
+            if quads_angle is not None:
+                t0 = time.perf_counter()
+                bmesh.ops.join_triangles(bm, faces=bm.faces[:], angle_face_threshold=quads_angle,
+                                         angle_shape_threshold=quads_angle)
+                timings.append(('QUADS', time.perf_counter() - t0))
+            if dissolve_angle is not None:
+                t0 = time.perf_counter()
+                bmesh.ops.dissolve_limit(bm, angle_limit=dissolve_angle, verts=bm.verts[:], edges=bm.edges[:])
+                timings.append(('DISSOLVE', time.perf_counter() - t0))
+            bm.to_mesh(mesh)
+        finally:
+            bm.free()
+
+    if smooth_angle is not None:
+        t0 = time.perf_counter()
+        mesh.shade_smooth()
+        mesh.set_sharp_from_angle(angle=smooth_angle)
+        timings.append(('SMOOTH', time.perf_counter() - t0))
+
+    mesh.update()
+    for stage, seconds in timings:
+        logger.debug(f"Mesh '{mesh.name}' post-process {stage}: {seconds:.4f}s")
+    return timings
@@ -2,6 +2,7 @@
 import bpy
 import logging
 from ..dependencies import cq, cadquery_available
+from . import tessellation, blender_utils
 
 logger = logging.getLogger(__name__)
 
@@ -19,25 +20,16 @@ def shape_to_blender_mesh(shape: cq.Shape, mesh_name: str,
          return None
 
     try:
+        # Используем общий путь тесселяции (BRepMesh + чтение триангуляций граней)
+        buffers = tessellation.tessellate_shapes([shape], tolerance, angular_tolerance)
 
-        logger.debug(f"Tessellating shape '{mesh_name}' (type: {type(shape)}) with tol={tolerance}, ang={angular_tolerance}")
-        # Используем tessellate для получения вершин и треугольников
-        # Настройте точность по необходимости
-        vertices, triangles = shape.tessellate(tolerance=tolerance, angularTolerance=angular_tolerance)
-
-        if not vertices or not triangles:
+        if not buffers.vertex_count or not buffers.triangle_count:
             logger.warning(f"Tessellation resulted in no vertices or triangles for mesh '{mesh_name}'. Shape might be 2D or invalid.")
             return None
 
-        logger.debug(f"  Tessellation resulted in {len(vertices)} vertices, {len(triangles)} triangles.")
-        
-        # Создаем новый меш Blender
+        # Создаем новый меш Blender и заполняем его данными
         mesh = bpy.data.meshes.new(mesh_name)
-        # Заполняем меш данными
-        mesh.from_pydata(vertices, [], triangles) # Второй аргумент - ребра (edges), пока пустой
-        mesh.update(calc_edges=True) # Рассчитываем ребра и нормали
-        mesh.validate() # Проверяем меш на корректность
-        return mesh
+        return blender_utils.write_mesh_buffers(mesh, buffers)
 
     except Exception as e:
         logger.error(f"Error during shape tessellation or mesh creation for '{mesh_name}': {e}", exc_info=True)
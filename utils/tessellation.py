@@ -0,0 +1,440 @@
+# cadquery_parametric_addon/utils/tessellation.py
+import logging
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ..dependencies import cq, cadquery_available
+
+logger = logging.getLogger(__name__)
+
+if cadquery_available:
+    # OCP ставится вместе с CadQuery, отдельная проверка не нужна
+    from OCP.BRepMesh import BRepMesh_IncrementalMesh
+    from OCP.BRepTools import BRepTools
+    from OCP.BRep import BRep_Tool
+    from OCP.BRepAdaptor import BRepAdaptor_Surface, BRepAdaptor_Curve
+    from OCP.BRepBndLib import BRepBndLib
+    from OCP.Bnd import Bnd_Box, Bnd_OBB
+    from OCP.GCPnts import GCPnts_TangentialDeflection
+    from OCP.TopLoc import TopLoc_Location
+    from OCP.TopAbs import TopAbs_REVERSED
+
+
+class MeshBuffers:
+    """Indexed triangle mesh held in NumPy arrays (vertices: (N, 3) float, triangles: (M, 3) int).
+
+    `face_ids` optionally holds, per triangle, the index of the OCC face it came
+    from (the order of Faces() over all input shapes).
+    """
+
+    def __init__(self, vertices=None, triangles=None, face_ids=None):
+        self.vertices = vertices if vertices is not None else np.empty((0, 3), dtype=np.float64)
+        self.triangles = triangles if triangles is not None else np.empty((0, 3), dtype=np.int32)
+        self.face_ids = face_ids
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.triangles)
+
+    @classmethod
+    def concatenate(cls, parts: list["MeshBuffers"]) -> "MeshBuffers":
+        """Joins several buffers into one, shifting triangle indices."""
+        parts = [p for p in parts if p.triangle_count]
+        if not parts: return cls()
+        if len(parts) == 1: return parts[0]
+        offsets = np.cumsum([0] + [p.vertex_count for p in parts[:-1]])
+        vertices = np.concatenate([p.vertices for p in parts])
+        # Один сдвиг индексов на весь массив вместо временного массива на каждую часть
+        triangles = np.concatenate([p.triangles for p in parts])
+        triangles += np.repeat(offsets, [p.triangle_count for p in parts]).astype(triangles.dtype)[:, None]
+        face_ids = None
+        if all(p.face_ids is not None for p in parts):
+            face_ids = np.concatenate([p.face_ids for p in parts])
+        return cls(vertices, triangles.astype(np.int32, copy=False), face_ids)
+
+    @classmethod
+    def from_faces(cls, parts: list) -> "MeshBuffers":
+        """Joins per-face buffers (None for faces without mesh), tagging triangles with the face index."""
+        counts = [p.triangle_count if p is not None else 0 for p in parts]
+        joined = cls.concatenate([p for p in parts if p is not None])
+        face_ids = np.repeat(np.arange(len(parts), dtype=np.int32), counts)
+        return cls(joined.vertices, joined.triangles, face_ids) # Новый объект - части могут лежать в кеше
+
+
+class LineBuffers:
+    """Loose-edge polyline mesh held in NumPy arrays (vertices: (N, 3) float, edges: (K, 2) int)."""
+
+    def __init__(self, vertices=None, edges=None):
+        self.vertices = vertices if vertices is not None else np.empty((0, 3), dtype=np.float64)
+        self.edges = edges if edges is not None else np.empty((0, 2), dtype=np.int32)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edges)
+
+    @classmethod
+    def from_polylines(cls, polylines: list, closed: bool = False) -> "LineBuffers":
+        """Builds one edge buffer from a list of (k, 3) point arrays."""
+        polylines = [p for p in polylines if len(p) >= 2]
+        if not polylines: return cls()
+        counts = np.array([len(p) for p in polylines])
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        vertices = np.concatenate(polylines)
+        # Ребра между соседними точками каждой полилинии
+        idx = np.arange(len(vertices), dtype=np.int32)
+        last_of_line = np.zeros(len(vertices), dtype=bool); last_of_line[starts + counts - 1] = True
+        edges = np.stack((idx[~last_of_line], idx[~last_of_line] + 1), axis=1)
+        if closed:
+            edges = np.concatenate((edges, np.stack((starts + counts - 1, starts), axis=1).astype(np.int32)))
+        return cls(vertices, edges.astype(np.int32, copy=False))
+
+
+# --- Сбор Shape из входа ---
+def collect_shapes(cq_input) -> list:
+    """Returns all valid cq.Shape objects contained in a Workplane or Shape input."""
+    if isinstance(cq_input, cq.Workplane):
+        return [v for v in cq_input.vals() if isinstance(v, cq.Shape) and v.isValid()]
+    if isinstance(cq_input, cq.Shape):
+        return [cq_input] if cq_input.isValid() else []
+    return []
+
+
+def make_compound(shapes: list):
+    """Wraps several shapes in one compound (a single shape is returned as is)."""
+    if len(shapes) == 1: return shapes[0]
+    return cq.Compound.makeCompound(shapes)
+
+
+# --- Меширование ---
+def mesh_shapes(shapes: list, tolerance: float, angular_tolerance: float,
+                relative: bool = True, parallel: bool = True, clean: bool = False):
+    """Runs BRepMesh once over all shapes.
+
+    All shapes are meshed together as one compound so OCC can spread the faces
+    over its worker threads when `parallel` is set. Faces that already carry a
+    triangulation fine enough for `tolerance` are left untouched by OCC, so
+    `clean` must be set when a coarser mesh than the current one is wanted.
+    """
+    if not shapes: return
+    compound = make_compound(shapes)
+    if clean: BRepTools.Clean_s(compound.wrapped) # Сбрасываем существующие триангуляции
+    # Для абсолютного прогиба можно быстро проверить существующую триангуляцию.
+    # Относительный прогиб так сравнивать нельзя - проверку делает сам BRepMesh.
+    if not relative and BRepTools.Triangulation_s(compound.wrapped, tolerance): return
+    BRepMesh_IncrementalMesh(compound.wrapped, tolerance, relative, angular_tolerance, parallel)
+
+
+def face_buffers(face) -> MeshBuffers | None:
+    """Reads the existing triangulation of a face into world-space buffers."""
+    loc = TopLoc_Location()
+    poly = BRep_Tool.Triangulation_s(face.wrapped, loc)
+    if poly is None: return None
+
+    n_nodes = poly.NbNodes(); n_tris = poly.NbTriangles()
+    if not n_nodes or not n_tris: return None
+
+    # Узлы и треугольники читаются в один список и превращаются в массив целиком
+    nodes = [poly.Node(i) for i in range(1, n_nodes + 1)]
+    vertices = np.array([(p.X(), p.Y(), p.Z()) for p in nodes], dtype=np.float64)
+    triangles = np.array([poly.Triangle(i).Get() for i in range(1, n_tris + 1)], dtype=np.int32)
+    triangles -= 1 # Индексы OCC начинаются с 1
+
+    if not loc.IsIdentity():
+        # Положение грани - одно матричное умножение вместо Transformed() на каждый узел
+        trsf = loc.Transformation()
+        matrix = np.array([[trsf.Value(r, c) for c in range(1, 5)] for r in range(1, 4)])
+        vertices = vertices @ matrix[:, :3].T + matrix[:, 3]
+    if face.wrapped.Orientation() == TopAbs_REVERSED:
+        triangles = triangles[:, ::-1] # Сохраняем направление нормалей
+
+    return MeshBuffers(vertices, np.ascontiguousarray(triangles))
+
+
+def extract_buffers(shapes: list) -> MeshBuffers:
+    """Collects the triangulations of all faces of all shapes into one buffer."""
+    return MeshBuffers.from_faces([face_buffers(face) for shape in shapes for face in shape.Faces()])
+
+
+def drop_degenerate(buffers: MeshBuffers) -> MeshBuffers:
+    """Removes triangles that reference the same vertex twice."""
+    tris = buffers.triangles
+    if not len(tris): return buffers
+    keep = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    if keep.all(): return buffers
+    face_ids = buffers.face_ids[keep] if buffers.face_ids is not None else None
+    return MeshBuffers(buffers.vertices, tris[keep], face_ids)
+
+
+def weld_vertices(buffers: MeshBuffers, distance: float) -> MeshBuffers:
+    """Merges coincident vertices into an indexed, watertight mesh.
+
+    Coordinates are quantised to a grid of `distance` and deduplicated with
+    np.unique, so the whole pass is vectorised. Nodes on shared face
+    boundaries come from the same OCC edge discretisation and are equal up to
+    rounding, so they land in the same cell.
+    """
+    if not buffers.vertex_count or distance <= 0: return buffers
+    keys = np.floor(buffers.vertices / distance + 0.5).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1).astype(np.int32)
+    welded = MeshBuffers(buffers.vertices[first], inverse[buffers.triangles], buffers.face_ids)
+    logger.debug(f"Welded {buffers.vertex_count} -> {welded.vertex_count} vertices (distance {distance:.3g})")
+    return drop_degenerate(welded)
+
+
+def face_index_map(shapes: list) -> dict:
+    """Maps every face of the shapes to its face id (the index used in MeshBuffers.face_ids)."""
+    # cq.Shape хешируется по HashCode и сравнивается через IsSame
+    return {face: i for i, face in enumerate(face for shape in shapes for face in shape.Faces())}
+
+
+def bounding_diagonal(shapes: list) -> float:
+    """Length of the bounding box diagonal of all shapes together."""
+    if not shapes: return 0.0
+    return make_compound(shapes).BoundingBox().DiagonalLength
+
+
+def count_triangles(shapes: list) -> int:
+    """Counts triangles of the current face triangulations without reading them."""
+    total = 0
+    loc = TopLoc_Location()
+    for shape in shapes:
+        for face in shape.Faces():
+            poly = BRep_Tool.Triangulation_s(face.wrapped, loc)
+            if poly is not None: total += poly.NbTriangles()
+    return total
+
+
+# Грубый проход оценки: прогиб как доля диагонали габарита
+ESTIMATE_DEFLECTION_FACTOR = 0.05
+# Ступеней лестницы прогибов на октаву (прогиб от габарита округляется вниз до 2 ** (k / steps))
+DEFLECTION_LADDER_STEPS = 2
+
+def snap_deflection(deflection: float) -> float:
+    """Rounds a size-derived deflection down to a fixed ladder of values.
+
+    Deflections computed from the bounding box change with every edit that moves
+    the part's extent; snapped, they stay the same and the face cache keeps hitting.
+    """
+    if deflection <= 0: return deflection
+    return 2.0 ** (math.floor(math.log2(deflection) * DEFLECTION_LADDER_STEPS) / DEFLECTION_LADDER_STEPS)
+
+def choose_deflection(shapes: list, target_deflection: float, triangle_budget: int,
+                      angular_tolerance: float, parallel: bool = True) -> tuple[float, bool]:
+    """Picks an absolute deflection that keeps the triangle count within a budget.
+
+    Two cheap passes at d0 and d0/2 fit the model T(d) = a + b / d: planar faces
+    give the constant part `a`, curved faces scale with 1/d. The returned
+    deflection is never finer than `target_deflection`. The second value tells
+    whether the shapes now carry a finer mesh than the chosen one (then the
+    final pass must clean them first).
+    """
+    if triangle_budget <= 0 or not shapes: return target_deflection, False
+
+    d0 = max(target_deflection, bounding_diagonal(shapes) * ESTIMATE_DEFLECTION_FACTOR)
+    d1 = d0 * 0.5
+    mesh_shapes(shapes, d0, angular_tolerance, relative=False, parallel=parallel, clean=True)
+    t0 = count_triangles(shapes)
+    mesh_shapes(shapes, d1, angular_tolerance, relative=False, parallel=parallel)
+    t1 = count_triangles(shapes)
+
+    b = (t1 - t0) * d0 # Вклад криволинейных граней
+    a = 2 * t0 - t1    # Постоянная часть (плоские грани)
+    if b <= 0:
+        deflection = target_deflection # Число треугольников не зависит от прогиба
+    elif triangle_budget > a:
+        deflection = max(target_deflection, b / (triangle_budget - a))
+    else:
+        logger.warning(f"Triangle budget {triangle_budget} is below the planar minimum (~{a}). Using coarse deflection.")
+        deflection = max(target_deflection, d0)
+
+    logger.debug(f"Adaptive deflection: budget={triangle_budget}, T({d0:.4g})={t0}, T({d1:.4g})={t1} -> {deflection:.4g}")
+    return deflection, deflection > d1
+
+
+# (прогиб-цель, бюджет, угол) -> последний выбранный прогиб; оценка не повторяется, пока кеш граней его покрывает
+_budget_deflections: dict = {}
+BUDGET_MEMO_SIZE = 64
+
+def budget_deflection(shapes: list, target_deflection: float, triangle_budget: int, angular_tolerance: float,
+                      parallel: bool = True, use_face_cache: bool = False) -> tuple[float, bool]:
+    """choose_deflection on the deflection ladder, without the estimate passes when they are not needed.
+
+    If the face cache already holds every face at the deflection last chosen for these
+    settings, that deflection is reused and no shape is meshed for the estimate.
+    """
+    memo_key = (target_deflection, triangle_budget, angular_tolerance)
+    last = _budget_deflections.get(memo_key)
+    if use_face_cache and last is not None and cache_covers(shapes, last, angular_tolerance, relative=False):
+        return last, False
+    deflection, clean = choose_deflection(shapes, target_deflection, triangle_budget, angular_tolerance, parallel=parallel)
+    deflection = max(snap_deflection(deflection), target_deflection)
+    if len(_budget_deflections) >= BUDGET_MEMO_SIZE: _budget_deflections.clear()
+    _budget_deflections[memo_key] = deflection
+    return deflection, clean
+
+
+# --- Кеш триангуляций граней ---
+# (сигнатура грани, настройки) -> MeshBuffers в мировых координатах.
+# После локальной правки большинство граней совпадает с прошлым расчетом и
+# берется отсюда, мешируются только новые/измененные грани.
+FACE_CACHE_MAX_FACES = 50000
+SIGNATURE_QUANTUM = 1e-6
+_face_cache: "OrderedDict[tuple, MeshBuffers]" = OrderedDict()
+_EMPTY = MeshBuffers()
+
+def _q(value: float) -> int:
+    return round(value / SIGNATURE_QUANTUM)
+
+def _qpnt(p) -> tuple:
+    return (_q(p.X()), _q(p.Y()), _q(p.Z()))
+
+def face_signature(face) -> tuple:
+    """Geometry signature of a face that survives re-evaluation of the shape.
+
+    Combines the surface type and a surface sample at the UV centre, the
+    parametric and spatial bounds, and the discretisation-relevant data of the
+    boundary edges (curve type, end and mid points). A face whose boundary
+    changed gets a new signature, so cached and fresh faces keep matching
+    edge discretisations.
+    """
+    wrapped = face.wrapped
+    surf = BRepAdaptor_Surface(wrapped)
+    u0, u1, v0, v1 = BRepTools.UVBounds_s(wrapped)
+    mid = surf.Value(0.5 * (u0 + u1), 0.5 * (v0 + v1))
+
+    box = Bnd_Box()
+    BRepBndLib.Add_s(wrapped, box, False) # Без триангуляции - не зависит от меша
+    bounds = tuple(_q(v) for v in box.Get())
+
+    edges = []
+    for edge in face.Edges():
+        curve = BRepAdaptor_Curve(edge.wrapped)
+        first, last = curve.FirstParameter(), curve.LastParameter()
+        edges.append((int(curve.GetType()), _qpnt(curve.Value(first)), _qpnt(curve.Value(last)),
+                      _qpnt(curve.Value(0.5 * (first + last)))))
+    edges.sort()
+
+    return (int(surf.GetType()), int(wrapped.Orientation()), _qpnt(mid),
+            (_q(u0), _q(u1), _q(v0), _q(v1)), bounds, tuple(edges))
+
+
+def clear_face_cache():
+    """Drops all cached face triangulations."""
+    _face_cache.clear()
+    _budget_deflections.clear()
+
+
+def cache_covers(shapes: list, tolerance: float, angular_tolerance: float, relative: bool) -> bool:
+    """True if every face of the shapes is in the face cache for these settings."""
+    settings = (tolerance, angular_tolerance, relative)
+    return all((face_signature(face), settings) in _face_cache for shape in shapes for face in shape.Faces())
+
+
+def _tessellate_cached(shapes: list, tolerance: float, angular_tolerance: float,
+                       relative: bool, parallel: bool, clean: bool) -> MeshBuffers:
+    """Tessellation that meshes only faces missing from the face cache."""
+    settings = (tolerance, angular_tolerance, relative)
+    faces = [face for shape in shapes for face in shape.Faces()]
+    keys = [(face_signature(face), settings) for face in faces]
+
+    parts = []; missing = []
+    for i, key in enumerate(keys):
+        buf = _face_cache.get(key)
+        if buf is None: missing.append(i)
+        else: _face_cache.move_to_end(key)
+        parts.append(buf)
+
+    if missing:
+        # Меширование только новых граней - одним параллельным проходом
+        mesh_shapes([faces[i] for i in missing], tolerance, angular_tolerance,
+                    relative=relative, parallel=parallel, clean=clean)
+        for i in missing:
+            buf = face_buffers(faces[i]) or _EMPTY
+            parts[i] = buf
+            _face_cache[keys[i]] = buf
+        while len(_face_cache) > FACE_CACHE_MAX_FACES:
+            _face_cache.popitem(last=False)
+
+    logger.debug(f"Face cache: {len(faces) - len(missing)}/{len(faces)} faces reused.")
+    return MeshBuffers.from_faces(parts)
+
+
+def tessellate_shapes(shapes: list, tolerance: float, angular_tolerance: float,
+                      relative: bool = True, parallel: bool = True, clean: bool = False,
+                      use_face_cache: bool = False) -> MeshBuffers:
+    """Meshes all shapes (in parallel if requested) and returns joined buffers."""
+    if use_face_cache:
+        t0 = time.perf_counter()
+        buffers = drop_degenerate(_tessellate_cached(shapes, tolerance, angular_tolerance, relative, parallel, clean))
+        logger.debug(f"Tessellated {len(shapes)} shape(s) with face cache: {buffers.triangle_count} tris "
+                     f"in {time.perf_counter() - t0:.4f}s")
+        return buffers
+
+    t0 = time.perf_counter()
+    mesh_shapes(shapes, tolerance, angular_tolerance, relative=relative, parallel=parallel, clean=clean)
+    t1 = time.perf_counter()
+    buffers = drop_degenerate(extract_buffers(shapes))
+    t2 = time.perf_counter()
+    logger.debug(f"Tessellated {len(shapes)} shape(s): {buffers.vertex_count} verts, {buffers.triangle_count} tris "
+                 f"(tol={tolerance:.4g}, relative={relative}, mesh {t1 - t0:.4f}s, extract {t2 - t1:.4f}s, parallel={parallel})")
+    return buffers
+
+
+# --- Прокси-отображение ---
+# Порядок углов: биты индекса = знаки по осям X/Y/Z
+_BOX_EDGES = np.array([(0, 1), (2, 3), (4, 5), (6, 7), (0, 2), (1, 3), (4, 6), (5, 7),
+                       (0, 4), (1, 5), (2, 6), (3, 7)], dtype=np.int32)
+
+def _box_lines(center, axes, half_sizes) -> LineBuffers:
+    signs = np.array([[1 if i & 1 else -1, 1 if i & 2 else -1, 1 if i & 4 else -1] for i in range(8)], dtype=np.float64)
+    corners = center + (signs * half_sizes) @ axes
+    return LineBuffers(corners, _BOX_EDGES.copy())
+
+def aabb_lines(shapes: list) -> LineBuffers:
+    """Wire box of the axis-aligned bounding box of all shapes."""
+    bb = make_compound(shapes).BoundingBox()
+    center = np.array([bb.center.x, bb.center.y, bb.center.z])
+    half = np.array([bb.xlen, bb.ylen, bb.zlen]) * 0.5
+    return _box_lines(center, np.eye(3), half)
+
+def obb_lines(shapes: list) -> LineBuffers:
+    """Wire box of the oriented bounding box of all shapes (Bnd_OBB)."""
+    obb = Bnd_OBB()
+    BRepBndLib.AddOBB_s(make_compound(shapes).wrapped, obb, True, False, True)
+    xyz = lambda v: (v.X(), v.Y(), v.Z())
+    center = np.array(xyz(obb.Center()))
+    axes = np.array([xyz(obb.XDirection()), xyz(obb.YDirection()), xyz(obb.ZDirection())])
+    half = np.array([obb.XHSize(), obb.YHSize(), obb.ZHSize()])
+    return _box_lines(center, axes, half)
+
+def discretize_edge(edge, deflection: float, angular_tolerance: float = 0.2):
+    """Points along an edge curve (GCPnts_TangentialDeflection) as a (k, 3) array."""
+    if BRep_Tool.Degenerated_s(edge.wrapped): return np.empty((0, 3), dtype=np.float64)
+    curve = BRepAdaptor_Curve(edge.wrapped)
+    sampler = GCPnts_TangentialDeflection(curve, angular_tolerance, deflection)
+    n = sampler.NbPoints()
+    points = np.empty((n, 3), dtype=np.float64)
+    for i in range(n):
+        p = sampler.Value(i + 1)
+        points[i] = (p.X(), p.Y(), p.Z())
+    return points
+
+def edge_lines(edges: list, deflection: float, angular_tolerance: float = 0.2) -> LineBuffers:
+    """One loose-edge buffer with the discretised curves of all given edges."""
+    return LineBuffers.from_polylines([discretize_edge(e, deflection, angular_tolerance) for e in edges])
+
+def feature_edge_lines(shapes: list, deflection: float, angular_tolerance: float = 0.2) -> LineBuffers:
+    """Wireframe of all B-rep edges of the shapes, without any triangulation."""
+    return edge_lines([e for shape in shapes for e in shape.Edges()], deflection, angular_tolerance)